@@ -3,7 +3,7 @@ Configuration settings for LeetCoach API
 """
 
 import os
-from typing import List
+from typing import List, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
@@ -28,6 +28,8 @@ class Settings(BaseSettings):
 
     # vLLM Configuration (local-only, no external endpoints)
     VLLM_BASE_URL: str = "http://vllm:8000"
+    VLLM_MAX_CONNECTIONS: int = 8
+    VLLM_TIMEOUT_S: float = 30.0
 
     # CUDA Acceleration
     CUDA_ACCEL_URL: str = "http://cuda_accel:8001"
@@ -39,6 +41,46 @@ class Settings(BaseSettings):
 
     # Runner Configuration
     RUNNER_URL: str = "http://runner:8002"
+    RUNNER_MAX_CONNECTIONS: int = 32  # pooled connections shared by all judge calls
+    RUNNER_TIMEOUT_S: float = 60.0
+    RUN_COMPILE_TIER: str = "fast"  # C++ tier for interactive runs; submissions always use "optimized"
+    
+    # Generated test suites kept serialized in memory by the judge (LRU)
+    SUITE_CACHE_SIZE: int = 256
+    
+    # Problem snapshots shared by the routers (LRU with TTL)
+    PROBLEM_CACHE_SIZE: int = 1024
+    PROBLEM_CACHE_TTL_S: float = 300.0
+    
+    # Differential testing of accepted Python submissions against reference solutions
+    DIFFERENTIAL_TESTING: bool = True
+    DIFFERENTIAL_INPUTS: int = 200
+    DIFFERENTIAL_TIME_BUDGET_S: float = 2.0
+    
+    # Shrinking large failing tests (Python, templates with a reference solution)
+    SHRINK_FAILING_INPUTS: bool = True
+    SHRINK_MIN_SIZE: int = 16  # smaller failing inputs are shown as they are
+    SHRINK_BATCH_SIZE: int = 48  # candidate inputs per runner call
+    SHRINK_TIME_BUDGET_S: float = 5.0
+    
+    # Background judging for /submit?async=true
+    JUDGE_WORKERS: int = 8  # submissions judged at once by the API process
+    JUDGE_QUEUE_SIZE: int = 1000  # waiting submissions before /submit answers 503
+    JUDGE_LEASE_S: float = 600.0  # claimed submissions still PENDING after this are judged again
+    SUBMIT_MAX_WAIT_S: float = 30.0  # longest long-poll on GET /submit/{id}
+    SUBMIT_RECHECK_S: float = 2.0  # long-polls re-read the row (judged by another process)
+    
+    # Bulk judging on /submit/batch
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_CONCURRENCY: int = 16  # runner calls in flight per batch
+    
+    # Rejudging stored submissions (CLI and /admin/rejudge)
+    REJUDGE_CONCURRENCY: int = 8
+    REJUDGE_BATCH_SIZE: int = 200  # rows fetched, judged and updated per round
+    ADMIN_TOKEN: Optional[str] = None  # X-Admin-Token for /admin; unset disables the endpoints
+
+    # Shutdown: seconds running submissions get to finish after SIGTERM
+    DRAIN_TIMEOUT_S: float = 30.0
 
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
@@ -2,8 +2,9 @@
 Database configuration and session management
 """
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
@@ -27,6 +28,21 @@ AsyncSessionLocal = async_sessionmaker(
 # Create base class for models
 Base = declarative_base()
 
+# Columns and indexes added after the first release, applied at startup.
+# create_all never alters an existing table and there are no migrations, so
+# each statement must be idempotent; db/init.sql carries the same statements.
+SCHEMA_UPGRADES: List[str] = [
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64)",
+    # Rows stored before code_hash existed get it too, so their results can be
+    # reused (it is judge.code_hash: SHA-256 of the UTF-8 code, in hex)
+    "UPDATE submissions SET code_hash = encode(sha256(convert_to(code, 'UTF8')), 'hex') WHERE code_hash IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_submissions_code ON submissions(problem_id, code_hash, created_at)",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(100)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_idempotency ON submissions(idempotency_key)",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP",
+    "CREATE INDEX IF NOT EXISTS idx_submissions_pending ON submissions(created_at, id) WHERE verdict = 'PENDING'",
+]
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session."""
@@ -41,5 +57,8 @@ async def init_db() -> None:
     """Initialize database tables."""
     async with engine.begin() as conn:
         # Import all models to ensure they are registered
-        from src.core.schemas import Problem, Submission, ChatMessage, Feedback
+        from src.core.schemas import Problem, ProblemTests, Submission, ChatMessage, Feedback
         await conn.run_sync(Base.metadata.create_all)
+        # Bring tables created by an earlier release up to date
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
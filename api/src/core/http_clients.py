@@ -0,0 +1,138 @@
+"""
+Shared HTTP clients for the upstream services (runner, vLLM)
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import structlog
+
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+RUNNER = "runner"
+VLLM = "vllm"
+
+
+def _upstreams() -> Dict[str, Dict[str, float]]:
+    """Connection limit and timeout per upstream."""
+    return {
+        RUNNER: {"max_connections": settings.RUNNER_MAX_CONNECTIONS, "timeout_s": settings.RUNNER_TIMEOUT_S},
+        VLLM: {"max_connections": settings.VLLM_MAX_CONNECTIONS, "timeout_s": settings.VLLM_TIMEOUT_S},
+    }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that reports when its connection goes back to the pool."""
+    
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+    
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+    
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Pooled transport counting requests in flight against the connection limit.
+    
+    A request that starts while all ``max_connections`` are busy has to wait
+    for one; those are counted as saturated.
+    """
+    
+    def __init__(self, max_connections: int, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_connections = max_connections
+        self._transport = transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated = 0
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.in_flight >= self.max_connections:
+            self.saturated += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+        if response.is_closed:
+            self._release()  # body already read by the inner transport
+        else:
+            response.stream = _ReleasingStream(response.stream, self._release)
+        return response
+    
+    def _release(self) -> None:
+        self.in_flight -= 1
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "saturated": self.saturated,
+            "saturation_rate": round(self.saturated / self.requests, 3) if self.requests else 0.0
+        }
+
+
+class HttpClients:
+    """One pooled ``httpx.AsyncClient`` per upstream, opened and closed with the app.
+    
+    Services share these clients instead of opening their own, so keep-alive
+    connections survive between requests. Each service takes its client as a
+    constructor argument and defaults to the one registered here.
+    """
+    
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, MeteredTransport] = {}
+    
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Client for an upstream, created on first use."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            upstream = _upstreams()[name]
+            transport = MeteredTransport(int(upstream["max_connections"]))
+            client = httpx.AsyncClient(transport=transport, timeout=upstream["timeout_s"])
+            self._clients[name] = client
+            self._transports[name] = transport
+        return client
+    
+    def start(self) -> None:
+        for name in _upstreams():
+            self.get(name)
+    
+    async def close(self) -> None:
+        for name, client in self._clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Closing HTTP client failed", upstream=name, error=str(e))
+        self._clients.clear()
+        self._transports.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {name: transport.stats() for name, transport in self._transports.items()}
+
+
+# Global registry instance
+http_clients = HttpClients()
@@ -0,0 +1,119 @@
+"""
+Graceful drain for the API
+
+The runner is built and deployed on its own and keeps its own variant, which
+also reports "starting" until its warm-up is done. The API needs no such
+state: uvicorn only serves once the lifespan startup has finished.
+"""
+
+import asyncio
+import os
+import signal
+import threading
+from typing import Any, Iterable, Optional
+
+import structlog
+
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+READY = "ready"
+DRAINING = "draining"
+
+
+class Lifecycle:
+    """Admission control for job endpoints plus the ready/draining state.
+    
+    On SIGTERM new jobs get a 503 and /healthz reports draining; running jobs
+    get up to ``DRAIN_TIMEOUT_S`` to finish before the signal is passed on to
+    the server. A second SIGTERM skips the wait. Shutdown steps after the
+    drain (the judge queue) get what is left of the same deadline.
+    """
+    
+    def __init__(self, job_paths: Iterable[str], drain_timeout_s: float = settings.DRAIN_TIMEOUT_S):
+        self.job_paths = tuple(job_paths)
+        self.drain_timeout_s = drain_timeout_s
+        self.state = READY
+        self.deadline: Optional[float] = None  # event-loop time the drain ends by
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._previous_handler: Any = None
+        self._drain_task: Optional[asyncio.Task] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+    
+    def is_job(self, method: str, path: str) -> bool:
+        return method != "GET" and path.startswith(self.job_paths)
+    
+    def admit(self) -> bool:
+        """Count a new job in, or refuse it while draining."""
+        if self.state == DRAINING:
+            return False
+        self.in_flight += 1
+        self._idle.clear()
+        return True
+    
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+    
+    def remaining_s(self) -> float:
+        """Seconds left until the drain deadline (the whole budget before a drain starts)."""
+        if self.deadline is None:
+            return self.drain_timeout_s
+        return max(0.0, self.deadline - asyncio.get_running_loop().time())
+    
+    async def drain(self) -> bool:
+        """Stop admitting jobs and wait for running ones; False if the deadline passed."""
+        self.state = DRAINING
+        if self.deadline is None:
+            self.deadline = asyncio.get_running_loop().time() + self.drain_timeout_s
+        logger.info("Draining", in_flight=self.in_flight, timeout_s=self.remaining_s())
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.remaining_s())
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Drain deadline passed", in_flight=self.in_flight)
+            return False
+    
+    def install_sigterm(self) -> None:
+        """Drain on SIGTERM, then pass the signal on to the previous handler."""
+        if threading.current_thread() is not threading.main_thread():
+            return  # signal handlers can only be set from the main thread (e.g. not under test clients)
+        loop = asyncio.get_running_loop()
+        self._previous_handler = signal.getsignal(signal.SIGTERM)
+        
+        def _on_sigterm(signum, frame):
+            if self.state == DRAINING:
+                self._exit(signum, frame)
+                return
+            self.state = DRAINING
+            loop.call_soon_threadsafe(self._start_drain, signum)
+        
+        signal.signal(signal.SIGTERM, _on_sigterm)
+    
+    def _start_drain(self, signum: int) -> None:
+        self._drain_task = asyncio.ensure_future(self._drain_then_exit(signum))
+    
+    async def _drain_then_exit(self, signum: int) -> None:
+        await self.drain()
+        self._exit(signum, None)
+    
+    def _exit(self, signum: int, frame: Any) -> None:
+        if callable(self._previous_handler):
+            self._previous_handler(signum, frame)
+        else:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+    
+    def stats(self) -> dict:
+        return {"state": self.state, "in_flight": self.in_flight}
+
+
+# Submissions and runs are the jobs worth waiting for on shutdown
+lifecycle = Lifecycle(job_paths=["/submit"])
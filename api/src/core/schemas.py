@@ -7,10 +7,11 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, DateTime, Integer, String, Text, JSON, ForeignKey, ARRAY
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String, Text, JSON, ForeignKey, ARRAY
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
+from src.core.config import settings
 from src.core.db import Base
 
 
@@ -34,6 +35,19 @@ class Problem(Base):
     # Relationships
     submissions = relationship("Submission", back_populates="problem", cascade="all, delete-orphan")
     chat_messages = relationship("ChatMessage", back_populates="problem", cascade="all, delete-orphan")
+    test_suite = relationship("ProblemTests", uselist=False, cascade="all, delete-orphan")
+
+
+class ProblemTests(Base):
+    """Generated test suite of a problem, stored once when the problem is created."""
+    __tablename__ = "problem_tests"
+    
+    problem_id = Column(UUID(as_uuid=True), ForeignKey("problems.problem_id", ondelete="CASCADE"), primary_key=True)
+    format_version = Column(Integer, nullable=False)
+    test_count = Column(Integer, nullable=False)
+    tests_hash = Column(String(64), nullable=False)  # SHA-256 of the uncompressed JSON (the runner's test-set hash)
+    tests = Column(LargeBinary, nullable=False)  # zlib-compressed canonical JSON of all test cases
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class Submission(Base):
@@ -44,17 +58,25 @@ class Submission(Base):
     problem_id = Column(UUID(as_uuid=True), ForeignKey("problems.problem_id"), nullable=False)
     language = Column(String(10), nullable=False)
     code = Column(Text, nullable=False)
+    code_hash = Column(String(64))  # SHA-256 of code (backfilled at startup); finds earlier results for the same code
     verdict = Column(String(10), nullable=False)
     passed = Column(Integer, nullable=False, default=0)
     total = Column(Integer, nullable=False, default=0)
     runtime_ms = Column(Integer)
     memory_kb = Column(Integer)
     details = Column(JSON)
+    idempotency_key = Column(String(100))  # client-chosen, unique; retries return this submission
+    claimed_at = Column(DateTime)  # when a judge worker took this PENDING submission
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     problem = relationship("Problem", back_populates="submissions")
     feedback = relationship("Feedback", back_populates="submission", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("idx_submissions_code", "problem_id", "code_hash", "created_at"),
+        Index("idx_submissions_idempotency", "idempotency_key", unique=True),
+    )
 
 
 class ChatMessage(Base):
@@ -141,6 +163,22 @@ class SubmissionResponse(SubmissionBase):
     model_config = {"from_attributes": True}
 
 
+class RejudgeRequest(BaseModel):
+    """Rejudge request schema; unset filters match every submission."""
+    problem_id: Optional[uuid.UUID] = None
+    template_slug: Optional[str] = None
+    language: Optional[str] = None
+    verdict: Optional[str] = None
+    after: Optional[uuid.UUID] = None
+    regenerate_tests: bool = False
+    dry_run: bool = False
+
+
+class BatchSubmitRequest(BaseModel):
+    """Bulk judging request schema."""
+    items: List[SubmissionCreate] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+
 class ChatMessageBase(BaseModel):
     """Base chat message schema."""
     user_message: str
@@ -0,0 +1,51 @@
+"""
+Single-flight coalescing of identical concurrent operations
+"""
+
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs at most one operation per key at a time and shares its outcome.
+    
+    The first caller starts the work as a task; callers arriving while it runs
+    wait for the same task and get a copy of its result (or its exception).
+    The task is shielded, so a caller going away does not cancel the work for
+    the others.
+    """
+    
+    def __init__(self):
+        self._flights: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.executions = 0
+        self.coalesced = 0
+    
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+    
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        task = self._flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        
+        self.executions += 1
+        task = asyncio.ensure_future(work())
+        self._flights[key] = task
+        task.add_done_callback(lambda done: self._land(key, done))
+        return await asyncio.shield(task)
+    
+    def _land(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        self._flights.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved: every waiter may have gone away
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
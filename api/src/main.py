@@ -7,13 +7,18 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 import structlog
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from src.core.config import settings
-from src.core.db import init_db
-from src.routers import chat, feedback, problems, solutions, submit
+from src.core.db import AsyncSessionLocal, init_db
+from src.core.http_clients import http_clients
+from src.core.lifecycle import lifecycle
+from src.routers import admin, chat, feedback, problems, solutions, stats, submit
+from src.services.judge_queue import judge_queue
+from src.services.percentiles import percentile_index
 
 # Configure structured logging
 structlog.configure(
@@ -42,13 +47,33 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan manager."""
     logger.info("Starting LeetCoach API")
     
+    # SIGTERM lets running submissions finish before the server stops
+    lifecycle.install_sigterm()
+    
+    # Pooled upstream clients shared by all services
+    http_clients.start()
+    
     # Initialize database
     await init_db()
     logger.info("Database initialized")
     
+    # Percentile sketches live in memory; rebuild them from past submissions
+    try:
+        async with AsyncSessionLocal() as session:
+            await percentile_index.rebuild(session)
+    except Exception as e:
+        logger.warning("Percentile rebuild failed", error=str(e))
+    
+    # Background judge workers; submissions left PENDING by the last run are queued again
+    judge_queue.start()
+    judge_queue.start_recovery()
+    
     yield
     
     logger.info("Shutting down LeetCoach API")
+    # The SIGTERM drain may have used part of the budget already
+    await judge_queue.close(lifecycle.remaining_s())
+    await http_clients.close()
 
 
 # Create FastAPI app
@@ -75,18 +100,60 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS,
 )
 
+
+class _ReleaseWhenSent:
+    """ASGI response that holds its job's drain slot until the body is sent or abandoned."""
+    
+    def __init__(self, response: Response):
+        self.response = response
+    
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            lifecycle.release()
+
+
+@app.middleware("http")
+async def admit_jobs(request: Request, call_next):
+    """Track running submissions and refuse new ones while draining."""
+    if not lifecycle.is_job(request.method, request.url.path):
+        return await call_next(request)
+    if not lifecycle.admit():
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service is shutting down, please retry"},
+            headers={"Retry-After": "5"}
+        )
+    try:
+        response = await call_next(request)
+    except BaseException:
+        lifecycle.release()
+        raise
+    # Streamed bodies (e.g. /submit/batch) are still being judged once call_next returns
+    return _ReleaseWhenSent(response)
+
 # Include routers
 app.include_router(problems.router, prefix="/problems", tags=["problems"])
 app.include_router(submit.router, prefix="/submit", tags=["submit"])
 app.include_router(solutions.router, prefix="/solutions", tags=["solutions"])
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 app.include_router(feedback.router, prefix="/feedback", tags=["feedback"])
+app.include_router(stats.router, prefix="/stats", tags=["stats"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 
 @app.get("/healthz")
-async def health_check() -> dict[str, str]:
-    """Health check endpoint."""
-    return {"status": "healthy", "service": "leetcoach-api"}
+async def health_check() -> JSONResponse:
+    """Health check endpoint (503 while starting up or draining)."""
+    return JSONResponse(
+        status_code=200 if lifecycle.ready else 503,
+        content={
+            "status": "healthy" if lifecycle.ready else lifecycle.state,
+            "service": "leetcoach-api",
+            "in_flight": lifecycle.in_flight
+        }
+    )
 
 
 @app.get("/")
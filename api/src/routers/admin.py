@@ -0,0 +1,70 @@
+"""
+Admin router - maintenance jobs (rejudging)
+"""
+
+import asyncio
+import secrets
+from typing import Any, Dict, Optional
+
+import structlog
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from src.core.config import settings
+from src.core.schemas import RejudgeRequest
+from src.services.rejudge import RejudgeReport, rejudge
+
+logger = structlog.get_logger()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Admin endpoints are disabled unless ADMIN_TOKEN is configured."""
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# One rejudge at a time per API process; the last report stays readable
+_rejudge_task: Optional[asyncio.Task] = None
+_rejudge_report: Optional[RejudgeReport] = None
+
+
+async def _run_rejudge(request: RejudgeRequest, report: RejudgeReport) -> None:
+    try:
+        await rejudge(
+            problem_id=request.problem_id,
+            template_slug=request.template_slug,
+            language=request.language,
+            verdict=request.verdict,
+            after=request.after,
+            regenerate_tests=request.regenerate_tests,
+            dry_run=request.dry_run,
+            report=report
+        )
+    except Exception as e:
+        logger.error("Rejudge failed", error=str(e), cursor=str(report.cursor))
+
+
+@router.post("/rejudge", status_code=202, response_model=Dict[str, Any])
+async def start_rejudge(request: RejudgeRequest) -> Dict[str, Any]:
+    """Start rejudging matching submissions in the background.
+    
+    Follow it with ``GET /admin/rejudge``; after a failure or restart, pass the
+    report's ``cursor`` as ``after`` to resume.
+    """
+    global _rejudge_task, _rejudge_report
+    
+    if _rejudge_task is not None and not _rejudge_task.done():
+        raise HTTPException(status_code=409, detail="A rejudge is already running")
+    
+    _rejudge_report = RejudgeReport(request.after, request.dry_run)
+    _rejudge_task = asyncio.ensure_future(_run_rejudge(request, _rejudge_report))
+    return _rejudge_report.as_dict()
+
+
+@router.get("/rejudge", response_model=Dict[str, Any])
+async def get_rejudge() -> Dict[str, Any]:
+    """Get the progress of the running or last rejudge."""
+    if _rejudge_report is None:
+        raise HTTPException(status_code=404, detail="No rejudge has run")
+    return _rejudge_report.as_dict()
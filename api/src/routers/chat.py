@@ -10,8 +10,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from src.core.db import get_db
-from src.core.schemas import ChatMessageCreate, ChatMessageResponse, Problem
+from src.core.schemas import ChatMessageCreate, ChatMessageResponse
 from src.services.gpt_coach import GPTCoachService
+from src.services.problem_cache import problem_cache
 
 router = APIRouter()
 
@@ -44,10 +45,7 @@ async def send_message(
     """Send a message to the GPT-OSS coach."""
     
     # Validate problem exists
-    result = await db.execute(
-        select(Problem).where(Problem.problem_id == message.problem_id)
-    )
-    problem = result.scalar_one_or_none()
+    problem = await problem_cache.get(db, message.problem_id)
     
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
@@ -107,13 +105,10 @@ async def websocket_endpoint(websocket: WebSocket, problem_id: uuid.UUID):
             # Get coach response
             coach_service = GPTCoachService()
             try:
-                # Get problem context (you might want to cache this)
+                # Get problem context (cached, so no query per message)
                 from src.core.db import AsyncSessionLocal
                 async with AsyncSessionLocal() as db:
-                    result = await db.execute(
-                        select(Problem).where(Problem.problem_id == problem_id)
-                    )
-                    problem = result.scalar_one_or_none()
+                    problem = await problem_cache.get(db, problem_id)
                     
                     if not problem:
                         await websocket.send_text(json.dumps({
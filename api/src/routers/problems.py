@@ -13,6 +13,8 @@ from src.core.db import get_db
 from src.core.schemas import ProblemResponse, ProblemWithTests
 from src.services.problem_gen.registry import registry
 from src.services.problem_gen.utils import generate_test_cases
+from src.services.problem_cache import problem_cache
+from src.services.test_suites import build_suite
 
 router = APIRouter()
 
@@ -67,9 +69,13 @@ async def get_random_problem(
     # Save problem to database
     from src.core.schemas import Problem
     problem = Problem(**problem_create.dict())
+    # Tests are fixed at creation; later generator changes do not affect this problem
+    problem.test_suite = build_suite(test_cases)
     db.add(problem)
     await db.commit()
     await db.refresh(problem)
+    # New problems are usually opened, run and submitted right away
+    problem_cache.put(problem)
     
     # Convert to response format
     problem_response = ProblemResponse.model_validate(problem)
@@ -10,7 +10,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
 from src.core.db import get_db
-from src.core.schemas import SolutionResponse, Problem, Submission
+from src.core.schemas import SolutionResponse, Submission
+from src.services.problem_cache import problem_cache
 
 router = APIRouter()
 
@@ -35,10 +36,7 @@ async def get_solution(
         )
     
     # Get problem details
-    result = await db.execute(
-        select(Problem).where(Problem.problem_id == problem_id)
-    )
-    problem = result.scalar_one_or_none()
+    problem = await problem_cache.get(db, problem_id)
     
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
@@ -0,0 +1,62 @@
+"""
+Stats router - runtime/memory percentiles of accepted submissions, cache and pool metrics
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Query
+
+from src.core.http_clients import http_clients
+from src.services.judge import judge_flights, suite_cache
+from src.services.judge_queue import judge_queue
+from src.services.problem_cache import problem_cache
+from src.services.percentiles import percentile_index
+
+router = APIRouter()
+
+
+@router.get("/percentiles", response_model=Dict[str, Any])
+async def get_percentiles(
+    template_slug: str = Query(..., description="Problem template"),
+    language: str = Query(..., description="python or cpp"),
+    difficulty: str = Query(..., description="Easy, Medium or Hard"),
+    runtime_ms: Optional[int] = Query(None, description="Runtime to rank against the distribution"),
+    memory_kb: Optional[int] = Query(None, description="Memory to rank against the distribution")
+) -> Dict[str, Any]:
+    """Get the runtime/memory distribution for a template, optionally ranking one result."""
+    
+    summary = percentile_index.summary(template_slug, language, difficulty)
+    if runtime_ms is not None or memory_kb is not None:
+        summary["rank"] = percentile_index.rank(template_slug, language, difficulty, runtime_ms, memory_kb)
+    
+    return summary
+
+
+@router.get("/test-suites", response_model=Dict[str, Any])
+async def get_test_suite_cache() -> Dict[str, Any]:
+    """Get hit-rate metrics of the judge's generated test suite cache."""
+    return suite_cache.stats()
+
+
+@router.get("/http-pools", response_model=Dict[str, Any])
+async def get_http_pools() -> Dict[str, Any]:
+    """Get in-flight, peak and saturation counts of the upstream connection pools."""
+    return http_clients.stats()
+
+
+@router.get("/judge-flights", response_model=Dict[str, Any])
+async def get_judge_flights() -> Dict[str, Any]:
+    """Get how many judge requests ran and how many joined an identical one in flight."""
+    return judge_flights.stats()
+
+
+@router.get("/judge-queue", response_model=Dict[str, Any])
+async def get_judge_queue() -> Dict[str, Any]:
+    """Get worker and backlog counts of background judging."""
+    return judge_queue.stats()
+
+
+@router.get("/problem-cache", response_model=Dict[str, Any])
+async def get_problem_cache() -> Dict[str, Any]:
+    """Get hit-rate metrics of the shared problem snapshot cache."""
+    return problem_cache.stats()
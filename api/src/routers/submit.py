@@ -2,32 +2,88 @@
 Submit router - handles code submission and execution
 """
 
+import asyncio
+import json
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from src.core.db import get_db
-from src.core.schemas import SubmissionCreate, SubmissionResponse, Problem
-from src.services.judge import JudgeService
+from src.core.config import settings
+from src.core.db import AsyncSessionLocal, get_db
+from src.core.schemas import BatchSubmitRequest, SubmissionCreate, SubmissionResponse, Submission
+from src.core.single_flight import SingleFlight
+from src.services.batch_judge import judge_batch, prepare_batch
+from src.services.judge import JudgeService, code_hash
+from src.services.judge_queue import PENDING, JudgeJob, judge_and_record, judge_queue
+from src.services.problem_cache import ProblemSnapshot, problem_cache
 
 router = APIRouter()
 
+# Concurrent retries carrying the same Idempotency-Key share one submission
+submit_flights = SingleFlight()
+
+
+def _submission_response(submission: Submission) -> SubmissionResponse:
+    """Response for a stored submission."""
+    # Check if solutions should be unlocked
+    unlocked_solutions = submission.verdict in ["ACCEPTED", "WRONG_ANSWER", "TIMEOUT", "RUNTIME_ERROR"]
+    
+    return SubmissionResponse(
+        id=submission.id,
+        problem_id=submission.problem_id,
+        language=submission.language,
+        code=submission.code,
+        verdict=submission.verdict,
+        passed=submission.passed,
+        total=submission.total,
+        runtime_ms=submission.runtime_ms,
+        memory_kb=submission.memory_kb,
+        details=submission.details,
+        created_at=submission.created_at,
+        unlocked_solutions=unlocked_solutions
+    )
+
+
+async def _find_by_idempotency_key(db: AsyncSession, key: str) -> Optional[Submission]:
+    result = await db.execute(select(Submission).where(Submission.idempotency_key == key))
+    return result.scalar_one_or_none()
+
+
+def _check_replay(stored: SubmissionResponse, submission: SubmissionCreate) -> None:
+    """A retried request gets the original submission; the key must not be reused for other code."""
+    if (stored.problem_id, stored.language, stored.code) != (
+        submission.problem_id, submission.language, submission.code
+    ):
+        raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different submission")
+
 
 @router.post("/", response_model=SubmissionResponse)
 async def submit_code(
     submission: SubmissionCreate,
+    response: Response,
+    background: bool = Query(False, alias="async", description="Answer 202 at once and judge in the background"),
+    memory_profile: bool = Query(False, description="Trace per-test memory (Python only)"),
+    stable_timing: bool = Query(False, description="Pinned, repeated timing (accepted submissions only)"),
+    metered: bool = Query(False, description="Count executed lines against the template budget (Python only)"),
+    idempotency_key: Optional[str] = Header(
+        None, max_length=100, description="Retries with the same key return the original submission"
+    ),
     db: AsyncSession = Depends(get_db)
 ) -> SubmissionResponse:
-    """Submit code for execution and judging."""
+    """Submit code for execution and judging.
+    
+    With ``async=true`` the submission is stored as PENDING and returned with
+    202; poll ``GET /submit/{id}`` (optionally with ``wait``) or subscribe on
+    ``/submit/ws/{id}`` for the verdict.
+    """
     
     # Validate problem exists
-    result = await db.execute(
-        select(Problem).where(Problem.problem_id == submission.problem_id)
-    )
-    problem = result.scalar_one_or_none()
+    problem = await problem_cache.get(db, submission.problem_id)
     
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
@@ -39,86 +95,121 @@ async def submit_code(
             detail="Language must be 'python' or 'cpp'"
         )
     
+    if background and not judge_queue.has_capacity():
+        raise HTTPException(
+            status_code=503,
+            detail="Judge queue is full, please retry",
+            headers={"Retry-After": "5"}
+        )
+    
+    options = {"memory_profile": memory_profile, "stable_timing": stable_timing, "metered": metered}
+    
+    if idempotency_key is None:
+        stored = await _create_and_judge(submission, problem, options, background, None, db)
+    else:
+        async def submit_once() -> SubmissionResponse:
+            # Runs shielded and may outlive this request, so it has its own session
+            async with AsyncSessionLocal() as flight_db:
+                existing = await _find_by_idempotency_key(flight_db, idempotency_key)
+                if existing is not None:
+                    return _submission_response(existing)
+                return await _create_and_judge(
+                    submission, problem, options, background, idempotency_key, flight_db
+                )
+        
+        # Concurrent requests with this key share the first one's submission,
+        # whatever body that one carried
+        stored = await submit_flights.run(idempotency_key, submit_once)
+        _check_replay(stored, submission)
+    
+    if stored.verdict == PENDING:
+        response.status_code = 202
+        response.headers["Location"] = f"/submit/{stored.id}"
+    return stored
+
+
+async def _create_and_judge(
+    submission: SubmissionCreate,
+    problem: ProblemSnapshot,
+    options: Dict[str, bool],
+    background: bool,
+    idempotency_key: Optional[str],
+    db: AsyncSession
+) -> SubmissionResponse:
     # Create submission record
-    from src.core.schemas import Submission
     db_submission = Submission(
         problem_id=submission.problem_id,
         language=submission.language,
         code=submission.code,
-        verdict="RUNTIME_ERROR",  # Start with RUNTIME_ERROR, will be updated after judging
+        code_hash=code_hash(submission.code),
+        # Background jobs start PENDING; otherwise RUNTIME_ERROR until judged
+        verdict=PENDING if background else "RUNTIME_ERROR",
         passed=0,
-        total=0
+        total=0,
+        details={"queued": options} if background else None,
+        idempotency_key=idempotency_key
     )
     
     db.add(db_submission)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another API process stored this Idempotency-Key first
+        await db.rollback()
+        existing = await _find_by_idempotency_key(db, idempotency_key)
+        if existing is None:
+            raise
+        return _submission_response(existing)
     await db.refresh(db_submission)
     
+    if background:
+        judge_queue.enqueue(JudgeJob(db_submission.id, options))
+        return _submission_response(db_submission)
+    
     try:
-        # Judge the submission
-        judge_service = JudgeService()
-        result = await judge_service.judge_submission(
-            problem=problem,
-            code=submission.code,
-            language=submission.language,
-            is_test_run=False
-        )
-        
-        # Update submission with results
-        db_submission.verdict = result["verdict"]
-        db_submission.passed = result["passed"]
-        db_submission.total = result["total"]
-        db_submission.runtime_ms = result.get("runtime_ms")
-        db_submission.memory_kb = result.get("memory_kb")
-        db_submission.details = result.get("details")
-        
-        await db.commit()
-        await db.refresh(db_submission)
-        
-        # Check if solutions should be unlocked
-        unlocked_solutions = db_submission.verdict in ["ACCEPTED", "WRONG_ANSWER", "TIMEOUT", "RUNTIME_ERROR"]
-        
-        return SubmissionResponse(
-            id=db_submission.id,
-            problem_id=db_submission.problem_id,
-            language=db_submission.language,
-            code=db_submission.code,
-            verdict=db_submission.verdict,
-            passed=db_submission.passed,
-            total=db_submission.total,
-            runtime_ms=db_submission.runtime_ms,
-            memory_kb=db_submission.memory_kb,
-            details=db_submission.details,
-            created_at=db_submission.created_at,
-            unlocked_solutions=unlocked_solutions
-        )
-        
+        await judge_and_record(db, db_submission, problem, **options)
     except Exception as e:
-        # Update submission with error
-        db_submission.verdict = "RUNTIME_ERROR"
-        db_submission.details = {"error": str(e)}
-        
-        await db.commit()
-        await db.refresh(db_submission)
-        
         raise HTTPException(
             status_code=500,
             detail=f"Submission failed: {str(e)}"
         )
+    
+    return _submission_response(db_submission)
+
+
+@router.post("/batch")
+async def submit_batch(
+    batch: BatchSubmitRequest,
+    details: bool = Query(False, description="Include per-test details in each line"),
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """Judge many submissions without storing them.
+    
+    Streams one NDJSON line per item, in completion order; ``index`` refers
+    to the item's position in the request.
+    """
+    problems = await prepare_batch(db, batch.items)
+    lines = judge_batch(batch.items, problems, details=details)
+    
+    return StreamingResponse(
+        (json.dumps(line) + "\n" async for line in lines),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.post("/run", response_model=Dict[str, Any])
 async def run_code(
     submission: SubmissionCreate,
+    profile: bool = Query(False, description="Profile the slowest public test"),
+    memory_profile: bool = Query(False, description="Trace per-test memory (Python only)"),
+    metered: bool = Query(False, description="Count executed lines against the template budget (Python only)"),
+    full_values: bool = Query(False, description="Return complete test values instead of previews"),
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Run code without saving submission (for testing)."""
     
     # Validate problem exists
-    result = await db.execute(
-        select(Problem).where(Problem.problem_id == submission.problem_id)
-    )
-    problem = result.scalar_one_or_none()
+    problem = await problem_cache.get(db, submission.problem_id)
     
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
@@ -137,7 +228,12 @@ async def run_code(
             problem=problem,
             code=submission.code,
             language=submission.language,
-            is_test_run=True
+            is_test_run=True,
+            profile=profile,
+            memory_profile=memory_profile,
+            metered=metered,
+            full_values=full_values,
+            db=db
         )
         
         return {
@@ -149,7 +245,7 @@ async def run_code(
             "details": result.get("details"),
             "is_test_run": True
         }
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -157,6 +253,27 @@ async def run_code(
         )
 
 
+async def _latest_judged(db: AsyncSession, submission: SubmissionCreate) -> Optional[Submission]:
+    """Most recent stored result for this problem and code, unless judging it failed."""
+    result = await db.execute(
+        select(Submission)
+        .where(
+            Submission.problem_id == submission.problem_id,
+            Submission.code_hash == code_hash(submission.code),
+            Submission.language == submission.language,
+            Submission.verdict != PENDING
+        )
+        .order_by(Submission.created_at.desc())
+        .limit(1)
+    )
+    judged = result.scalar_one_or_none()
+    if judged is None or judged.code != submission.code:
+        return None
+    if judged.details is None or "error" in judged.details:
+        return None  # runner failure or a row still being judged synchronously
+    return judged
+
+
 @router.post("/feedback", response_model=Dict[str, Any])
 async def get_submission_feedback(
     submission: SubmissionCreate,
@@ -165,10 +282,7 @@ async def get_submission_feedback(
     """Get AI feedback on a code submission."""
     
     # Validate problem exists
-    result = await db.execute(
-        select(Problem).where(Problem.problem_id == submission.problem_id)
-    )
-    problem = result.scalar_one_or_none()
+    problem = await problem_cache.get(db, submission.problem_id)
     
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
@@ -181,14 +295,28 @@ async def get_submission_feedback(
         )
     
     try:
-        # Judge the submission to get test results
-        judge_service = JudgeService()
-        test_results = await judge_service.judge_submission(
-            problem=problem,
-            code=submission.code,
-            language=submission.language,
-            is_test_run=False  # Use all tests for feedback
-        )
+        # Feedback usually follows a submission of the same code: reuse its results
+        judged = await _latest_judged(db, submission)
+        if judged is not None:
+            test_results = {
+                "verdict": judged.verdict,
+                "passed": judged.passed,
+                "total": judged.total,
+                "runtime_ms": judged.runtime_ms,
+                "memory_kb": judged.memory_kb,
+                "details": judged.details,
+                "submission_id": str(judged.id)
+            }
+        else:
+            # Judge the submission to get test results
+            judge_service = JudgeService()
+            test_results = await judge_service.judge_submission(
+                problem=problem,
+                code=submission.code,
+                language=submission.language,
+                is_test_run=False,  # Use all tests for feedback
+                db=db
+            )
         
         # Get AI feedback
         from src.services.gpt_coach import GPTCoachService
@@ -206,7 +334,7 @@ async def get_submission_feedback(
             "feedback": feedback,
             "test_results": test_results
         }
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -214,37 +342,65 @@ async def get_submission_feedback(
         )
 
 
+async def _wait_for_verdict(db: AsyncSession, submission_id: uuid.UUID, wait_s: float) -> Optional[Submission]:
+    """Load a submission, waiting up to ``wait_s`` while it is PENDING.
+    
+    Workers of this process wake the wait as soon as they store the verdict;
+    the row is re-read every ``SUBMIT_RECHECK_S`` for submissions judged by
+    another API process.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait_s
+    while True:
+        judged = judge_queue.subscribe(submission_id)
+        try:
+            result = await db.execute(
+                select(Submission)
+                .where(Submission.id == submission_id)
+                .execution_options(populate_existing=True)
+            )
+            submission = result.scalar_one_or_none()
+            remaining = deadline - loop.time()
+            if submission is None or submission.verdict != PENDING or remaining <= 0:
+                return submission
+            await asyncio.wait([judged], timeout=min(remaining, settings.SUBMIT_RECHECK_S))
+        finally:
+            judge_queue.unsubscribe(submission_id, judged)
+
+
 @router.get("/{submission_id}", response_model=SubmissionResponse)
 async def get_submission(
     submission_id: uuid.UUID,
+    wait: float = Query(
+        0, ge=0, le=settings.SUBMIT_MAX_WAIT_S, description="Seconds to wait for a PENDING submission's verdict"
+    ),
     db: AsyncSession = Depends(get_db)
 ) -> SubmissionResponse:
     """Get a specific submission by ID."""
     
-    from src.core.schemas import Submission
-    
-    result = await db.execute(
-        select(Submission).where(Submission.id == submission_id)
-    )
-    submission = result.scalar_one_or_none()
+    submission = await _wait_for_verdict(db, submission_id, wait)
     
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    # Check if solutions should be unlocked
-    unlocked_solutions = submission.verdict in ["ACCEPTED", "WRONG_ANSWER", "TIMEOUT", "RUNTIME_ERROR"]
+    return _submission_response(submission)
+
+
+@router.websocket("/ws/{submission_id}")
+async def submission_updates(websocket: WebSocket, submission_id: uuid.UUID):
+    """WebSocket that sends the submission once it has a verdict, then closes."""
+    await websocket.accept()
     
-    return SubmissionResponse(
-        id=submission.id,
-        problem_id=submission.problem_id,
-        language=submission.language,
-        code=submission.code,
-        verdict=submission.verdict,
-        passed=submission.passed,
-        total=submission.total,
-        runtime_ms=submission.runtime_ms,
-        memory_kb=submission.memory_kb,
-        details=submission.details,
-        created_at=submission.created_at,
-        unlocked_solutions=unlocked_solutions
-    )
+    try:
+        async with AsyncSessionLocal() as db:
+            submission = await _wait_for_verdict(db, submission_id, 0)
+            while submission is not None and submission.verdict == PENDING:
+                submission = await _wait_for_verdict(db, submission_id, settings.SUBMIT_MAX_WAIT_S)
+        
+        if submission is None:
+            await websocket.send_json({"error": "Submission not found"})
+        else:
+            await websocket.send_text(_submission_response(submission).model_dump_json())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
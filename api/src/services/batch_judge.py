@@ -0,0 +1,142 @@
+"""
+Bulk judging - many submissions graded in one request
+"""
+
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.schemas import Problem, SubmissionCreate
+from src.services.judge import JudgeService, PreparedTests, suite_cache
+
+logger = structlog.get_logger()
+
+
+class BatchProblem:
+    """A problem of the batch and the (public, full) tests it is judged against."""
+    
+    def __init__(self, problem: Problem, suites: Tuple[PreparedTests, PreparedTests]):
+        self.problem = problem
+        self.suites = suites
+
+
+async def prepare_batch(db: AsyncSession, items: List[SubmissionCreate]) -> Dict[uuid.UUID, BatchProblem]:
+    """Load the batch's problems and their stored test suites in one pass.
+    
+    The suites are kept with their problems rather than left in the shared
+    suite cache, which a large batch or other traffic may evict. Judging
+    afterwards needs no database session, so results can be streamed after
+    the request's session is gone.
+    """
+    result = await db.execute(
+        select(Problem).where(Problem.problem_id.in_({item.problem_id for item in items}))
+    )
+    return {
+        problem.problem_id: BatchProblem(problem, await suite_cache.get(problem, db))
+        for problem in result.scalars()
+    }
+
+
+def _line(index: int, item: SubmissionCreate, result: Dict[str, Any], details: bool) -> Dict[str, Any]:
+    line = {
+        "index": index,
+        "problem_id": str(item.problem_id),
+        "language": item.language,
+        "verdict": result["verdict"],
+        "passed": result["passed"],
+        "total": result["total"],
+        "runtime_ms": result.get("runtime_ms"),
+        "memory_kb": result.get("memory_kb")
+    }
+    if details:
+        line["details"] = result.get("details")
+    return line
+
+
+def _error(index: int, item: SubmissionCreate, error: str) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "problem_id": str(item.problem_id),
+        "language": item.language,
+        "verdict": None,
+        "error": error
+    }
+
+
+async def judge_batch(
+    items: List[SubmissionCreate],
+    problems: Dict[uuid.UUID, BatchProblem],
+    concurrency: int = settings.BATCH_CONCURRENCY,
+    details: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """Judge ``items``, yielding one result per item (with its ``index``) as it completes.
+    
+    Items are grouped by problem, and so by test set. The first item of a
+    group runs alone so the runner stores the test set once; the rest of the
+    group then fans out. ``concurrency`` bounds runner calls across all groups.
+    """
+    started = time.monotonic()
+    results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    slots = asyncio.Semaphore(concurrency)
+    judge_service = JudgeService()
+    
+    groups: Dict[uuid.UUID, List[int]] = {}
+    for index, item in enumerate(items):
+        if item.language not in ["python", "cpp"]:
+            results.put_nowait(_error(index, item, "Language must be 'python' or 'cpp'"))
+        elif item.problem_id not in problems:
+            results.put_nowait(_error(index, item, "Problem not found"))
+        else:
+            groups.setdefault(item.problem_id, []).append(index)
+    
+    async def judge_one(index: int) -> None:
+        item = items[index]
+        batch_problem = problems[item.problem_id]
+        async with slots:
+            try:
+                result = await judge_service.judge_submission(
+                    problem=batch_problem.problem,
+                    code=item.code,
+                    language=item.language,
+                    is_test_run=False,
+                    differential=settings.DIFFERENTIAL_TESTING,
+                    suites=batch_problem.suites
+                )
+                results.put_nowait(_line(index, item, result, details))
+            except Exception as e:
+                results.put_nowait(_error(index, item, str(e)))
+    
+    async def judge_group(indices: List[int]) -> None:
+        await judge_one(indices[0])
+        await asyncio.gather(*(judge_one(index) for index in indices[1:]))
+    
+    tasks = [asyncio.ensure_future(judge_group(indices)) for indices in groups.values()]
+    verdicts: Counter = Counter()
+    log_every = max(1, len(items) // 10)
+    try:
+        for done in range(1, len(items) + 1):
+            line = await results.get()
+            verdicts[line["verdict"] or "ERROR"] += 1
+            if done % log_every == 0 and done < len(items):
+                logger.info("Batch progress", done=done, total=len(items))
+            yield line
+    finally:
+        # The client may stop reading early; do not keep judging for nobody
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    logger.info(
+        "Batch judged",
+        items=len(items),
+        test_sets=len(groups),
+        verdicts=dict(verdicts),
+        elapsed_s=round(time.monotonic() - started, 2)
+    )
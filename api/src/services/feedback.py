@@ -2,12 +2,13 @@
 Feedback service - generates post-submission feedback using GPT-OSS
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import httpx
 import structlog
 
 from src.core.config import settings
+from src.core.http_clients import VLLM, http_clients
 
 logger = structlog.get_logger()
 
@@ -15,8 +16,8 @@ logger = structlog.get_logger()
 class FeedbackService:
     """Service for generating feedback on submissions."""
     
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or http_clients.get(VLLM)
     
     async def generate_feedback(
         self,
@@ -55,7 +56,7 @@ Code:
 {code}
 
 Test Results: {results}
-
+{self._format_memory_summary(results)}
 Please provide:
 1. Summary bullets (2-3 key points)
 2. Suggested improvements (specific, actionable)
@@ -65,6 +66,17 @@ Focus on helping the student learn and improve. Be encouraging but honest about
 
         return context
     
+    def _format_memory_summary(self, results: Dict[str, Any]) -> str:
+        """Describe the memory hot spot recorded in memory-analysis mode, if any."""
+        memory = (results or {}).get("memory")
+        if not memory:
+            return ""
+        
+        lines = [f"Peak traced memory: {memory['peak_kb']} KB (test {memory['peak_test_index']})"]
+        for site in memory.get("top_sites", []):
+            lines.append(f"- line {site['line']}: {site['size_kb']} KB in {site['count']} blocks: {site['source']}")
+        return "\n".join(lines) + "\n"
+    
     async def _call_gpt_oss(self, context: str) -> str:
         """Call GPT-OSS for feedback generation."""
         
@@ -150,5 +162,5 @@ Be encouraging but honest. Provide specific, actionable suggestions."""
         }
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Nothing to release: the vLLM client is shared and closed with the app."""
+        pass
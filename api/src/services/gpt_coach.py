@@ -7,14 +7,16 @@ import httpx
 import structlog
 from typing import Optional
 
+from src.core.http_clients import VLLM, http_clients
+
 logger = structlog.get_logger(__name__)
 
 class GPTCoachService:
     """Service for providing intelligent coding coaching using gpt-oss-20b."""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.vllm_url = "http://vllm:8000/v1/chat/completions"
-        self.timeout = 30.0
+        self.client = client or http_clients.get(VLLM)
         
     async def get_coach_response(
         self, 
@@ -87,13 +89,12 @@ Remember: Your role is to be a helpful tutor who guides learning, not someone wh
             "max_tokens": 500
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(self.vllm_url, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
-            if "choices" in result and len(result["choices"]) > 0:
-                return result["choices"][0]["message"]["content"]
+        response = await self.client.post(self.vllm_url, json=payload)
+        response.raise_for_status()
+        
+        result = response.json()
+        if "choices" in result and len(result["choices"]) > 0:
+            return result["choices"][0]["message"]["content"]
         
         return None
     
@@ -2,72 +2,203 @@
 Judge service - handles code execution and testing
 """
 
-import json
+import hashlib
 import httpx
-from typing import Dict, Any, List
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 
 import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import settings
+from src.core.http_clients import RUNNER, http_clients
+from src.core.schemas import TestCase
+from src.core.single_flight import SingleFlight
+from src.services.test_suites import load_suite, save_suite, serialize_tests
 
 logger = structlog.get_logger()
 
+# Allocation sites kept in Submission.details for the worst test
+MEMORY_SUMMARY_SITES = 3
+
+# Shown next to runtimes measured on a fast-tier (unoptimized) C++ build
+FAST_TIER_TIMING_NOTE = "Compiled without full optimisation for a quick run; runtimes are not comparable to graded submissions."
+
+class PreparedTests:
+    """Test cases of one run type with their runner payload serialized once."""
+    
+    def __init__(self, test_cases: List[TestCase]):
+        self.test_cases = test_cases
+        # The upload body for the runner's test-set store and the content it is hashed by
+        self.payload = serialize_tests(test_cases)
+        self.hash = hashlib.sha256(self.payload).hexdigest()
+
+
+def prepare_suites(test_cases: List[TestCase]) -> Tuple[PreparedTests, PreparedTests]:
+    """(public, full) test sets of a problem's test cases."""
+    return PreparedTests([tc for tc in test_cases if tc.is_public]), PreparedTests(test_cases)
+
+
+class SuiteCache:
+    """Bounded LRU of problem test suites, split into public (Run) and full (Submit) sets.
+    
+    Suites are read from ``problem_tests`` on a miss. Problems stored before
+    suites were persisted get theirs generated from (template, seed) once and
+    written back. A problem's suite only changes when a rejudge regenerates
+    it (which invalidates the entry), so the bound only limits memory.
+    """
+    
+    def __init__(self, max_entries: int = settings.SUITE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[uuid.UUID, Tuple[PreparedTests, PreparedTests]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    async def get(self, problem: Any, db: Optional[AsyncSession] = None) -> Tuple[PreparedTests, PreparedTests]:
+        """(public, full) test sets of a problem, loading them on a miss."""
+        from src.services.problem_gen.registry import registry
+        
+        key = problem.problem_id
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        
+        self.misses += 1
+        test_cases = await load_suite(db, problem.problem_id) if db is not None else None
+        if test_cases is None:
+            _, test_cases = registry.generate_problem(
+                problem.category, problem.template_slug, problem.seed, problem.difficulty
+            )
+            if db is not None:
+                await save_suite(db, problem.problem_id, test_cases)
+        entry = prepare_suites(test_cases)
+        if self.max_entries > 0:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+    
+    def invalidate(self, problem_id: uuid.UUID) -> None:
+        self._entries.pop(problem_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def code_hash(code: str) -> str:
+    """SHA-256 of submitted code, as stored in ``Submission.code_hash``."""
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+# Shared by the per-request JudgeService instances
+suite_cache = SuiteCache()
+# Identical judge requests already running are joined rather than re-run
+judge_flights = SingleFlight()
+
 
 class JudgeService:
     """Service for judging code submissions."""
     
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=60.0)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or http_clients.get(RUNNER)
     
     async def judge_submission(
         self,
         problem: Any,  # Problem model
         code: str,
         language: str,
-        is_test_run: bool = False
+        is_test_run: bool = False,
+        profile: bool = False,
+        memory_profile: bool = False,
+        stable_timing: bool = False,
+        metered: bool = False,
+        full_values: bool = False,
+        differential: bool = False,
+        db: Optional[AsyncSession] = None,
+        suites: Optional[Tuple[PreparedTests, PreparedTests]] = None
     ) -> Dict[str, Any]:
-        """Judge a code submission."""
+        """Judge a code submission (``db`` lets the problem's stored tests be loaded).
         
-        # Generate test cases for the problem
+        Callers that already hold the problem's (public, full) tests pass them
+        as ``suites``; otherwise they come from the suite cache. Concurrent
+        calls for the same problem, tests, language, code and options
+        (double-clicks, client retries) share one runner execution.
+        """
+        # Tests are loaded in the caller's session: the shared execution outlives
+        # callers that go away, so it must not use any caller's session
+        if suites is None:
+            suites = await suite_cache.get(problem, db)
+        key = (
+            str(problem.problem_id), suites[1].hash, language, code_hash(code),
+            is_test_run, profile, memory_profile, stable_timing, metered, full_values, differential
+        )
+        return await judge_flights.run(key, lambda: self._judge(
+            problem, code, language, is_test_run, profile, memory_profile,
+            stable_timing, metered, full_values, differential, suites
+        ))
+    
+    async def _judge(
+        self,
+        problem: Any,
+        code: str,
+        language: str,
+        is_test_run: bool,
+        profile: bool,
+        memory_profile: bool,
+        stable_timing: bool,
+        metered: bool,
+        full_values: bool,
+        differential: bool,
+        suites: Tuple[PreparedTests, PreparedTests]
+    ) -> Dict[str, Any]:
         from src.services.problem_gen.registry import registry
         
-        # Generate test cases using the existing problem's template and seed
-        _, test_cases = registry.generate_problem(
-            problem.category,
-            problem.template_slug,
-            problem.seed,
-            problem.difficulty
-        )
+        # Test runs use the public tests, submissions public + private
+        public_tests, all_tests = suites
+        tests = public_tests if is_test_run else all_tests
+        filtered_test_cases = tests.test_cases
         
-        # Filter test cases based on run type
-        if is_test_run:
-            # For test runs, only use public test cases
-            filtered_test_cases = [tc for tc in test_cases if tc.is_public]
-        else:
-            # For submissions, use all test cases (public + private)
-            filtered_test_cases = test_cases
+        # The runner keeps test sets by content hash; send only the hash and
+        # upload the set itself when the runner does not have it yet
+        test_set_bytes = tests.payload
         
         # Prepare submission data
-        submission_data = {
-            "language": language,
-            "code": code,
-            "test_cases": [
-                {
-                    "input": tc.input,
-                    "expected_output": tc.expected_output,
-                    "description": tc.description,
-                    "is_public": tc.is_public
-                }
-                for tc in filtered_test_cases
-            ]
-        }
+        signature = registry.get_signature(problem.category, problem.template_slug)
+        submission_data = self._runner_request(code, language, tests.hash, signature, is_test_run)
+        if profile:
+            # Opt-in: the runner re-runs the slowest test under a profiler
+            submission_data["profile"] = True
+        if memory_profile:
+            # Opt-in: per-test tracemalloc peaks and allocation sites (Python only)
+            submission_data["memory_profile"] = True
+        if metered and language == "python":
+            # Opt-in: count executed lines against the template's budget instead of trusting wall clock
+            submission_data["op_budget"] = registry.get_op_budget(
+                problem.category, problem.template_slug, problem.difficulty
+            )
+        if stable_timing and not is_test_run:
+            # Opt-in: the runner re-measures accepted code pinned to a core, K repeats
+            submission_data["stable_timing"] = True
+        if full_values:
+            # Opt-in: complete input/expected/actual values instead of previews
+            submission_data["full_values"] = True
         
         try:
             # Send to runner service
-            response = await self.client.post(
-                f"{settings.RUNNER_URL}/execute",
-                json=submission_data
-            )
+            response = await self._execute(submission_data, test_set_bytes)
             response.raise_for_status()
             
             result = response.json()
@@ -75,6 +206,7 @@ class JudgeService:
             # Process results
             passed = sum(1 for tc in result.get("test_results", []) if tc.get("status") == "PASS")
             total = len(result.get("test_results", []))
+            memory_summary = self._summarize_memory(result.get("test_results", []))
             
             # Use the verdict from the runner service if it's already set
             runner_verdict = result.get("verdict")
@@ -91,6 +223,30 @@ class JudgeService:
             else:
                 verdict = "WRONG_ANSWER"  # Wrong Answer
             
+            # Amplify the fixed tests: random small inputs checked against the reference solution
+            differential_report = None
+            if differential and verdict == "ACCEPTED" and language == "python" and not is_test_run:
+                differential_report = await self._differential(problem, code, signature)
+                if differential_report and differential_report.get("disagreement"):
+                    verdict = "WRONG_ANSWER"
+                    total += 1  # the counterexample counts as a failed test
+            
+            # Reduce the first failing test to a small input that still fails
+            shrunk = None
+            if settings.SHRINK_FAILING_INPUTS and verdict in ["WRONG_ANSWER", "RUNTIME_ERROR"] \
+                    and language == "python" and not is_test_run:
+                failing = next(
+                    (tr for tr in result.get("test_results", []) if tr.get("status") in ["FAIL", "ERROR"]), None
+                )
+                if failing is not None and failing.get("index") is not None:
+                    test_case = filtered_test_cases[failing["index"]]
+                    shrunk = await self._shrink(problem, code, signature, test_case.input)
+                    if shrunk:
+                        shrunk["test_index"] = failing["index"]
+            
+            # runtime_ms stays the wall-clock pass for every submission, so stored
+            # runtimes and the percentile sketches share one population; the
+            # stable median (which excludes interpreter startup) is only in details
             return {
                 "verdict": verdict,
                 "passed": passed,
@@ -98,9 +254,22 @@ class JudgeService:
                 "runtime_ms": result.get("total_runtime_ms"),
                 "memory_kb": result.get("peak_memory_kb"),
                 "details": {
-                    "test_results": result.get("test_results", []),
+                    # Per-test memory reports are folded into "memory" above
+                    "test_results": [
+                        {name: value for name, value in tr.items() if name != "memory"}
+                        for tr in result.get("test_results", [])
+                    ],
                     "compilation_output": result.get("compilation_output"),
-                    "runtime_output": result.get("runtime_output")
+                    "runtime_output": result.get("runtime_output"),
+                    "profile": result.get("profile"),
+                    "memory": memory_summary,
+                    "cached": result.get("cached", False),
+                    "compile_tier": result.get("compile_tier"),
+                    "timing_note": FAST_TIER_TIMING_NOTE if result.get("compile_tier") == "fast" else None,
+                    "stable_timing": result.get("stable_timing"),
+                    "metering": result.get("metering"),
+                    "differential": differential_report,
+                    "shrunk": shrunk
                 }
             }
             
@@ -129,6 +298,166 @@ class JudgeService:
                 "details": {"error": str(e)}
             }
     
+    async def run_test_set(
+        self,
+        code: str,
+        language: str,
+        test_set: bytes,
+        signature: Optional[Dict[str, Any]] = None,
+        full_values: bool = False
+    ) -> Dict[str, Any]:
+        """Raw runner result of ``code`` on a serialized test set, without a verdict.
+        
+        The request has the same shape as a graded submission's. Raises
+        ``httpx.HTTPError`` when the runner call fails.
+        """
+        submission_data = self._runner_request(code, language, hashlib.sha256(test_set).hexdigest(), signature)
+        if full_values:
+            submission_data["full_values"] = True
+        response = await self._execute(submission_data, test_set)
+        response.raise_for_status()
+        return response.json()
+    
+    @staticmethod
+    def _runner_request(
+        code: str,
+        language: str,
+        test_set_hash: str,
+        signature: Optional[Dict[str, Any]],
+        is_test_run: bool = False
+    ) -> Dict[str, Any]:
+        """/execute body shared by every kind of run, before opt-in options."""
+        submission_data: Dict[str, Any] = {
+            "language": language,
+            "code": code,
+            "test_set_hash": test_set_hash
+        }
+        if signature:
+            # ListNode/TreeNode templates: the harness builds real nodes from the arrays
+            submission_data["signature"] = signature
+        if language == "cpp":
+            # Interactive runs trade runtime speed for a quicker compile
+            submission_data["compile_tier"] = settings.RUN_COMPILE_TIER if is_test_run else "optimized"
+        return submission_data
+    
+    async def _execute(self, submission_data: Dict[str, Any], test_set_bytes: bytes) -> httpx.Response:
+        """Call /execute by test-set hash, uploading the set once on a 404."""
+        response = await self.client.post(
+            f"{settings.RUNNER_URL}/execute",
+            json=submission_data
+        )
+        if response.status_code == 404:
+            upload = await self.client.put(
+                f"{settings.RUNNER_URL}/test-sets/{submission_data['test_set_hash']}",
+                content=test_set_bytes,
+                headers={"Content-Type": "application/json"}
+            )
+            upload.raise_for_status()
+            response = await self.client.post(
+                f"{settings.RUNNER_URL}/execute",
+                json=submission_data
+            )
+        return response
+    
+    async def _differential(self, problem: Any, code: str, signature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run the submission and the reference on random inputs; None when unavailable."""
+        from src.services.problem_gen.registry import registry
+        from src.services.solutions_store import SolutionsStore
+        
+        reference = SolutionsStore().get_reference(problem.template_slug)
+        if reference is None:
+            return None
+        inputs = registry.random_inputs(
+            problem.category, problem.template_slug, problem.seed, settings.DIFFERENTIAL_INPUTS
+        )
+        if not inputs:
+            return None
+        
+        try:
+            return await self._compare_with_reference(code, reference, inputs, signature)
+        except httpx.HTTPError as e:
+            # The fixed tests already passed; a failed amplification stage must not fail the submission
+            logger.warning("Differential testing skipped", error=str(e))
+            return None
+    
+    async def _shrink(
+        self, problem: Any, code: str, signature: Dict[str, Any], test_input: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Shrink a failing test input using the reference as oracle; None when unavailable."""
+        from src.services.problem_gen.registry import registry
+        from src.services.shrinker import input_size, shrink_input
+        from src.services.solutions_store import SolutionsStore
+        
+        reference = SolutionsStore().get_reference(problem.template_slug)
+        if reference is None or signature.get("design") or input_size(test_input, signature) < settings.SHRINK_MIN_SIZE:
+            return None
+        
+        async def first_failure(candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            report = await self._compare_with_reference(code, reference, candidates, signature)
+            return report.get("disagreement")
+        
+        try:
+            return await shrink_input(
+                test_input,
+                first_failure,
+                settings.SHRINK_TIME_BUDGET_S,
+                settings.SHRINK_BATCH_SIZE,
+                signature=signature,
+                accepts=lambda candidate: registry.accepts_input(problem.category, problem.template_slug, candidate)
+            )
+        except httpx.HTTPError as e:
+            # The verdict stands without a smaller counterexample
+            logger.warning("Failing input not shrunk", error=str(e))
+            return None
+    
+    async def _compare_with_reference(
+        self, code: str, reference: str, inputs: List[Dict[str, Any]], signature: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Run the submission and the reference on ``inputs`` in one runner call."""
+        response = await self.client.post(
+            f"{settings.RUNNER_URL}/differential",
+            json={
+                "language": "python",
+                "code": code,
+                "reference_code": reference,
+                "inputs": inputs,
+                "signature": signature or None,
+                "time_budget_s": settings.DIFFERENTIAL_TIME_BUDGET_S
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    @staticmethod
+    def _summarize_memory(test_results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Collapse per-test memory reports into a compact summary.
+        
+        Only the per-test peaks and the allocation sites of the worst test are
+        kept, so the stored details stay small however many tests ran.
+        """
+        peaks = []
+        worst_index = None
+        worst_sites: List[Dict[str, Any]] = []
+        for index, test_result in enumerate(test_results):
+            memory = test_result.get("memory")
+            if not memory:
+                peaks.append(None)
+                continue
+            peaks.append(memory["peak_kb"])
+            if worst_index is None or memory["peak_kb"] > peaks[worst_index]:
+                worst_index = index
+                worst_sites = memory.get("top_sites", [])[:MEMORY_SUMMARY_SITES]
+        
+        if worst_index is None:
+            return None
+        
+        return {
+            "peak_kb": peaks[worst_index],
+            "peak_test_index": worst_index,
+            "per_test_peak_kb": peaks,
+            "top_sites": worst_sites
+        }
+    
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Nothing to release: the runner client is shared and closed with the app."""
+        pass
@@ -0,0 +1,333 @@
+"""
+Background judging of submissions accepted with 202
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.db import AsyncSessionLocal
+from src.core.schemas import Submission
+from src.services.judge import JudgeService
+from src.services.percentiles import percentile_index
+from src.services.problem_cache import ProblemSnapshot, problem_cache
+
+logger = structlog.get_logger()
+
+# Verdict of a submission waiting for a judge worker
+PENDING = "PENDING"
+
+
+async def judge_and_record(
+    db: AsyncSession,
+    db_submission: Submission,
+    problem: ProblemSnapshot,
+    memory_profile: bool = False,
+    stable_timing: bool = False,
+    metered: bool = False,
+    claimed_at: Optional[datetime] = None
+) -> None:
+    """Judge a stored submission and write its verdict back.
+    
+    On failure the submission is stored as RUNTIME_ERROR and the error re-raised.
+    With ``claimed_at`` (a judge worker's claim) the verdict is only written if
+    that claim still holds, so a submission is never stored or counted twice.
+    """
+    try:
+        judge_service = JudgeService()
+        result = await judge_service.judge_submission(
+            problem=problem,
+            code=db_submission.code,
+            language=db_submission.language,
+            is_test_run=False,
+            memory_profile=memory_profile,
+            stable_timing=stable_timing,
+            metered=metered,
+            differential=settings.DIFFERENTIAL_TESTING,
+            db=db
+        )
+        
+        # Update submission with results
+        fields = {
+            "verdict": result["verdict"],
+            "passed": result["passed"],
+            "total": result["total"],
+            "runtime_ms": result.get("runtime_ms"),
+            "memory_kb": result.get("memory_kb"),
+            "details": result.get("details")
+        }
+        
+        accepted = fields["verdict"] == "ACCEPTED"
+        if accepted:
+            # "Faster than X%" against earlier accepted submissions of this template
+            fields["details"] = {
+                **(fields["details"] or {}),
+                "percentiles": percentile_index.rank(
+                    problem.template_slug,
+                    db_submission.language,
+                    problem.difficulty,
+                    fields["runtime_ms"],
+                    fields["memory_kb"]
+                )
+            }
+        
+        stored = await _store(db, db_submission, fields, claimed_at)
+        
+        if accepted and stored:
+            percentile_index.record(
+                problem.template_slug,
+                db_submission.language,
+                problem.difficulty,
+                fields["runtime_ms"],
+                fields["memory_kb"]
+            )
+    
+    except Exception as e:
+        # Update submission with error
+        await db.rollback()
+        await _store(db, db_submission, {"verdict": "RUNTIME_ERROR", "details": {"error": str(e)}}, claimed_at)
+        raise
+
+
+async def _store(
+    db: AsyncSession,
+    db_submission: Submission,
+    fields: Dict[str, Any],
+    claimed_at: Optional[datetime]
+) -> bool:
+    """Write judged fields; with a claim, only while it is still this worker's."""
+    if claimed_at is None:
+        for name, value in fields.items():
+            setattr(db_submission, name, value)
+        await db.commit()
+        await db.refresh(db_submission)
+        return True
+    
+    result = await db.execute(
+        update(Submission)
+        .where(
+            Submission.id == db_submission.id,
+            Submission.verdict == PENDING,
+            Submission.claimed_at == claimed_at
+        )
+        .values(**fields)
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        logger.warning("Judge claim lost; verdict not stored", submission_id=str(db_submission.id))
+        return False
+    return True
+
+
+class JudgeJob:
+    """A PENDING submission and the judging options it was submitted with."""
+    
+    def __init__(self, submission_id: uuid.UUID, options: Optional[Dict[str, bool]] = None):
+        self.submission_id = submission_id
+        self.options = options or {}
+
+
+class JudgeQueue:
+    """Bounded queue of submissions judged by a fixed pool of worker tasks.
+    
+    ``/submit?async=true`` stores the submission as PENDING and enqueues it, so
+    the request returns before the runner is involved; at most ``workers``
+    submissions are judged at once and at most ``max_pending`` wait. Callers
+    can subscribe to a submission to hear when its verdict is stored.
+    
+    Several API processes (replicas, or both sides of a rolling restart) may
+    queue the same submission. A worker claims the row with a conditional
+    UPDATE before judging it, and a claim older than ``lease_s`` is treated as
+    abandoned by a dead process.
+    """
+    
+    def __init__(
+        self,
+        workers: int = settings.JUDGE_WORKERS,
+        max_pending: int = settings.JUDGE_QUEUE_SIZE,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        lease_s: float = settings.JUDGE_LEASE_S
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lease_s = lease_s
+        self._session_factory = session_factory
+        self._queue: Optional["asyncio.Queue[JudgeJob]"] = None
+        self._tasks: List[asyncio.Task] = []
+        self._recovery: Optional[asyncio.Task] = None
+        self._subscribers: Dict[uuid.UUID, List[asyncio.Future]] = {}
+        self.busy = 0
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.recovered = 0
+    
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+    
+    def has_capacity(self) -> bool:
+        return self._queue is not None and self._queue.qsize() < self.max_pending
+    
+    def enqueue(self, job: JudgeJob) -> None:
+        if self._queue is None:
+            raise RuntimeError("Judge queue is not running")
+        self._queue.put_nowait(job)
+        self.enqueued += 1
+    
+    def subscribe(self, submission_id: uuid.UUID) -> asyncio.Future:
+        """Future resolved once this process has judged the submission."""
+        future = asyncio.get_running_loop().create_future()
+        self._subscribers.setdefault(submission_id, []).append(future)
+        return future
+    
+    def unsubscribe(self, submission_id: uuid.UUID, future: asyncio.Future) -> None:
+        futures = self._subscribers.get(submission_id, [])
+        if future in futures:
+            futures.remove(future)
+        if not futures:
+            self._subscribers.pop(submission_id, None)
+    
+    def start_recovery(self) -> None:
+        """Queue submissions left PENDING by earlier runs, in the background."""
+        if self._recovery is None or self._recovery.done():
+            self._recovery = asyncio.ensure_future(self.recover())
+            self._recovery.add_done_callback(self._recovered)
+    
+    async def recover(self, poll_s: float = 1.0) -> int:
+        """Queue unclaimed PENDING submissions, oldest first, keeping at most ``max_pending`` waiting.
+        
+        The backlog is read one page of free queue slots at a time; submissions
+        another process has a live claim on are left to it.
+        """
+        recovered = 0
+        cursor = None  # (created_at, id) of the last submission queued
+        while True:
+            free = self.max_pending - self._queue.qsize()
+            if free <= 0:
+                await asyncio.sleep(poll_s)
+                continue
+            
+            query = (
+                select(Submission.id, Submission.created_at, Submission.details)
+                .where(Submission.verdict == PENDING, self._claimable())
+                .order_by(Submission.created_at, Submission.id)
+                .limit(free)
+            )
+            if cursor is not None:
+                query = query.where(tuple_(Submission.created_at, Submission.id) > tuple_(*cursor))
+            async with self._session_factory() as db:
+                rows = (await db.execute(query)).all()
+            
+            for row in rows:
+                self.enqueue(JudgeJob(row.id, (row.details or {}).get("queued")))
+            recovered += len(rows)
+            self.recovered += len(rows)
+            if len(rows) < free:
+                return recovered
+            cursor = (rows[-1].created_at, rows[-1].id)
+    
+    def _recovered(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning("Pending submission recovery failed", error=str(task.exception()))
+        elif task.result():
+            logger.info("Re-queued pending submissions", count=task.result())
+    
+    async def close(self, timeout_s: float = settings.DRAIN_TIMEOUT_S) -> None:
+        """Let queued submissions finish for up to ``timeout_s``, then stop the workers.
+        
+        Submissions still waiting stay PENDING and are picked up by ``recover``.
+        """
+        if self._recovery is not None:
+            self._recovery.cancel()
+            await asyncio.gather(self._recovery, return_exceptions=True)
+            self._recovery = None
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout_s)
+            except asyncio.TimeoutError:
+                logger.warning("Judge queue not drained", pending=self._queue.qsize(), busy=self.busy)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+    
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            self.busy += 1
+            try:
+                await self._judge(job)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error("Background judging failed", submission_id=str(job.submission_id), error=str(e))
+            finally:
+                self.busy -= 1
+                queue.task_done()
+                self._notify(job.submission_id)
+    
+    def _claimable(self):
+        """Unclaimed, or claimed by a worker that has held it past the lease."""
+        expired = datetime.utcnow() - timedelta(seconds=self.lease_s)
+        return or_(Submission.claimed_at.is_(None), Submission.claimed_at < expired)
+    
+    async def _claim(self, db: AsyncSession, submission_id: uuid.UUID) -> Optional[datetime]:
+        """Take a PENDING submission for this worker; None if it is judged, gone or claimed elsewhere."""
+        result = await db.execute(
+            update(Submission)
+            .where(Submission.id == submission_id, Submission.verdict == PENDING, self._claimable())
+            .values(claimed_at=datetime.utcnow())
+            .returning(Submission.claimed_at)
+        )
+        claimed_at = result.scalar_one_or_none()
+        await db.commit()
+        return claimed_at
+    
+    async def _judge(self, job: JudgeJob) -> None:
+        async with self._session_factory() as db:
+            claimed_at = await self._claim(db, job.submission_id)
+            if claimed_at is None:
+                self.skipped += 1
+                return  # deleted, judged, or being judged by another API process
+            
+            result = await db.execute(select(Submission).where(Submission.id == job.submission_id))
+            db_submission = result.scalar_one()
+            problem = await problem_cache.get(db, db_submission.problem_id)
+            
+            await judge_and_record(db, db_submission, problem, claimed_at=claimed_at, **job.options)
+    
+    def _notify(self, submission_id: uuid.UUID) -> None:
+        for future in self._subscribers.pop(submission_id, []):
+            if not future.done():
+                future.set_result(None)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "recovered": self.recovered
+        }
+
+
+# Global queue instance, started with the app
+judge_queue = JudgeQueue()
@@ -0,0 +1,184 @@
+"""
+Percentile service - runtime/memory distributions of accepted submissions
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.schemas import Problem, Submission
+
+logger = structlog.get_logger()
+
+# HDR-style log-linear buckets: values below 2**SUB_BUCKET_BITS are exact,
+# larger ones keep SUB_BUCKET_BITS of mantissa (at most ~6% relative error)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_EXPONENT = 40  # values up to 2**40 ms / KB
+NUM_BUCKETS = SUB_BUCKETS + (MAX_EXPONENT - SUB_BUCKET_BITS) * SUB_BUCKETS
+
+# Submissions read per round trip when rebuilding from the database
+REBUILD_BATCH_SIZE = 1000
+
+SketchKey = Tuple[str, str, str]  # (template_slug, language, difficulty)
+
+
+def bucket_index(value: int) -> int:
+    """Bucket holding ``value`` (clamped to the sketch range)."""
+    value = max(0, int(value))
+    if value < SUB_BUCKETS:
+        return value
+    exponent = min(value.bit_length() - 1, MAX_EXPONENT - 1)
+    sub_bucket = (value >> (exponent - SUB_BUCKET_BITS)) & (SUB_BUCKETS - 1)
+    return SUB_BUCKETS + (exponent - SUB_BUCKET_BITS) * SUB_BUCKETS + sub_bucket
+
+
+def bucket_lower_bound(index: int) -> int:
+    """Smallest value that falls into bucket ``index``."""
+    if index < SUB_BUCKETS:
+        return index
+    exponent, sub_bucket = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    exponent += SUB_BUCKET_BITS
+    return (1 << exponent) + (sub_bucket << (exponent - SUB_BUCKET_BITS))
+
+
+class LogHistogram:
+    """Fixed-size log-linear histogram with Fenwick-tree prefix counts.
+    
+    Adding a value, ranking one and reading a quantile each touch
+    O(log NUM_BUCKETS) cells, so rebuilding from many submissions stays cheap.
+    """
+    
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        # Fenwick tree over counts, 1-based: tree[i] sums the buckets (i - (i & -i), i]
+        self.tree = [0] * (NUM_BUCKETS + 1)
+        self.total = 0
+    
+    def add(self, value: int) -> None:
+        index = bucket_index(value)
+        self.counts[index] += 1
+        i = index + 1
+        while i <= NUM_BUCKETS:
+            self.tree[i] += 1
+            i += i & -i
+        self.total += 1
+    
+    def cumulative(self, index: int) -> int:
+        """Number of values in buckets 0..index."""
+        count = 0
+        i = index + 1
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+    
+    def rank(self, value: int) -> Optional[float]:
+        """Percentage of recorded values above ``value`` (ties count half)."""
+        if not self.total:
+            return None
+        index = bucket_index(value)
+        above = self.total - self.cumulative(index)
+        return round(100.0 * (above + self.counts[index] / 2) / self.total, 1)
+    
+    def quantile(self, q: float) -> Optional[int]:
+        """Approximate value at quantile ``q`` (0..1)."""
+        if not self.total:
+            return None
+        target = max(1, int(q * self.total + 0.5))
+        # Descend the tree to the first bucket whose cumulative count reaches target
+        position = 0
+        step = 1 << (NUM_BUCKETS.bit_length() - 1)
+        while step:
+            if position + step <= NUM_BUCKETS and self.tree[position + step] < target:
+                position += step
+                target -= self.tree[position]
+            step >>= 1
+        return bucket_lower_bound(min(position, NUM_BUCKETS - 1))
+
+
+class PercentileIndex:
+    """Runtime and memory histograms per (template, language, difficulty)."""
+    
+    def __init__(self):
+        self._sketches: Dict[SketchKey, Tuple[LogHistogram, LogHistogram]] = {}
+    
+    def record(
+        self,
+        template_slug: str,
+        language: str,
+        difficulty: str,
+        runtime_ms: Optional[int],
+        memory_kb: Optional[int]
+    ) -> None:
+        """Add one accepted submission."""
+        key = (template_slug, language, difficulty)
+        if key not in self._sketches:
+            self._sketches[key] = (LogHistogram(), LogHistogram())
+        runtime, memory = self._sketches[key]
+        if runtime_ms is not None:
+            runtime.add(runtime_ms)
+        if memory_kb is not None:
+            memory.add(memory_kb)
+    
+    def rank(
+        self,
+        template_slug: str,
+        language: str,
+        difficulty: str,
+        runtime_ms: Optional[int],
+        memory_kb: Optional[int]
+    ) -> Dict[str, Any]:
+        """How a submission compares: "faster than X%" and "less memory than Y%"."""
+        sketches = self._sketches.get((template_slug, language, difficulty))
+        if sketches is None:
+            return {"runtime_beats_pct": None, "memory_beats_pct": None, "sample_size": 0}
+        runtime, memory = sketches
+        return {
+            "runtime_beats_pct": runtime.rank(runtime_ms) if runtime_ms is not None else None,
+            "memory_beats_pct": memory.rank(memory_kb) if memory_kb is not None else None,
+            "sample_size": runtime.total
+        }
+    
+    def summary(self, template_slug: str, language: str, difficulty: str) -> Dict[str, Any]:
+        """Distribution summary (count and common quantiles) for one key."""
+        sketches = self._sketches.get((template_slug, language, difficulty))
+        runtime, memory = sketches if sketches is not None else (LogHistogram(), LogHistogram())
+        return {
+            "sample_size": runtime.total,
+            "runtime_ms": {f"p{int(q * 100)}": runtime.quantile(q) for q in (0.5, 0.9, 0.99)},
+            "memory_kb": {f"p{int(q * 100)}": memory.quantile(q) for q in (0.5, 0.9, 0.99)}
+        }
+    
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Rebuild all sketches from accepted submissions in one streaming pass."""
+        query = (
+            select(
+                Problem.template_slug,
+                Submission.language,
+                Problem.difficulty,
+                Submission.runtime_ms,
+                Submission.memory_kb
+            )
+            .join(Problem, Problem.problem_id == Submission.problem_id)
+            .where(Submission.verdict == "ACCEPTED")
+            .execution_options(yield_per=REBUILD_BATCH_SIZE)
+        )
+        
+        # Build aside and swap, so lookups never see a half-built index
+        fresh = PercentileIndex()
+        rows = 0
+        result = await session.stream(query)
+        async for template_slug, language, difficulty, runtime_ms, memory_kb in result:
+            fresh.record(template_slug, language, difficulty, runtime_ms, memory_kb)
+            rows += 1
+        self._sketches = fresh._sketches
+        
+        logger.info("Percentile sketches rebuilt", submissions=rows, keys=len(self._sketches))
+        return rows
+
+
+# Global index, rebuilt at startup and updated on every accepted submission
+percentile_index = PercentileIndex()
@@ -0,0 +1,107 @@
+"""
+Problem cache - in-process snapshots of problem rows shared by the routers
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.schemas import Problem
+from src.core.single_flight import SingleFlight
+
+
+class ProblemSnapshot:
+    """The fields of a problem that judging, coaching and solutions read.
+    
+    Detached from any session, so it can be shared between requests; treat it
+    as read-only.
+    """
+    
+    __slots__ = ("problem_id", "category", "template_slug", "seed", "difficulty", "title", "prompt")
+    
+    def __init__(self, problem: Any):
+        self.problem_id = problem.problem_id
+        self.category = problem.category
+        self.template_slug = problem.template_slug
+        self.seed = problem.seed
+        self.difficulty = problem.difficulty
+        self.title = problem.title
+        self.prompt = problem.prompt
+
+
+class ProblemCache:
+    """Bounded LRU of problem snapshots with a TTL.
+    
+    Problems do not change after creation; the TTL bounds how long a deleted
+    problem keeps being served. Concurrent misses for one problem share a
+    single query, and unknown ids are not cached.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = settings.PROBLEM_CACHE_SIZE,
+        ttl_s: float = settings.PROBLEM_CACHE_TTL_S,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._entries: "OrderedDict[uuid.UUID, Tuple[float, ProblemSnapshot]]" = OrderedDict()
+        self._loads = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    async def get(self, db: AsyncSession, problem_id: uuid.UUID) -> Optional[ProblemSnapshot]:
+        """Snapshot of a problem, read from ``db`` on a miss; None if it does not exist."""
+        entry = self._entries.get(problem_id)
+        if entry is not None:
+            expires_at, snapshot = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(problem_id)
+                self.hits += 1
+                return snapshot
+            del self._entries[problem_id]
+        
+        self.misses += 1
+        return await self._loads.run(problem_id, lambda: self._load(db, problem_id))
+    
+    async def _load(self, db: AsyncSession, problem_id: uuid.UUID) -> Optional[ProblemSnapshot]:
+        result = await db.execute(select(Problem).where(Problem.problem_id == problem_id))
+        problem = result.scalar_one_or_none()
+        return self.put(problem) if problem is not None else None
+    
+    def put(self, problem: Any) -> ProblemSnapshot:
+        """Cache a problem row (e.g. right after it is created)."""
+        snapshot = ProblemSnapshot(problem)
+        if self.max_entries > 0:
+            self._entries[snapshot.problem_id] = (self._clock() + self.ttl_s, snapshot)
+            self._entries.move_to_end(snapshot.problem_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return snapshot
+    
+    def invalidate(self, problem_id: uuid.UUID) -> None:
+        self._entries.pop(problem_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global cache shared by the routers and the judge workers
+problem_cache = ProblemCache()
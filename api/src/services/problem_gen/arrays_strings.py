@@ -3,7 +3,7 @@ Arrays & Strings problem generator
 """
 
 import random
-from typing import List, Tuple, Any, Dict
+from typing import List, Tuple, Any, Dict, Optional
 
 from src.core.schemas import ProblemCreate, TestCase
 from src.services.problem_gen.registry import ProblemGenerator
@@ -16,6 +16,35 @@ class ArraysStringsGenerator(ProblemGenerator):
         """Get available templates."""
         return ["two_sum", "rotate_array", "group_anagrams", "longest_substring", "product_except_self"]
     
+    def random_input(self, template: str, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """Draw one small random input for differential testing."""
+        if template == "two_sum":
+            # Distinct values with exactly one pair summing to the target
+            while True:
+                nums = rng.sample(range(-50, 51), rng.randint(2, 10))
+                i, j = rng.sample(range(len(nums)), 2)
+                target = nums[i] + nums[j]
+                pairs = sum(1 for a in range(len(nums)) for b in range(a + 1, len(nums)) if nums[a] + nums[b] == target)
+                if pairs == 1:
+                    return {"nums": nums, "target": target}
+        elif template == "product_except_self":
+            return {"nums": [rng.randint(-5, 5) for _ in range(rng.randint(2, 10))]}
+        return None
+    
+    def accepts_input(self, template: str, test_input: Dict[str, Any]) -> bool:
+        """Whether an input satisfies the template's stated preconditions."""
+        nums = test_input.get("nums", [])
+        if template == "two_sum":
+            seen: Dict[int, int] = {}
+            pairs = 0
+            for num in nums:
+                pairs += seen.get(test_input.get("target", 0) - num, 0)
+                seen[num] = seen.get(num, 0) + 1
+            return pairs == 1
+        elif template == "product_except_self":
+            return len(nums) >= 2
+        return True
+    
     def generate(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem and test cases."""
         random.seed(seed)
@@ -3,7 +3,7 @@ Binary Tree / BST problem generator
 """
 
 import random
-from typing import List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
 from src.core.schemas import ProblemCreate, TestCase
 from src.services.problem_gen.registry import ProblemGenerator
@@ -12,10 +12,57 @@ from src.services.problem_gen.registry import ProblemGenerator
 class BinaryTreeBSTGenerator(ProblemGenerator):
     """Generator for Binary Tree / BST problems."""
     
+    # Which arguments/results the Python harness turns into TreeNode structures
+    # (trees travel as level-order arrays with None gaps)
+    SIGNATURES: Dict[str, Dict[str, Any]] = {
+        "max_depth": {"params": {"root": "TreeNode"}},
+        "invert_tree": {"params": {"root": "TreeNode"}, "returns": "TreeNode"},
+        "path_sum": {"params": {"root": "TreeNode"}},
+        "lowest_common_ancestor": {
+            "params": {"root": "TreeNode", "p": "node@root", "q": "node@root"},
+            "returns": "node_val"
+        },
+        "validate_bst": {"params": {"root": "TreeNode"}},
+    }
+    
     def get_templates(self) -> List[str]:
         """Get available templates."""
         return ["max_depth", "invert_tree", "path_sum", "lowest_common_ancestor", "validate_bst"]
     
+    def get_signature(self, template: str) -> Dict[str, Any]:
+        """Get the marshalling signature for a template."""
+        return self.SIGNATURES.get(template, {})
+    
+    def random_input(self, template: str, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """Draw one small random input for differential testing."""
+        if template == "max_depth":
+            return {"root": self._random_level_order(rng, rng.randint(0, 15))}
+        return None
+    
+    def _random_level_order(self, rng: random.Random, size: int) -> List[Any]:
+        """Level-order array (None for missing children) of a random binary tree."""
+        if size == 0:
+            return []
+        values = [rng.randint(-50, 50) for _ in range(size)]
+        children: List[List[Optional[int]]] = [[None, None] for _ in range(size)]
+        for node in range(1, size):
+            # Attach each node to a random free slot of the tree built so far
+            slots = [(parent, side) for parent in range(node) for side in (0, 1) if children[parent][side] is None]
+            parent, side = rng.choice(slots)
+            children[parent][side] = node
+        
+        level_order: List[Any] = []
+        queue: List[Optional[int]] = [0]
+        for node in queue:
+            if node is None:
+                level_order.append(None)
+                continue
+            level_order.append(values[node])
+            queue.extend(children[node])
+        while level_order[-1] is None:
+            level_order.pop()
+        return level_order
+    
     def generate(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem and test cases."""
         random.seed(seed)
@@ -3,7 +3,8 @@ Hash Map / Hash Set problem generator
 """
 
 import random
-from typing import List, Tuple, Any
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Any
 
 from src.core.schemas import ProblemCreate, TestCase
 from src.services.problem_gen.registry import ProblemGenerator
@@ -16,6 +17,24 @@ class HashMapSetGenerator(ProblemGenerator):
         """Get available templates."""
         return ["contains_duplicate", "single_number", "intersection", "happy_number", "isomorphic_strings"]
     
+    def random_input(self, template: str, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """Draw one small random input for differential testing."""
+        if template == "contains_duplicate":
+            return {"nums": [rng.randint(0, 15) for _ in range(rng.randint(0, 12))]}
+        elif template == "single_number":
+            values = rng.sample(range(-30, 31), rng.randint(1, 6))
+            nums = values + values[1:]  # values[0] appears once
+            rng.shuffle(nums)
+            return {"nums": nums}
+        return None
+    
+    def accepts_input(self, template: str, test_input: Dict[str, Any]) -> bool:
+        """Whether an input satisfies the template's stated preconditions."""
+        if template == "single_number":
+            counts = Counter(test_input.get("nums", []))
+            return list(counts.values()).count(1) == 1 and all(count <= 2 for count in counts.values())
+        return True
+    
     def generate(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem and test cases."""
         random.seed(seed)
@@ -3,7 +3,7 @@ Linked List problem generator
 """
 
 import random
-from typing import List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
 from src.core.schemas import ProblemCreate, TestCase
 from src.services.problem_gen.registry import ProblemGenerator
@@ -12,10 +12,29 @@ from src.services.problem_gen.registry import ProblemGenerator
 class LinkedListGenerator(ProblemGenerator):
     """Generator for Linked List problems."""
     
+    # Which arguments/results the Python harness turns into ListNode chains
+    SIGNATURES: Dict[str, Dict[str, Any]] = {
+        "reverse_list": {"params": {"head": "ListNode"}, "returns": "ListNode"},
+        "merge_two_lists": {"params": {"list1": "ListNode", "list2": "ListNode"}, "returns": "ListNode"},
+        "detect_cycle": {"params": {"head": "ListNode", "pos": "cycle@head"}},
+        "remove_nth_node": {"params": {"head": "ListNode"}, "returns": "ListNode"},
+        "palindrome_list": {"params": {"head": "ListNode"}},
+    }
+    
     def get_templates(self) -> List[str]:
         """Get available templates."""
         return ["reverse_list", "merge_two_lists", "detect_cycle", "remove_nth_node", "palindrome_list"]
     
+    def get_signature(self, template: str) -> Dict[str, Any]:
+        """Get the marshalling signature for a template."""
+        return self.SIGNATURES.get(template, {})
+    
+    def random_input(self, template: str, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """Draw one small random input for differential testing."""
+        if template == "reverse_list":
+            return {"head": [rng.randint(-50, 50) for _ in range(rng.randint(0, 10))]}
+        return None
+    
     def generate(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem and test cases."""
         random.seed(seed)
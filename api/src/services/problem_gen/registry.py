@@ -4,14 +4,21 @@ Problem generator registry and factory
 
 import random
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 
 from src.core.schemas import ProblemCreate, TestCase
 
 
+# Metering budgets (executed lines of user code per test) by difficulty
+DEFAULT_OP_BUDGETS = {"Easy": 5_000_000, "Medium": 20_000_000, "Hard": 50_000_000}
+
+
 class ProblemGenerator(ABC):
     """Abstract base class for problem generators."""
     
+    # Per-template metering budgets overriding DEFAULT_OP_BUDGETS
+    OP_BUDGETS: Dict[str, int] = {}
+    
     @abstractmethod
     def generate(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem and test cases."""
@@ -26,6 +33,24 @@ class ProblemGenerator(ABC):
     def get_templates(self) -> List[str]:
         """Get available templates for this category."""
         pass
+    
+    def get_signature(self, template: str) -> Dict[str, Any]:
+        """Get the runner marshalling signature for a template (plain values by default)."""
+        return {}
+    
+    def get_op_budget(self, template: str, difficulty: str) -> int:
+        """Get the metering budget for one test of a template."""
+        if template in self.OP_BUDGETS:
+            return self.OP_BUDGETS[template]
+        return DEFAULT_OP_BUDGETS.get(difficulty, DEFAULT_OP_BUDGETS["Medium"])
+    
+    def random_input(self, template: str, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """Draw one small random input for differential testing (None if unsupported)."""
+        return None
+    
+    def accepts_input(self, template: str, test_input: Dict[str, Any]) -> bool:
+        """Whether an input satisfies the template's stated preconditions (used when shrinking)."""
+        return True
 
 
 class ProblemRegistry:
@@ -53,6 +78,32 @@ class ProblemRegistry:
         generator = self.get_generator(category)
         return generator.get_templates()
     
+    def get_signature(self, category: str, template: str) -> Dict[str, Any]:
+        """Get the ListNode/TreeNode marshalling signature for a template."""
+        generator = self.get_generator(category)
+        return generator.get_signature(template)
+    
+    def get_op_budget(self, category: str, template: str, difficulty: str) -> int:
+        """Get the metering budget for one test of a template."""
+        generator = self.get_generator(category)
+        return generator.get_op_budget(template, difficulty)
+    
+    def random_inputs(self, category: str, template: str, seed: int, count: int) -> List[Dict[str, Any]]:
+        """Small random inputs for differential testing, reproducible per seed."""
+        generator = self.get_generator(category)
+        rng = random.Random(seed)
+        inputs = []
+        for _ in range(count):
+            test_input = generator.random_input(template, rng)
+            if test_input is None:
+                return []
+            inputs.append(test_input)
+        return inputs
+    
+    def accepts_input(self, category: str, template: str, test_input: Dict[str, Any]) -> bool:
+        """Whether a (shrunk) input is still valid for the template."""
+        return self.get_generator(category).accepts_input(template, test_input)
+    
     def generate_problem(self, category: str, template: str, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem using the specified template."""
         generator = self.get_generator(category)
@@ -3,7 +3,7 @@ Stack & Queue problem generator
 """
 
 import random
-from typing import List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
 from src.core.schemas import ProblemCreate, TestCase
 from src.services.problem_gen.registry import ProblemGenerator
@@ -12,10 +12,43 @@ from src.services.problem_gen.registry import ProblemGenerator
 class StackQueueGenerator(ProblemGenerator):
     """Generator for Stack & Queue problems."""
     
+    # Design templates: the runner constructs the class once and replays the operations
+    SIGNATURES: Dict[str, Dict[str, Any]] = {
+        "min_stack": {
+            "design": {
+                "class": "MinStack",
+                "operations": "operations",
+                "arguments": "values",
+                "constructor": [],
+                "methods": {
+                    "push": {"args": ["int"], "returns": "void"},
+                    "pop": {"args": [], "returns": "void"},
+                    "top": {"args": [], "returns": "int"},
+                    "getMin": {"args": [], "returns": "int"},
+                },
+            }
+        },
+    }
+    
+    # Operations in the private stress sequence of a design template
+    STRESS_OPERATIONS = {"Easy": 1000, "Medium": 10000, "Hard": 100000}
+    
     def get_templates(self) -> List[str]:
         """Get available templates."""
         return ["contains_duplicate", "min_stack", "daily_temperatures", "largest_rectangle", "sliding_window_max"]
     
+    def get_signature(self, template: str) -> Dict[str, Any]:
+        """Get the marshalling signature for a template."""
+        return self.SIGNATURES.get(template, {})
+    
+    def random_input(self, template: str, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """Draw one small random input for differential testing."""
+        if template == "contains_duplicate":
+            return {"nums": [rng.randint(0, 15) for _ in range(rng.randint(0, 12))]}
+        elif template == "daily_temperatures":
+            return {"temperatures": [rng.randint(30, 100) for _ in range(rng.randint(1, 15))]}
+        return None
+    
     def generate(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate a problem and test cases."""
         random.seed(seed)
@@ -122,8 +155,42 @@ class StackQueueGenerator(ProblemGenerator):
             )
         ]
         
+        # Private stress sequence, replayed on one instance in a single run
+        operations, values, expected = self._min_stack_stress(self.STRESS_OPERATIONS.get(difficulty, 1000))
+        test_cases.append(TestCase(
+            input={"operations": operations, "values": values},
+            expected_output=expected,
+            description=f"Stress test ({len(operations)} operations)"
+        ))
+        
         return problem, test_cases
     
+    def _min_stack_stress(self, count: int) -> Tuple[List[str], List[List[int]], List[Any]]:
+        """Random operation sequence with expected outputs from a reference min stack."""
+        operations = ["MinStack"]
+        values: List[List[int]] = [[]]
+        expected: List[Any] = [None]
+        stack: List[Tuple[int, int]] = []  # (value, minimum so far)
+        
+        for _ in range(count - 1):
+            if not stack or random.random() < 0.5:
+                val = random.randint(-10**9, 10**9)
+                stack.append((val, min(val, stack[-1][1]) if stack else val))
+                operations.append("push")
+                values.append([val])
+                expected.append(None)
+            else:
+                op = random.choice(["pop", "top", "getMin"])
+                operations.append(op)
+                values.append([])
+                if op == "pop":
+                    stack.pop()
+                    expected.append(None)
+                else:
+                    expected.append(stack[-1][0] if op == "top" else stack[-1][1])
+        
+        return operations, values, expected
+    
     def _generate_daily_temperatures(self, seed: int, difficulty: str) -> Tuple[ProblemCreate, List[TestCase]]:
         """Generate Daily Temperatures problem."""
         random.seed(seed)
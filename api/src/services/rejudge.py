@@ -0,0 +1,265 @@
+"""
+Rejudge service - re-evaluates stored submissions after test or checker changes
+
+Run from the command line with ``python -m src.services.rejudge --help`` or
+through ``POST /admin/rejudge``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.db import AsyncSessionLocal
+from src.core.http_clients import http_clients
+from src.core.schemas import Problem, Submission
+from src.services.judge import JudgeService, PreparedTests, prepare_suites, suite_cache
+from src.services.judge_queue import PENDING
+from src.services.test_suites import replace_suite
+
+logger = structlog.get_logger()
+
+
+class RejudgeReport:
+    """Progress of a rejudge run.
+    
+    ``cursor`` is the last submission id whose batch has been written; passing
+    it as ``after`` resumes an interrupted run where it stopped.
+    """
+    
+    def __init__(self, after: Optional[uuid.UUID] = None, dry_run: bool = False):
+        self.state = "running"
+        self.dry_run = dry_run
+        self.cursor = after
+        self.scanned = 0
+        self.judged = 0
+        self.changed = 0
+        self.errors = 0
+        self.transitions: Counter = Counter()  # "WRONG_ANSWER->ACCEPTED": count
+        self.error: Optional[str] = None
+        self.started = time.monotonic()
+        self.elapsed_s = 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "dry_run": self.dry_run,
+            "cursor": str(self.cursor) if self.cursor else None,
+            "scanned": self.scanned,
+            "judged": self.judged,
+            "changed": self.changed,
+            "errors": self.errors,
+            "transitions": dict(self.transitions),
+            "error": self.error,
+            "elapsed_s": self.elapsed_s
+        }
+
+
+def rejudge_query(
+    problem_id: Optional[uuid.UUID] = None,
+    template_slug: Optional[str] = None,
+    language: Optional[str] = None,
+    verdict: Optional[str] = None,
+    after: Optional[uuid.UUID] = None
+):
+    """Matching judged submissions in id order, so a run can resume after any id."""
+    query = (
+        select(
+            Submission.id,
+            Submission.problem_id,
+            Submission.language,
+            Submission.code,
+            Submission.verdict,
+            Submission.passed,
+            Submission.total
+        )
+        .where(Submission.verdict != PENDING)
+        .order_by(Submission.id)
+    )
+    if problem_id is not None:
+        query = query.where(Submission.problem_id == problem_id)
+    if template_slug is not None:
+        query = query.join(Problem, Problem.problem_id == Submission.problem_id).where(
+            Problem.template_slug == template_slug
+        )
+    if language is not None:
+        query = query.where(Submission.language == language)
+    if verdict is not None:
+        query = query.where(Submission.verdict == verdict)
+    if after is not None:
+        query = query.where(Submission.id > after)
+    return query
+
+
+async def _load_problem(
+    db: AsyncSession, problem_id: uuid.UUID, regenerate_tests: bool, dry_run: bool
+) -> Tuple[Problem, Tuple[PreparedTests, PreparedTests]]:
+    """Problem and the (public, full) tests to rejudge it against."""
+    from src.services.problem_gen.registry import registry
+    
+    result = await db.execute(select(Problem).where(Problem.problem_id == problem_id))
+    problem = result.scalar_one()
+    if not regenerate_tests:
+        return problem, await suite_cache.get(problem, db)
+    
+    # Fixed generators: judge against the tests they produce now
+    _, test_cases = registry.generate_problem(
+        problem.category, problem.template_slug, problem.seed, problem.difficulty
+    )
+    if dry_run:
+        # Kept to this run only: live judging must not see tests that are not stored
+        return problem, prepare_suites(test_cases)
+    await replace_suite(db, problem_id, test_cases)
+    suite_cache.invalidate(problem_id)
+    return problem, await suite_cache.get(problem, db)
+
+
+async def rejudge(
+    problem_id: Optional[uuid.UUID] = None,
+    template_slug: Optional[str] = None,
+    language: Optional[str] = None,
+    verdict: Optional[str] = None,
+    after: Optional[uuid.UUID] = None,
+    regenerate_tests: bool = False,
+    dry_run: bool = False,
+    concurrency: int = settings.REJUDGE_CONCURRENCY,
+    batch_size: int = settings.REJUDGE_BATCH_SIZE,
+    report: Optional[RejudgeReport] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> RejudgeReport:
+    """Judge matching submissions again and store the verdicts that changed.
+    
+    Submissions are streamed with a server-side cursor, judged ``batch_size``
+    at a time with at most ``concurrency`` runner calls in flight, and each
+    batch's changes are written in one UPDATE. With ``dry_run`` nothing is
+    written. Only verdict/passed/total changes count; the previous verdict is
+    kept in ``details["rejudged"]``.
+    """
+    report = report or RejudgeReport(after, dry_run)
+    query = rejudge_query(problem_id, template_slug, language, verdict, after)
+    judge_service = JudgeService()
+    slots = asyncio.Semaphore(concurrency)
+    # Tests are held for the whole run rather than left in the shared suite
+    # cache, where an eviction would have them regenerated instead of loaded
+    problems: Dict[uuid.UUID, Problem] = {}
+    suites: Dict[uuid.UUID, Tuple[PreparedTests, PreparedTests]] = {}
+    
+    async def judge_one(row: Any) -> Optional[Dict[str, Any]]:
+        async with slots:
+            try:
+                return await judge_service.judge_submission(
+                    problem=problems[row.problem_id],
+                    code=row.code,
+                    language=row.language,
+                    is_test_run=False,
+                    differential=settings.DIFFERENTIAL_TESTING,
+                    suites=suites[row.problem_id]
+                )
+            except Exception as e:
+                logger.warning("Rejudge failed", submission_id=str(row.id), error=str(e))
+                return None
+    
+    try:
+        # The cursor keeps its connection busy, so writes go through a second session
+        async with session_factory() as read_db, session_factory() as db:
+            result = await read_db.stream(query.execution_options(yield_per=batch_size))
+            async for batch in result.partitions(batch_size):
+                for row in batch:
+                    if row.problem_id not in problems:
+                        problems[row.problem_id], suites[row.problem_id] = await _load_problem(
+                            db, row.problem_id, regenerate_tests, dry_run
+                        )
+                
+                results = await asyncio.gather(*(judge_one(row) for row in batch))
+                updates = _diff(batch, results, report)
+                if updates and not dry_run:
+                    await db.execute(update(Submission), updates)
+                    await db.commit()
+                
+                report.cursor = batch[-1].id
+                report.elapsed_s = round(time.monotonic() - report.started, 2)
+                logger.info("Rejudge progress", **report.as_dict())
+        report.state = "done"
+    except BaseException as e:
+        report.state = "failed"
+        report.error = str(e) or type(e).__name__
+        raise
+    finally:
+        report.elapsed_s = round(time.monotonic() - report.started, 2)
+        logger.info("Rejudge finished", **report.as_dict())
+    return report
+
+
+def _diff(batch: List[Any], results: List[Optional[Dict[str, Any]]], report: RejudgeReport) -> List[Dict[str, Any]]:
+    """UPDATE parameters for the submissions whose outcome changed."""
+    updates = []
+    rejudged_at = datetime.utcnow().isoformat()
+    for row, result in zip(batch, results):
+        report.scanned += 1
+        if result is None:
+            report.errors += 1
+            continue
+        report.judged += 1
+        if (result["verdict"], result["passed"], result["total"]) == (row.verdict, row.passed, row.total):
+            continue
+        report.changed += 1
+        report.transitions[f"{row.verdict}->{result['verdict']}"] += 1
+        updates.append({
+            "id": row.id,
+            "verdict": result["verdict"],
+            "passed": result["passed"],
+            "total": result["total"],
+            "runtime_ms": result.get("runtime_ms"),
+            "memory_kb": result.get("memory_kb"),
+            "details": {
+                **(result.get("details") or {}),
+                "rejudged": {"previous_verdict": row.verdict, "at": rejudged_at}
+            }
+        })
+    return updates
+
+
+async def _run(args: argparse.Namespace) -> RejudgeReport:
+    try:
+        return await rejudge(
+            problem_id=args.problem_id,
+            template_slug=args.template,
+            language=args.language,
+            verdict=args.verdict,
+            after=args.after,
+            regenerate_tests=args.regenerate_tests,
+            dry_run=args.dry_run,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size
+        )
+    finally:
+        await http_clients.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rejudge stored submissions and report changed verdicts")
+    parser.add_argument("--problem-id", type=uuid.UUID)
+    parser.add_argument("--template", help="Template slug")
+    parser.add_argument("--language", choices=["python", "cpp"])
+    parser.add_argument("--verdict", help="Only submissions currently holding this verdict")
+    parser.add_argument("--after", type=uuid.UUID, help="Resume after this submission id (cursor of an earlier run)")
+    parser.add_argument("--regenerate-tests", action="store_true", help="Replace stored test suites from the generators first")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    parser.add_argument("--concurrency", type=int, default=settings.REJUDGE_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=settings.REJUDGE_BATCH_SIZE)
+    
+    report = asyncio.run(_run(parser.parse_args()))
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
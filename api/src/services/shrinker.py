@@ -0,0 +1,266 @@
+"""
+Shrinker service - reduces a failing test input to a small counterexample
+"""
+
+import json
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Given candidate inputs, the runner's first disagreement (with its "index" into
+# the batch) or None when every candidate passes
+BatchOracle = Callable[[List[Dict[str, Any]]], Awaitable[Optional[Dict[str, Any]]]]
+
+# (resulting size, parameter, operation, argument)
+Spec = Tuple[int, str, str, Any]
+
+
+def input_size(test_input: Dict[str, Any], signature: Optional[Dict[str, Any]] = None) -> int:
+    """Elements in the shrinkable parameters: list items, characters and tree nodes."""
+    size = 0
+    for name, kind in _shrinkable(test_input, signature):
+        if kind == "tree":
+            size += sum(1 for value in test_input[name] if value is not None)
+        elif kind == "sequence":
+            size += len(test_input[name])
+    return size
+
+
+async def shrink_input(
+    test_input: Dict[str, Any],
+    oracle: BatchOracle,
+    budget_s: float,
+    batch_size: int,
+    signature: Optional[Dict[str, Any]] = None,
+    accepts: Optional[Callable[[Dict[str, Any]], bool]] = None
+) -> Optional[Dict[str, Any]]:
+    """Delta-debug a failing input down to a small one that still fails.
+    
+    Each round removes chunks of every list/string parameter (or prunes and
+    hoists subtrees of tree parameters) at the current granularity, then, once
+    single elements are reached, simplifies values towards zero. Candidates
+    are sent smallest first, ``batch_size`` per oracle call, so the first
+    failure the runner reports is the best reduction of the round. Returns
+    None when the original input does not fail.
+    """
+    deadline = time.monotonic() + budget_s
+    original_size = input_size(test_input, signature)
+    current = test_input
+    failure = None
+    granularity = 2
+    runner_calls = 0
+    timed_out = False
+    # The original rides at the end of the first batch to confirm it fails at all
+    confirm = [test_input]
+    
+    while True:
+        params = _shrinkable(current, signature)
+        longest = max((_length(current[name], kind) for name, kind in params), default=0)
+        specs = _removals(current, params, granularity)
+        if granularity >= longest:
+            specs += _simplifications(current, params)
+        specs.sort(key=lambda spec: spec[0])
+        
+        candidates = iter(specs)
+        seen = {json.dumps(current, sort_keys=True)}
+        found = None
+        exhausted = False
+        while found is None and not exhausted:
+            batch: List[Dict[str, Any]] = []
+            for spec in candidates:
+                if time.monotonic() >= deadline:
+                    break
+                candidate = _apply(current, spec)
+                key = json.dumps(candidate, sort_keys=True)
+                if key in seen or (accepts is not None and not accepts(candidate)):
+                    continue
+                seen.add(key)
+                batch.append(candidate)
+                if len(batch) >= batch_size - len(confirm):
+                    break
+            else:
+                exhausted = True
+            batch += confirm
+            if time.monotonic() >= deadline:
+                timed_out = True
+                break
+            if not batch:
+                break
+            
+            runner_calls += 1
+            result = await oracle(batch)
+            confirming = bool(confirm)
+            confirm = []
+            if result is None:
+                if confirming:
+                    return None
+                continue
+            failure = result
+            if batch[result["index"]] is not test_input:
+                found = batch[result["index"]]
+        
+        if timed_out:
+            break
+        if found is not None:
+            current = found
+            granularity = max(granularity - 1, 2)
+        elif granularity < longest:
+            granularity = min(granularity * 2, longest)
+        else:
+            break  # no single removal or simplification still fails
+    
+    if failure is None:
+        return None
+    return {
+        "input": current,
+        "expected_output": failure.get("expected_output"),
+        "actual_output": failure.get("actual_output"),
+        "error_message": failure.get("error_message", ""),
+        "original_size": original_size,
+        "size": input_size(current, signature),
+        "runner_calls": runner_calls,
+        "timed_out": timed_out
+    }
+
+
+def _shrinkable(test_input: Dict[str, Any], signature: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """(name, kind) of the parameters the shrinker may change."""
+    kinds = (signature or {}).get("params", {})
+    params = []
+    for name, value in test_input.items():
+        kind = kinds.get(name, "")
+        if "@" in kind:
+            continue  # positions into another parameter stay as generated
+        if kind == "TreeNode":
+            params.append((name, "tree"))
+        elif isinstance(value, (list, str)):
+            params.append((name, "sequence"))
+        elif isinstance(value, int) and not isinstance(value, bool):
+            params.append((name, "scalar"))
+    return params
+
+
+def _length(value: Any, kind: str) -> int:
+    if kind == "tree":
+        return sum(1 for item in value if item is not None)
+    if kind == "sequence":
+        return len(value)
+    return 0
+
+
+def _removals(current: Dict[str, Any], params: List[Tuple[str, str]], granularity: int) -> List[Spec]:
+    """Chunk removals (sequences) and subtree prunes/hoists (trees) at this granularity."""
+    total = sum(_length(current[name], kind) for name, kind in params)
+    specs: List[Spec] = []
+    for name, kind in params:
+        value = current[name]
+        rest = total - _length(value, kind)
+        if kind == "tree":
+            nodes = _tree_nodes(value)
+            sizes = _subtree_sizes(nodes)
+            # Nodes are in level order, so the first ones root the largest subtrees
+            for node in range(min(granularity, len(nodes))):
+                specs.append((rest + sizes[node], name, "hoist", (nodes, node)))
+                specs.append((rest + len(nodes) - sizes[node], name, "prune", (nodes, node)))
+        elif kind == "sequence" and value:
+            chunk = math.ceil(len(value) / granularity)
+            for start in range(0, len(value), chunk):
+                kept = min(chunk, len(value) - start)
+                specs.append((rest + kept, name, "keep", (start, chunk)))
+                specs.append((rest + len(value) - kept, name, "drop", (start, chunk)))
+    return specs
+
+
+def _simplifications(current: Dict[str, Any], params: List[Tuple[str, str]]) -> List[Spec]:
+    """Single-value changes towards zero (numbers) or 'a' (characters)."""
+    total = sum(_length(current[name], kind) for name, kind in params)
+    specs: List[Spec] = []
+    for name, kind in params:
+        value = current[name]
+        if kind == "scalar":
+            specs.extend((total, name, "scalar", simpler) for simpler in _simpler(value))
+        elif isinstance(value, str):
+            specs.extend((total, name, "char", index) for index, char in enumerate(value) if char != "a")
+        else:
+            for index, item in enumerate(value):
+                specs.extend((total, name, "set", (index, simpler)) for simpler in _simpler(item))
+    return specs
+
+
+def _simpler(value: Any) -> List[int]:
+    if not isinstance(value, int) or isinstance(value, bool) or value == 0:
+        return []
+    half = value // 2 if value > 0 else -(-value // 2)
+    return [0, half] if half != 0 else [0]
+
+
+def _apply(current: Dict[str, Any], spec: Spec) -> Dict[str, Any]:
+    _, name, op, arg = spec
+    value = current[name]
+    if op == "keep":
+        start, chunk = arg
+        new = value[start:start + chunk]
+    elif op == "drop":
+        start, chunk = arg
+        new = value[:start] + value[start + chunk:]
+    elif op == "hoist":
+        nodes, node = arg
+        new = _tree_values(nodes, node)
+    elif op == "prune":
+        nodes, node = arg
+        new = _tree_values(nodes, 0, pruned=node)
+    elif op == "char":
+        new = value[:arg] + "a" + value[arg + 1:]
+    elif op == "set":
+        index, item = arg
+        new = value[:index] + [item] + value[index + 1:]
+    else:
+        new = arg
+    return {**current, name: new}
+
+
+def _tree_nodes(values: List[Any]) -> List[List[Any]]:
+    """[value, left, right] per node of a level-order tree, in level order."""
+    if not values or values[0] is None:
+        return []
+    nodes = [[values[0], None, None]]
+    queue = deque([0])
+    i = 1
+    while queue and i < len(values):
+        node = queue.popleft()
+        for side in (1, 2):
+            if i < len(values) and values[i] is not None:
+                nodes.append([values[i], None, None])
+                nodes[node][side] = len(nodes) - 1
+                queue.append(len(nodes) - 1)
+            i += 1
+    return nodes
+
+
+def _subtree_sizes(nodes: List[List[Any]]) -> List[int]:
+    sizes = [1] * len(nodes)
+    # Children always come after their parent in level order
+    for node in range(len(nodes) - 1, -1, -1):
+        for child in nodes[node][1:]:
+            if child is not None:
+                sizes[node] += sizes[child]
+    return sizes
+
+
+def _tree_values(nodes: List[List[Any]], root: int, pruned: Optional[int] = None) -> List[Any]:
+    """Level-order array of the subtree at ``root``, without the subtree at ``pruned``."""
+    values: List[Any] = []
+    queue: deque = deque([root])
+    while queue:
+        node = queue.popleft()
+        if node is None or node == pruned:
+            values.append(None)
+            continue
+        value, left, right = nodes[node]
+        values.append(value)
+        queue.append(left)
+        queue.append(right)
+    while values and values[-1] is None:
+        values.pop()
+    return values
@@ -4,7 +4,7 @@ Solutions store - manages reference solutions
 
 import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 
 import structlog
@@ -75,10 +75,47 @@ class SolutionsStore:
         if num in seen:
             return True
         seen.add(num)
-    return False'''
+    return False''',
+            "product_except_self": '''def productExceptSelf(nums):
+    answer = [1] * len(nums)
+    prefix = 1
+    for i in range(len(nums)):
+        answer[i] = prefix
+        prefix *= nums[i]
+    suffix = 1
+    for i in range(len(nums) - 1, -1, -1):
+        answer[i] *= suffix
+        suffix *= nums[i]
+    return answer''',
+            "single_number": '''def singleNumber(nums):
+    result = 0
+    for num in nums:
+        result ^= num
+    return result''',
+            "daily_temperatures": '''def dailyTemperatures(temperatures):
+    answer = [0] * len(temperatures)
+    stack = []
+    for i, temp in enumerate(temperatures):
+        while stack and temperatures[stack[-1]] < temp:
+            j = stack.pop()
+            answer[j] = i - j
+        stack.append(i)
+    return answer''',
+            "max_depth": '''def maxDepth(root):
+    depth = 0
+    level = [root] if root else []
+    while level:
+        depth += 1
+        level = [child for node in level for child in (node.left, node.right) if child]
+    return depth'''
         }
         return solutions.get(template_slug, "# Solution not available")
     
+    def get_reference(self, template_slug: str) -> Optional[str]:
+        """Get the trusted Python solution used for differential testing, if any."""
+        solution = self._get_python_solution(template_slug)
+        return None if solution == "# Solution not available" else solution
+    
     def _get_cpp_solution(self, template_slug: str) -> str:
         """Get C++ solution for template."""
         solutions = {
@@ -131,7 +168,11 @@ public:
         explanations = {
             "two_sum": "Use a hash map to store each number and its index. For each number, check if its complement (target - number) exists in the map. If found, return the indices.",
             "reverse_list": "Use three pointers: prev, current, and next. Iterate through the list, reversing the next pointer of each node to point to the previous node.",
-            "contains_duplicate": "Use a hash set to track seen numbers. For each number, check if it's already in the set. If found, return true. Otherwise, add it to the set."
+            "contains_duplicate": "Use a hash set to track seen numbers. For each number, check if it's already in the set. If found, return true. Otherwise, add it to the set.",
+            "product_except_self": "Fill the answer with prefix products from the left, then multiply in suffix products from the right, so no division is needed.",
+            "single_number": "XOR all numbers: pairs cancel out (a ^ a = 0), leaving the number that appears once.",
+            "daily_temperatures": "Keep a stack of indices with decreasing temperatures. A warmer day pops every colder day from the stack and fills in its wait.",
+            "max_depth": "Walk the tree level by level; the number of non-empty levels is the depth."
         }
         return explanations.get(template_slug, "Explanation not available")
     
@@ -140,6 +181,10 @@ public:
         complexities = {
             "two_sum": "Time: O(n), Space: O(n) - Single pass through array with hash map storage",
             "reverse_list": "Time: O(n), Space: O(1) - Single pass through list with constant extra space",
-            "contains_duplicate": "Time: O(n), Space: O(n) - Single pass through array with hash set storage"
+            "contains_duplicate": "Time: O(n), Space: O(n) - Single pass through array with hash set storage",
+            "product_except_self": "Time: O(n), Space: O(1) - Two passes, output array not counted",
+            "single_number": "Time: O(n), Space: O(1) - Single pass with a running XOR",
+            "daily_temperatures": "Time: O(n), Space: O(n) - Each index is pushed and popped at most once",
+            "max_depth": "Time: O(n), Space: O(w) - Breadth-first over levels of width w"
         }
         return complexities.get(template_slug, "Complexity analysis not available")
@@ -0,0 +1,84 @@
+"""
+Test suite store - generated test cases persisted once per problem
+"""
+
+import hashlib
+import json
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.schemas import ProblemTests, TestCase
+
+# Layout of ProblemTests.tests; bump when the stored JSON changes shape
+SUITE_FORMAT_VERSION = 1
+
+
+def serialize_tests(test_cases: List[TestCase]) -> bytes:
+    """Canonical JSON of a test list, as uploaded to and hashed by the runner's test-set store."""
+    return json.dumps(
+        [
+            {
+                "input": tc.input,
+                "expected_output": tc.expected_output,
+                "description": tc.description,
+                "is_public": tc.is_public
+            }
+            for tc in test_cases
+        ],
+        sort_keys=True,
+        separators=(',', ':')
+    ).encode()
+
+
+def _suite_values(test_cases: List[TestCase]) -> Dict[str, Any]:
+    payload = serialize_tests(test_cases)
+    return {
+        "format_version": SUITE_FORMAT_VERSION,
+        "test_count": len(test_cases),
+        "tests_hash": hashlib.sha256(payload).hexdigest(),
+        "tests": zlib.compress(payload, 6)
+    }
+
+
+def build_suite(test_cases: List[TestCase]) -> ProblemTests:
+    """Row for a new problem's tests (saved together with the problem)."""
+    return ProblemTests(**_suite_values(test_cases))
+
+
+async def save_suite(db: AsyncSession, problem_id: uuid.UUID, test_cases: List[TestCase]) -> None:
+    """Store the tests of an existing problem unless another request already has."""
+    await db.execute(
+        insert(ProblemTests)
+        .values(problem_id=problem_id, **_suite_values(test_cases))
+        .on_conflict_do_nothing(index_elements=[ProblemTests.problem_id])
+    )
+    await db.commit()
+
+
+async def replace_suite(db: AsyncSession, problem_id: uuid.UUID, test_cases: List[TestCase]) -> None:
+    """Store the tests of a problem over any earlier suite (after a generator fix)."""
+    values = _suite_values(test_cases)
+    await db.execute(
+        insert(ProblemTests)
+        .values(problem_id=problem_id, **values)
+        .on_conflict_do_update(index_elements=[ProblemTests.problem_id], set_=values)
+    )
+    await db.commit()
+
+
+async def load_suite(db: AsyncSession, problem_id: uuid.UUID) -> Optional[List[TestCase]]:
+    """Stored tests of a problem (primary-key lookup); None for problems stored without them."""
+    result = await db.execute(
+        select(ProblemTests.format_version, ProblemTests.tests).where(ProblemTests.problem_id == problem_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    if row.format_version != SUITE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported test suite format {row.format_version}")
+    return [TestCase(**tc) for tc in json.loads(zlib.decompress(row.tests))]
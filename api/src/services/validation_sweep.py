@@ -0,0 +1,204 @@
+"""
+Validation sweep - checks generated expected outputs against the reference solutions
+
+Every category, template, difficulty and seed in a range is generated (in a
+process pool) and its whole suite is run through the runner's test-set path
+with the template's reference solution. Any test the reference does not pass
+is a generator (or reference) bug. Run before deploys with
+``python -m src.services.validation_sweep``; the exit status is non-zero when
+anything disagreed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import structlog
+
+from src.core.http_clients import http_clients
+from src.services.judge import JudgeService
+from src.services.solutions_store import SolutionsStore
+
+logger = structlog.get_logger()
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+# Suite coordinates: (category, template, difficulty, seed)
+SuiteKey = Tuple[str, str, str, int]
+
+
+def _generate_suite(key: SuiteKey) -> Tuple[bytes, int]:
+    """Serialized test set of one suite and its test count (runs in a pool worker)."""
+    from src.services.problem_gen.registry import registry
+    from src.services.test_suites import serialize_tests
+    
+    category, template, difficulty, seed = key
+    _, test_cases = registry.generate_problem(category, template, seed, difficulty)
+    return serialize_tests(test_cases), len(test_cases)
+
+
+def sweep_plan(seed_start: int, seed_count: int, templates: Optional[List[str]] = None) -> Tuple[List[SuiteKey], List[str]]:
+    """Suites to check, and the templates skipped for lack of a reference solution."""
+    from src.services.problem_gen.registry import registry
+    
+    store = SolutionsStore()
+    plan, skipped = [], []
+    for category in registry.get_categories():
+        for template in registry.get_templates(category):
+            if templates and template not in templates:
+                continue
+            if store.get_reference(template) is None:
+                skipped.append(template)
+                continue
+            plan.extend(
+                (category, template, difficulty, seed)
+                for difficulty in DIFFICULTIES
+                for seed in range(seed_start, seed_start + seed_count)
+            )
+    return plan, skipped
+
+
+class SweepReport:
+    """Totals, throughput and the first ``max_failures`` disagreeing tests."""
+    
+    def __init__(self, max_failures: int = 50):
+        self.max_failures = max_failures
+        self.suites = 0
+        self.tests = 0
+        self.mismatches = 0
+        self.errors = 0
+        self.failures: List[Dict[str, Any]] = []
+        self.skipped_templates: List[str] = []
+        self.started = time.monotonic()
+    
+    def add_failure(self, key: SuiteKey, failure: Dict[str, Any]) -> None:
+        if len(self.failures) < self.max_failures:
+            category, template, difficulty, seed = key
+            self.failures.append({
+                "category": category, "template": template, "difficulty": difficulty, "seed": seed, **failure
+            })
+    
+    @property
+    def ok(self) -> bool:
+        return self.mismatches == 0 and self.errors == 0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "suites": self.suites,
+            "tests": self.tests,
+            "mismatches": self.mismatches,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 2),
+            "suites_per_s": round(self.suites / elapsed, 2) if elapsed else 0.0,
+            "tests_per_s": round(self.tests / elapsed, 2) if elapsed else 0.0,
+            "skipped_templates": self.skipped_templates,
+            "failures": self.failures
+        }
+
+
+async def _check_suite(judge_service: JudgeService, key: SuiteKey, test_set: bytes, report: SweepReport) -> None:
+    from src.services.problem_gen.registry import registry
+    
+    category, template, _, _ = key
+    try:
+        result = await judge_service.run_test_set(
+            SolutionsStore().get_reference(template),
+            "python",
+            test_set,
+            signature=registry.get_signature(category, template),
+            full_values=True
+        )
+    except httpx.HTTPError as e:
+        report.errors += 1
+        report.add_failure(key, {"error": f"Runner call failed: {e!r}"})
+        return
+    
+    for test in result.get("test_results", []):
+        if test.get("status") != "PASS":
+            report.mismatches += 1
+            report.add_failure(key, {
+                "index": test.get("index"),
+                "status": test.get("status"),
+                "input": test.get("input"),
+                "expected_output": test.get("expected_output"),
+                "actual_output": test.get("actual_output"),
+                "error_message": test.get("error_message")
+            })
+    if not result.get("test_results"):
+        report.errors += 1
+        report.add_failure(key, {"error": f"No test results (verdict {result.get('verdict')})"})
+
+
+async def run_sweep(
+    plan: List[SuiteKey],
+    pool: Executor,
+    concurrency: int = 8,
+    report: Optional[SweepReport] = None,
+    judge_service: Optional[JudgeService] = None
+) -> SweepReport:
+    """Generate every suite of ``plan`` in ``pool`` and check it with at most ``concurrency`` runner calls."""
+    report = report or SweepReport()
+    loop = asyncio.get_running_loop()
+    judge_service = judge_service or JudgeService()
+    runner_slots = asyncio.Semaphore(concurrency)
+    # Generated suites waiting for the runner are bounded too, so memory stays flat
+    in_flight = asyncio.Semaphore(concurrency * 4)
+    log_every = max(1, len(plan) // 20)
+    
+    async def check(key: SuiteKey) -> None:
+        async with in_flight:
+            try:
+                test_set, count = await loop.run_in_executor(pool, _generate_suite, key)
+            except Exception as e:
+                report.errors += 1
+                report.add_failure(key, {"error": f"Generation failed: {e!r}"})
+                return
+            async with runner_slots:
+                await _check_suite(judge_service, key, test_set, report)
+            report.suites += 1
+            report.tests += count
+            if report.suites % log_every == 0:
+                logger.info("Sweep progress", done=report.suites, total=len(plan), mismatches=report.mismatches)
+    
+    await asyncio.gather(*(check(key) for key in plan))
+    return report
+
+
+async def _run(args: argparse.Namespace) -> SweepReport:
+    plan, skipped = sweep_plan(args.seed_start, args.seeds, args.template)
+    report = SweepReport(args.max_failures)
+    report.skipped_templates = skipped
+    logger.info("Sweep started", suites=len(plan), skipped_templates=skipped, workers=args.workers)
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            await run_sweep(plan, pool, args.concurrency, report)
+    finally:
+        await http_clients.close()
+    logger.info("Sweep finished", **{k: v for k, v in report.as_dict().items() if k != "failures"})
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check generated tests against reference solutions over a seed range")
+    parser.add_argument("--seeds", type=int, default=100, help="Seeds per template and difficulty")
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--template", action="append", help="Only this template (repeatable)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Generator processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="Runner calls in flight")
+    parser.add_argument("--max-failures", type=int, default=50, help="Disagreeing tests listed in the report")
+    args = parser.parse_args()
+    
+    report = asyncio.run(_run(args))
+    print(json.dumps(report.as_dict(), indent=2, default=str))
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
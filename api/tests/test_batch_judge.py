@@ -0,0 +1,73 @@
+"""
+Tests for bulk judging
+"""
+
+import asyncio
+import uuid
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.core.schemas import SubmissionCreate
+from src.services import batch_judge
+from src.services.batch_judge import judge_batch
+
+
+class TestBatchJudge:
+    """Test grouping, bounded fan-out and streaming of batch verdicts."""
+    
+    @pytest.mark.asyncio
+    async def test_groups_fan_out_after_first_item(self):
+        """Test that every item gets one line and a group's first item finishes before the rest start."""
+        problems = {uuid.uuid4(): Mock(), uuid.uuid4(): Mock()}
+        first, second = problems
+        items = [SubmissionCreate(problem_id=first if i % 3 else second, language="python", code=f"# {i}")
+                 for i in range(12)]
+        items.append(SubmissionCreate(problem_id=uuid.uuid4(), language="python", code="pass"))
+        items.append(SubmissionCreate(problem_id=first, language="java", code="pass"))
+        events, running, peak = [], 0, 0
+        
+        async def judge(self, problem, code, language, **kwargs):
+            nonlocal running, peak
+            # Judged against the suites prepared with the problem, not the shared cache
+            assert any(kwargs["suites"] is entry.suites and problem is entry.problem for entry in problems.values())
+            running += 1
+            peak = max(peak, running)
+            events.append(("start", code))
+            await asyncio.sleep(0.01)
+            events.append(("end", code))
+            running -= 1
+            return {"verdict": "ACCEPTED", "passed": 3, "total": 3, "runtime_ms": 1}
+        
+        with patch.object(batch_judge.JudgeService, "judge_submission", judge):
+            lines = [line async for line in judge_batch(items, problems, concurrency=3)]
+        
+        assert sorted(line["index"] for line in lines) == list(range(14))
+        assert {line["index"]: line.get("error") for line in lines if line["verdict"] is None} == {
+            12: "Problem not found", 13: "Language must be 'python' or 'cpp'"
+        }
+        assert peak == 3
+        for leader in ("# 0", "# 1"):
+            group = [item.code for item in items[:12] if item.problem_id == items[int(leader[2:])].problem_id]
+            others_started = min(events.index(("start", code)) for code in group[1:])
+            assert events.index(("end", leader)) < others_started
+    
+    @pytest.mark.asyncio
+    async def test_stopping_early_cancels_judging(self):
+        """Test that a client that stops reading does not leave judging running."""
+        problem_id = uuid.uuid4()
+        items = [SubmissionCreate(problem_id=problem_id, language="python", code=f"# {i}") for i in range(20)]
+        calls = []
+        
+        async def judge(self, problem, code, language, **kwargs):
+            calls.append(code)
+            await asyncio.sleep(0.01)
+            return {"verdict": "WRONG_ANSWER", "passed": 0, "total": 3}
+        
+        with patch.object(batch_judge.JudgeService, "judge_submission", judge):
+            lines = judge_batch(items, {problem_id: Mock()}, concurrency=2)
+            assert (await lines.__anext__())["verdict"] == "WRONG_ANSWER"
+            await lines.aclose()
+            await asyncio.sleep(0.05)
+        
+        assert len(calls) < len(items)
@@ -0,0 +1,60 @@
+"""
+Tests for the shared upstream HTTP clients
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.core.http_clients import RUNNER, VLLM, HttpClients, MeteredTransport, http_clients
+from src.services.feedback import FeedbackService
+from src.services.gpt_coach import GPTCoachService
+from src.services.judge import JudgeService
+
+
+class TestHttpClients:
+    """Test client sharing and pool metrics."""
+    
+    @pytest.mark.asyncio
+    async def test_saturation_counted(self):
+        """Test that requests beyond the connection limit are reported as saturated."""
+        release = asyncio.Event()
+        
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, json={"ok": True})
+        
+        transport = MeteredTransport(2, transport=httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            calls = [asyncio.create_task(client.get("http://runner/health")) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            assert transport.in_flight == 5
+            release.set()
+            responses = await asyncio.gather(*calls)
+        
+        assert all(response.json() == {"ok": True} for response in responses)
+        stats = transport.stats()
+        assert stats["in_flight"] == 0
+        assert stats["peak_in_flight"] == 5
+        assert (stats["requests"], stats["saturated"]) == (5, 3)
+        assert stats["saturation_rate"] == 0.6
+    
+    def test_services_share_clients(self):
+        """Test that services reuse one client per upstream instead of opening their own."""
+        assert JudgeService().client is JudgeService().client is http_clients.get(RUNNER)
+        assert GPTCoachService().client is FeedbackService().client is http_clients.get(VLLM)
+        assert JudgeService().client is not GPTCoachService().client
+    
+    @pytest.mark.asyncio
+    async def test_close_and_reopen(self):
+        """Test that the registry closes its clients and reopens on next use."""
+        clients = HttpClients()
+        clients.start()
+        runner = clients.get(RUNNER)
+        assert set(clients.stats()) == {"runner", "vllm"}
+        
+        await clients.close()
+        
+        assert runner.is_closed
+        assert clients.get(RUNNER) is not runner
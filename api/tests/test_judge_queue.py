@@ -0,0 +1,236 @@
+"""
+Tests for background judging
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from src.core.schemas import Problem, Submission
+from src.services import judge_queue as judge_queue_module
+from src.services.judge_queue import PENDING, JudgeJob, JudgeQueue
+
+RESULT = {"verdict": "WRONG_ANSWER", "passed": 1, "total": 3, "runtime_ms": 4, "details": {"test_results": []}}
+
+
+class _FakeSession:
+    """Serves stored submissions and their problem, and applies the queue's claim and verdict UPDATEs."""
+    
+    def __init__(self, submissions):
+        self.submissions = {s.id: s for s in submissions}
+        self.problem = Problem(problem_id=uuid.uuid4(), category="Arrays & Strings", template_slug="two_sum",
+                               seed=1, difficulty="Easy", title="Two Sum", prompt="...")
+        self.commits = 0
+    
+    def __call__(self):
+        return self
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def execute(self, statement):
+        if statement.is_dml:
+            return self._update(statement)
+        if statement.column_descriptions[0]["entity"] is Problem:
+            return Mock(scalar_one_or_none=Mock(return_value=self.problem))
+        if statement.column_descriptions[0]["name"] == "id":
+            return Mock(all=Mock(return_value=self._backlog(statement)))
+        submission = self.submissions.get(statement.whereclause.right.value)
+        return Mock(scalar_one_or_none=Mock(return_value=submission), scalar_one=Mock(return_value=submission))
+    
+    def _update(self, statement):
+        params = statement.compile().params
+        values = {column.key: bind.value for column, bind in statement._values.items()}
+        submission = self.submissions.get(params["id_1"])
+        if "claimed_at" in values:
+            # Claim: PENDING and unclaimed, or claimed before the lease cutoff
+            ok = submission is not None and submission.verdict == PENDING and (
+                submission.claimed_at is None or submission.claimed_at < params["claimed_at_1"]
+            )
+        else:
+            # Verdict: only while the worker's claim still holds
+            ok = submission.verdict == PENDING and submission.claimed_at == params["claimed_at_1"]
+        if ok:
+            for name, value in values.items():
+                setattr(submission, name, value)
+        return Mock(rowcount=int(ok), scalar_one_or_none=Mock(return_value=values.get("claimed_at") if ok else None))
+    
+    def _backlog(self, statement):
+        """Recovery page: claimable PENDING rows after the cursor, oldest first."""
+        params = statement.compile().params
+        rows = sorted(
+            (s for s in self.submissions.values()
+             if s.verdict == PENDING and (s.claimed_at is None or s.claimed_at < params["claimed_at_1"])),
+            key=lambda s: (s.created_at, s.id)
+        )
+        if "param_3" in params:
+            rows = [s for s in rows if (s.created_at, s.id) > (params["param_1"], params["param_2"])]
+        return [Mock(id=s.id, created_at=s.created_at, details=s.details) for s in rows[:statement._limit]]
+    
+    async def commit(self):
+        self.commits += 1
+    
+    async def refresh(self, instance):
+        pass
+    
+    async def rollback(self):
+        pass
+
+
+def _pending(verdict=PENDING, claimed_at=None, created_at=None):
+    return Submission(id=uuid.uuid4(), problem_id=uuid.uuid4(), language="python", code="pass", verdict=verdict,
+                      claimed_at=claimed_at, created_at=created_at or datetime.utcnow())
+
+
+class TestJudgeQueue:
+    """Test the background judge worker pool."""
+    
+    @pytest.mark.asyncio
+    async def test_worker_stores_verdict_and_wakes_subscribers(self):
+        """Test that a queued submission is judged with its options and its subscribers notified."""
+        submission = _pending()
+        db = _FakeSession([submission])
+        queue = JudgeQueue(workers=1, session_factory=db)
+        queue.start()
+        
+        with patch.object(judge_queue_module.JudgeService, "judge_submission", AsyncMock(return_value=RESULT)) as judge:
+            judged = queue.subscribe(submission.id)
+            queue.enqueue(JudgeJob(submission.id, {"metered": True}))
+            await asyncio.wait_for(judged, 1)
+        await queue.close()
+        
+        assert submission.verdict == "WRONG_ANSWER"
+        assert (submission.passed, submission.total) == (1, 3)
+        assert judge.call_args.kwargs["metered"] is True
+        assert submission.claimed_at is not None
+        assert db.commits == 2  # claim, then verdict
+        assert queue.stats()["completed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_by_workers(self):
+        """Test that no more submissions are judged at once than there are workers."""
+        submissions = [_pending() for _ in range(6)]
+        queue = JudgeQueue(workers=2, session_factory=_FakeSession(submissions))
+        running, peak = 0, 0
+        
+        async def judge(*args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return RESULT
+        
+        queue.start()
+        with patch.object(judge_queue_module.JudgeService, "judge_submission", AsyncMock(side_effect=judge)):
+            for submission in submissions:
+                queue.enqueue(JudgeJob(submission.id))
+            await queue.close()
+        
+        assert peak == 2
+        assert all(s.verdict == "WRONG_ANSWER" for s in submissions)
+    
+    @pytest.mark.asyncio
+    async def test_failures_and_judged_rows(self):
+        """Test that runner failures are stored as errors and already judged rows are left alone."""
+        failing, judged = _pending(), _pending(verdict="ACCEPTED")
+        queue = JudgeQueue(workers=1, session_factory=_FakeSession([failing, judged]))
+        queue.start()
+        
+        with patch.object(
+            judge_queue_module.JudgeService, "judge_submission", AsyncMock(side_effect=RuntimeError("runner down"))
+        ) as judge:
+            queue.enqueue(JudgeJob(failing.id))
+            queue.enqueue(JudgeJob(judged.id))
+            await queue.close()
+        
+        assert failing.verdict == "RUNTIME_ERROR"
+        assert failing.details == {"error": "runner down"}
+        assert judged.verdict == "ACCEPTED"
+        assert judge.call_count == 1
+        assert queue.stats()["failed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_capacity(self):
+        """Test that the queue refuses work before it starts and once the backlog is full."""
+        queue = JudgeQueue(workers=1, max_pending=1, session_factory=_FakeSession([]))
+        assert not queue.has_capacity()
+        
+        queue.start()
+        assert queue.has_capacity()
+        queue.enqueue(JudgeJob(uuid.uuid4()))
+        assert not queue.has_capacity()
+        await queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_submission_judged_once_across_queues(self):
+        """Test that two processes queueing one submission judge and record it once."""
+        submission = _pending()
+        db = _FakeSession([submission])
+        first, second = JudgeQueue(workers=1, session_factory=db), JudgeQueue(workers=1, session_factory=db)
+        accepted = {**RESULT, "verdict": "ACCEPTED", "passed": 3}
+        
+        with patch.object(judge_queue_module.JudgeService, "judge_submission", AsyncMock(return_value=accepted)) as judge, \
+                patch.object(judge_queue_module.percentile_index, "record") as record:
+            for queue in (first, second):
+                queue.start()
+                queue.enqueue(JudgeJob(submission.id))
+            await first.close()
+            await second.close()
+        
+        assert judge.call_count == 1
+        assert record.call_count == 1
+        assert submission.verdict == "ACCEPTED"
+        assert first.stats()["skipped"] + second.stats()["skipped"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_expired_claim_is_judged_again_and_stale_verdict_dropped(self):
+        """Test that a dead worker's claim lapses and its late verdict is not stored."""
+        stale_claim = datetime.utcnow() - timedelta(seconds=120)
+        submission = _pending(claimed_at=stale_claim)
+        db = _FakeSession([submission])
+        queue = JudgeQueue(workers=1, session_factory=db, lease_s=60)
+        queue.start()
+        
+        with patch.object(judge_queue_module.JudgeService, "judge_submission", AsyncMock(return_value=RESULT)):
+            queue.enqueue(JudgeJob(submission.id))
+            await queue.close()
+            assert submission.verdict == "WRONG_ANSWER"
+            
+            # The original worker finishing late finds its claim gone
+            late = _pending(claimed_at=datetime.utcnow())
+            db.submissions[late.id] = late
+            await judge_queue_module.judge_and_record(db, late, db.problem, claimed_at=stale_claim)
+        
+        assert late.verdict == PENDING
+    
+    @pytest.mark.asyncio
+    async def test_recover_pages_backlog_within_bound(self):
+        """Test that recovery never holds more than max_pending and skips live claims."""
+        started = datetime.utcnow() - timedelta(minutes=10)
+        backlog = [_pending(created_at=started + timedelta(seconds=i // 2)) for i in range(7)]
+        claimed = _pending(claimed_at=datetime.utcnow(), created_at=started)
+        db = _FakeSession(backlog + [claimed])
+        queue = JudgeQueue(workers=1, max_pending=3, session_factory=db)
+        peak = 0
+        
+        async def judge(*args, **kwargs):
+            nonlocal peak
+            peak = max(peak, queue.stats()["pending"])
+            await asyncio.sleep(0.001)
+            return RESULT
+        
+        queue.start()
+        with patch.object(judge_queue_module.JudgeService, "judge_submission", AsyncMock(side_effect=judge)):
+            assert await queue.recover(poll_s=0.001) == 7
+            await queue.close()
+        
+        assert peak <= 3
+        assert all(s.verdict == "WRONG_ANSWER" for s in backlog)
+        assert claimed.verdict == PENDING
@@ -0,0 +1,100 @@
+"""
+Tests for readiness and graceful drain
+"""
+
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.core import lifecycle as lifecycle_module
+from src.core.db import get_db
+from src.core.lifecycle import Lifecycle
+from src.main import app
+from src.routers import submit
+
+
+class TestLifecycle:
+    """Test admission control and drain deadlines."""
+    
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_running_submissions(self):
+        """Test that drain returns once the last submission is released."""
+        state = Lifecycle(job_paths=["/submit"], drain_timeout_s=5)
+        assert state.ready
+        assert state.admit()
+        asyncio.get_running_loop().call_later(0.05, state.release)
+        
+        assert await state.drain()
+        assert not state.admit()
+    
+    @pytest.mark.asyncio
+    async def test_drain_deadline(self):
+        """Test that a stuck submission does not block shutdown past the deadline."""
+        state = Lifecycle(job_paths=["/submit"], drain_timeout_s=0.05)
+        assert state.remaining_s() == 0.05
+        assert state.admit()
+        
+        assert not await state.drain()
+        # Later shutdown steps (the judge queue) get no extra time
+        assert state.remaining_s() == 0.0
+    
+    def test_only_submissions_are_jobs(self):
+        """Test that reads are never refused or waited for."""
+        state = Lifecycle(job_paths=["/submit"])
+        
+        assert state.is_job("POST", "/submit/run")
+        assert not state.is_job("GET", "/submit/123")
+        assert not state.is_job("POST", "/chat/")
+    
+    @pytest.mark.asyncio
+    async def test_draining_api_refuses_submissions(self):
+        """Test that /submit gets a 503 and /healthz reports draining."""
+        previous = lifecycle_module.lifecycle.state
+        lifecycle_module.lifecycle.state = lifecycle_module.DRAINING
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+                response = await client.post("/submit/", json={"problem_id": "x", "language": "python", "code": ""})
+                assert response.status_code == 503
+                assert response.headers["retry-after"] == "5"
+                
+                health = await client.get("/healthz")
+                assert health.status_code == 503
+                assert health.json()["status"] == "draining"
+        finally:
+            lifecycle_module.lifecycle.state = previous
+    
+    @pytest.mark.asyncio
+    async def test_streamed_batch_holds_its_slot(self):
+        """Test that a batch counts as running until its last line is streamed."""
+        in_flight = []
+        
+        async def prepare(db, items):
+            return {}
+        
+        async def lines(items, problems, details=False):
+            for index in range(3):
+                await asyncio.sleep(0)
+                in_flight.append(lifecycle_module.lifecycle.in_flight)
+                yield {"index": index}
+        
+        async def no_db():
+            yield None
+        
+        app.dependency_overrides[get_db] = no_db
+        try:
+            with patch.object(submit, "prepare_batch", prepare), patch.object(submit, "judge_batch", lines):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+                    item = {"problem_id": str(uuid.uuid4()), "language": "python", "code": "pass"}
+                    response = await client.post("/submit/batch", json={"items": [item]})
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+        
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 3
+        assert in_flight == [1, 1, 1]
+        assert lifecycle_module.lifecycle.in_flight == 0
@@ -0,0 +1,116 @@
+"""
+Tests for runtime/memory percentile sketches
+"""
+
+import random
+import time
+
+import pytest
+
+from src.services.percentiles import (
+    LogHistogram,
+    PercentileIndex,
+    bucket_index,
+    bucket_lower_bound,
+)
+
+
+class _FakeStream:
+    """Async iterator standing in for a streamed SQLAlchemy result."""
+    
+    def __init__(self, rows):
+        self._rows = iter(rows)
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    async def stream(self, query):
+        return _FakeStream(self.rows)
+
+
+class TestPercentiles:
+    """Test the log-linear histogram and the per-template index."""
+    
+    def test_buckets_are_monotonic_and_tight(self):
+        """Test that bucket bounds stay within the advertised relative error."""
+        previous = -1
+        for value in [0, 1, 15, 16, 17, 100, 1000, 12345, 10 ** 7]:
+            index = bucket_index(value)
+            assert index >= previous
+            previous = index
+            lower = bucket_lower_bound(index)
+            assert lower <= value
+            assert value - lower <= max(1, value * 0.0625)
+    
+    def test_rank_and_quantiles(self):
+        """Test "faster than X%" and median on a known distribution."""
+        histogram = LogHistogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        
+        assert histogram.total == 100
+        assert 8 <= histogram.rank(90) <= 12
+        assert histogram.rank(1000) == 0.0
+        assert 45 <= histogram.quantile(0.5) <= 52
+        assert LogHistogram().rank(5) is None
+    
+    def test_index_keys_are_separate(self):
+        """Test that languages and difficulties do not share a sketch."""
+        index = PercentileIndex()
+        index.record("two_sum", "python", "Easy", 100, 2048)
+        
+        assert index.rank("two_sum", "python", "Easy", 10, 1024)["runtime_beats_pct"] == 100.0
+        assert index.rank("two_sum", "cpp", "Easy", 10, 1024)["sample_size"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_rebuild_streams_submissions(self):
+        """Test that a rebuild replaces the sketches from one pass over the rows."""
+        index = PercentileIndex()
+        index.record("stale", "python", "Easy", 1, 1)
+        rows = [("two_sum", "python", "Easy", ms, 1024) for ms in (10, 20, 30)]
+        
+        assert await index.rebuild(_FakeSession(rows)) == 3
+        assert index.summary("two_sum", "python", "Easy")["sample_size"] == 3
+        assert index.summary("stale", "python", "Easy")["sample_size"] == 0
+    
+    def test_quantiles_match_sorted_values(self):
+        """Test quantiles and ranks against an exact computation on random data."""
+        rng = random.Random(7)
+        values = [rng.randint(0, 50000) for _ in range(5000)]
+        histogram = LogHistogram()
+        for value in values:
+            histogram.add(value)
+        ordered = sorted(values)
+        
+        for q in (0.01, 0.5, 0.9, 0.99, 1.0):
+            exact = ordered[max(1, int(q * len(values) + 0.5)) - 1]
+            assert histogram.quantile(q) == bucket_lower_bound(bucket_index(exact))
+        above = sum(1 for value in values if bucket_index(value) > bucket_index(1000))
+        tied = sum(1 for value in values if bucket_index(value) == bucket_index(1000))
+        assert histogram.rank(1000) == round(100.0 * (above + tied / 2) / len(values), 1)
+    
+    @pytest.mark.asyncio
+    async def test_large_rebuild_is_fast(self):
+        """Test that rebuilding from many submissions costs O(log buckets) per row."""
+        rng = random.Random(1)
+        rows = [
+            ("two_sum", "python", "Easy", rng.randint(1, 10 ** 6), rng.randint(1, 10 ** 6))
+            for _ in range(200_000)
+        ]
+        index = PercentileIndex()
+        
+        started = time.perf_counter()
+        assert await index.rebuild(_FakeSession(rows)) == len(rows)
+        assert time.perf_counter() - started < 5.0
+        assert index.summary("two_sum", "python", "Easy")["sample_size"] == len(rows)
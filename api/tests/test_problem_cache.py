@@ -0,0 +1,91 @@
+"""
+Tests for the shared problem snapshot cache
+"""
+
+import asyncio
+import uuid
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.schemas import Problem
+from src.services.problem_cache import ProblemCache
+
+
+def _problem(problem_id=None):
+    return Problem(problem_id=problem_id or uuid.uuid4(), category="Arrays & Strings", template_slug="two_sum",
+                   seed=7, difficulty="Easy", title="Two Sum", prompt="Find two numbers.")
+
+
+class _CountingSession:
+    """Serves problems by id and counts the queries."""
+    
+    def __init__(self, *problems):
+        self.problems = {p.problem_id: p for p in problems}
+        self.queries = 0
+    
+    async def execute(self, statement):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        problem_id = statement.whereclause.right.value
+        return Mock(scalar_one_or_none=Mock(return_value=self.problems.get(problem_id)))
+
+
+class TestProblemCache:
+    """Test hits, expiry, eviction and coalesced misses."""
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_served_until_expiry(self):
+        """Test that repeated lookups skip the database until the TTL passes."""
+        now = [0.0]
+        cache = ProblemCache(max_entries=8, ttl_s=60, clock=lambda: now[0])
+        problem = _problem()
+        db = _CountingSession(problem)
+        
+        snapshot = await cache.get(db, problem.problem_id)
+        assert (snapshot.title, snapshot.template_slug, snapshot.seed) == ("Two Sum", "two_sum", 7)
+        assert await cache.get(db, problem.problem_id) is snapshot
+        assert db.queries == 1
+        
+        now[0] = 61
+        await cache.get(db, problem.problem_id)
+        assert db.queries == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+    
+    @pytest.mark.asyncio
+    async def test_bounded_and_unknown_not_cached(self):
+        """Test LRU eviction and that missing problems are looked up again."""
+        problems = [_problem() for _ in range(3)]
+        cache = ProblemCache(max_entries=2)
+        db = _CountingSession(*problems)
+        
+        for problem in problems:
+            await cache.get(db, problem.problem_id)
+        unknown = uuid.uuid4()
+        assert await cache.get(db, unknown) is None
+        assert await cache.get(db, unknown) is None
+        
+        assert cache.stats()["entries"] == 2
+        assert cache.evictions == 1
+        assert db.queries == 5
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_query(self):
+        """Test that a burst of lookups for an uncached problem queries once."""
+        problem = _problem()
+        cache = ProblemCache()
+        db = _CountingSession(problem)
+        
+        snapshots = await asyncio.gather(*(cache.get(db, problem.problem_id) for _ in range(10)))
+        
+        assert db.queries == 1
+        assert all(s.problem_id == problem.problem_id for s in snapshots)
+    
+    def test_put_on_create(self):
+        """Test that a freshly created problem is served without a query."""
+        cache = ProblemCache()
+        problem = _problem()
+        
+        cache.put(problem)
+        
+        assert asyncio.run(cache.get(_CountingSession(), problem.problem_id)).prompt == "Find two numbers."
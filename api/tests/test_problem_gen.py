@@ -92,3 +92,50 @@ class TestProblemGeneration:
             registry.generate_problem(
                 "Arrays & Strings", "invalid_template", 12345, "Easy"
             )
+    
+    def test_signatures_match_test_inputs(self):
+        """Test that every marshalled parameter exists in the generated inputs."""
+        for category in ["Linked List", "Binary Tree / BST"]:
+            for template in registry.get_templates(category):
+                signature = registry.get_signature(category, template)
+                assert signature, f"{template} has no signature"
+                _, test_cases = registry.generate_problem(category, template, 12345, "Easy")
+                for test_case in test_cases:
+                    for name, kind in signature["params"].items():
+                        assert name in test_case.input
+                        if "@" in kind:
+                            assert kind.split("@", 1)[1] in test_case.input
+        
+        assert registry.get_signature("Arrays & Strings", "two_sum") == {}
+    
+    def test_op_budget_defaults_by_difficulty(self):
+        """Test that metering budgets grow with difficulty."""
+        easy = registry.get_op_budget("Arrays & Strings", "two_sum", "Easy")
+        hard = registry.get_op_budget("Arrays & Strings", "two_sum", "Hard")
+        
+        assert 0 < easy < hard
+    
+    def test_design_template_stress_sequence(self):
+        """Test that min_stack is a design template with a private stress sequence."""
+        signature = registry.get_signature("Stack & Queue", "min_stack")
+        assert signature["design"]["class"] == "MinStack"
+        
+        problem, test_cases = registry.generate_problem("Stack & Queue", "min_stack", 12345, "Hard")
+        stress = test_cases[-1]
+        assert len(test_cases) > problem.tests_public_count
+        assert len(stress.input["operations"]) == 100000
+        assert len(stress.expected_output) == len(stress.input["values"]) == 100000
+        for name in set(stress.input["operations"][1:]):
+            assert name in signature["design"]["methods"]
+    
+    def test_random_inputs_are_seeded(self):
+        """Test that differential inputs are reproducible and absent for unsupported templates."""
+        inputs = registry.random_inputs("Arrays & Strings", "two_sum", 12345, 50)
+        
+        assert len(inputs) == 50
+        assert inputs == registry.random_inputs("Arrays & Strings", "two_sum", 12345, 50)
+        for test_input in inputs:
+            nums, target = test_input["nums"], test_input["target"]
+            pairs = [(i, j) for i in range(len(nums)) for j in range(i + 1, len(nums)) if nums[i] + nums[j] == target]
+            assert len(pairs) == 1
+        assert registry.random_inputs("Stack & Queue", "min_stack", 12345, 50) == []
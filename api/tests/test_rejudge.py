@@ -0,0 +1,163 @@
+"""
+Tests for rejudging stored submissions
+"""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+from src.core.config import settings
+from src.core import schemas
+from src.main import app
+from src.services import rejudge as rejudge_module
+from src.services.problem_gen.registry import registry
+from src.services.rejudge import rejudge, rejudge_query
+
+PROBLEM_ID = uuid.uuid4()
+
+
+class _FakeSession:
+    """Streams the given rows in partitions and records bulk UPDATEs."""
+    
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.updates = []
+        self.commits = 0
+    
+    def __call__(self):
+        return self
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def stream(self, query):
+        rows, fail_after = self.rows, self.fail_after
+        
+        async def partitions(size):
+            for start in range(0, len(rows), size):
+                if fail_after is not None and start >= fail_after:
+                    raise ConnectionError("connection lost")
+                yield rows[start:start + size]
+        
+        return SimpleNamespace(partitions=partitions)
+    
+    async def execute(self, statement, params=None):
+        if params is not None:
+            self.updates.extend(params)
+            return Mock()
+        return Mock(scalar_one=Mock(return_value=Mock(problem_id=PROBLEM_ID)))
+    
+    async def commit(self):
+        self.commits += 1
+
+
+def _rows(count):
+    return [
+        SimpleNamespace(id=uuid.UUID(int=i + 1), problem_id=PROBLEM_ID, language="python",
+                        code=f"# {i}", verdict="ACCEPTED", passed=3, total=3)
+        for i in range(count)
+    ]
+
+
+async def _judge(self, problem, code, language, **kwargs):
+    # Every third submission fails the fixed tests
+    if int(code[2:]) % 3 == 0:
+        return {"verdict": "WRONG_ANSWER", "passed": 2, "total": 3, "details": {"test_results": []}}
+    return {"verdict": "ACCEPTED", "passed": 3, "total": 3}
+
+
+class TestRejudge:
+    """Test streaming rejudges with batched verdict updates."""
+    
+    @pytest.mark.asyncio
+    async def test_changed_verdicts_written_per_batch(self):
+        """Test that only changed outcomes are written, one UPDATE per batch, with the old verdict kept."""
+        db = _FakeSession(_rows(10))
+        
+        with patch.object(rejudge_module.JudgeService, "judge_submission", _judge), \
+                patch.object(rejudge_module, "suite_cache", Mock(get=AsyncMock())):
+            report = await rejudge(batch_size=4, session_factory=db)
+        
+        assert (report.state, report.scanned, report.judged, report.changed) == ("done", 10, 10, 4)
+        assert report.transitions == {"ACCEPTED->WRONG_ANSWER": 4}
+        assert report.cursor == uuid.UUID(int=10)
+        assert [u["id"] for u in db.updates] == [uuid.UUID(int=i + 1) for i in (0, 3, 6, 9)]
+        assert db.updates[0]["details"]["rejudged"]["previous_verdict"] == "ACCEPTED"
+        assert db.commits == 3
+    
+    @pytest.mark.asyncio
+    async def test_dry_run_writes_nothing(self):
+        """Test that a dry run reports the changes without storing them."""
+        db = _FakeSession(_rows(6))
+        
+        with patch.object(rejudge_module.JudgeService, "judge_submission", _judge), \
+                patch.object(rejudge_module, "suite_cache", Mock(get=AsyncMock())):
+            report = await rejudge(dry_run=True, session_factory=db)
+        
+        assert report.changed == 2
+        assert db.updates == []
+        assert db.commits == 0
+    
+    @pytest.mark.asyncio
+    async def test_dry_run_regeneration_stays_local(self):
+        """Test that a dry run judges against regenerated tests without caching or storing them."""
+        db = _FakeSession(_rows(5))
+        cache = Mock(get=AsyncMock(), invalidate=Mock())
+        test_cases = [
+            schemas.TestCase(input={"n": 1}, expected_output=1),
+            schemas.TestCase(input={"n": 2}, expected_output=2, is_public=False)
+        ]
+        judged_with = []
+        
+        async def judge(self, problem, code, language, **kwargs):
+            judged_with.append(kwargs["suites"])
+            return {"verdict": "ACCEPTED", "passed": 3, "total": 3}
+        
+        with patch.object(rejudge_module.JudgeService, "judge_submission", judge), \
+                patch.object(rejudge_module, "suite_cache", cache), \
+                patch.object(rejudge_module, "replace_suite", AsyncMock()) as replace, \
+                patch.object(registry, "generate_problem", Mock(return_value=(None, test_cases))):
+            await rejudge(regenerate_tests=True, dry_run=True, batch_size=2, session_factory=db)
+        
+        cache.get.assert_not_called()
+        cache.invalidate.assert_not_called()
+        replace.assert_not_called()
+        public, full = judged_with[0]
+        assert (len(public.test_cases), full.test_cases) == (1, test_cases)
+        # Loaded once per problem and held for every later batch
+        assert all(suites is judged_with[0] for suites in judged_with)
+    
+    @pytest.mark.asyncio
+    async def test_interrupted_run_resumes_from_cursor(self):
+        """Test that a failed run reports the last written submission to resume after."""
+        db = _FakeSession(_rows(10), fail_after=4)
+        report = rejudge_module.RejudgeReport()
+        
+        with patch.object(rejudge_module.JudgeService, "judge_submission", _judge), \
+                patch.object(rejudge_module, "suite_cache", Mock(get=AsyncMock())), \
+                pytest.raises(ConnectionError):
+            await rejudge(batch_size=4, report=report, session_factory=db)
+        
+        assert report.state == "failed"
+        assert report.cursor == uuid.UUID(int=4)
+        resumed = rejudge_query(after=report.cursor).compile()
+        assert report.cursor in resumed.params.values()
+        assert "submissions.id >" in str(resumed)
+    
+    @pytest.mark.asyncio
+    async def test_admin_endpoints_need_token(self):
+        """Test that /admin is refused without the configured token."""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            assert (await client.get("/admin/rejudge")).status_code == 403
+            
+            with patch.object(settings, "ADMIN_TOKEN", "s3cret"):
+                assert (await client.get("/admin/rejudge", headers={"X-Admin-Token": "wrong"})).status_code == 403
+                assert (await client.get("/admin/rejudge", headers={"X-Admin-Token": "s3cret"})).status_code == 404
@@ -0,0 +1,117 @@
+"""
+Tests for the failing-input shrinker
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from src.services.problem_gen.registry import registry
+from src.services.shrinker import input_size, shrink_input
+
+TREE = {"params": {"root": "TreeNode"}}
+
+
+def _oracle(fails, calls, delay=0.0):
+    """Batch oracle failing the first candidate for which ``fails`` holds."""
+    async def first_failure(candidates):
+        calls.append(len(candidates))
+        await asyncio.sleep(delay)
+        for index, candidate in enumerate(candidates):
+            if fails(candidate):
+                return {"index": index, "input": candidate, "expected_output": None}
+        return None
+    return first_failure
+
+
+def _has_equal_neighbours(test_input):
+    nums = test_input["nums"]
+    return any(a == b for a, b in zip(nums, nums[1:]))
+
+
+def _has_right_only_node(test_input):
+    values = test_input["root"]
+    # Level order: children of the k-th non-null value sit at 1 + 2k and 2 + 2k
+    non_null = [i for i, value in enumerate(values) if value is not None]
+    for k in range(len(non_null)):
+        left, right = 1 + 2 * k, 2 + 2 * k
+        if right < len(values) and values[right] is not None and values[left] is None:
+            return True
+    return False
+
+
+class TestShrinker:
+    """Test delta debugging over array, string and tree inputs."""
+    
+    @pytest.mark.asyncio
+    async def test_array_shrinks_to_minimal_case(self):
+        """Test that a 10^4-element failing array comes back as the two offending values."""
+        rng = random.Random(7)
+        nums = [rng.randint(1, 10**6) * 2 for _ in range(10000)]
+        nums[6000] = nums[6001] = 5
+        calls = []
+        
+        shrunk = await shrink_input({"nums": nums}, _oracle(_has_equal_neighbours, calls), 10.0, 48)
+        
+        assert shrunk["input"] == {"nums": [5, 5]}
+        assert (shrunk["original_size"], shrunk["size"]) == (10000, 2)
+        assert shrunk["runner_calls"] == len(calls) < 60
+        assert max(calls) <= 48
+    
+    @pytest.mark.asyncio
+    async def test_string_shrinks(self):
+        """Test that strings lose characters and simplify towards 'a'."""
+        calls = []
+        shrunk = await shrink_input({"s": "xyz" * 300 + "Q" + "zyx" * 300}, _oracle(lambda c: "Q" in c["s"], calls), 10.0, 48)
+        
+        assert shrunk["input"] == {"s": "Q"}
+    
+    @pytest.mark.asyncio
+    async def test_tree_prunes_subtrees(self):
+        """Test that tree inputs stay valid level-order trees while shrinking."""
+        generator = registry.get_generator("Binary Tree / BST")
+        tree = generator._random_level_order(random.Random(3), 2000)
+        assert _has_right_only_node({"root": tree})
+        
+        shrunk = await shrink_input({"root": tree}, _oracle(_has_right_only_node, []), 10.0, 48, signature=TREE)
+        
+        assert shrunk["input"] == {"root": [0, None, 0]}
+        assert input_size(shrunk["input"], TREE) == 2
+    
+    @pytest.mark.asyncio
+    async def test_candidates_respect_preconditions(self):
+        """Test that shrunk two_sum inputs keep exactly one answer."""
+        nums = [4 * k for k in range(1, 200)]
+        nums[150] = 1
+        test_input = {"nums": nums, "target": 1 + nums[10]}
+        accepts = lambda c: registry.accepts_input("Arrays & Strings", "two_sum", c)
+        
+        # The submission only looks for pairs fewer than 5 positions apart
+        def misses_pair(c):
+            i = c["nums"].index(1) if 1 in c["nums"] else -1
+            return i >= 0 and c["target"] - 1 in c["nums"] and abs(c["nums"].index(c["target"] - 1) - i) >= 5
+        
+        shrunk = await shrink_input(test_input, _oracle(misses_pair, []), 10.0, 48, accepts=accepts)
+        
+        assert accepts(shrunk["input"])
+        assert shrunk["size"] == 6
+    
+    @pytest.mark.asyncio
+    async def test_passing_input_is_not_shrunk(self):
+        """Test that nothing is returned when the original does not fail."""
+        calls = []
+        assert await shrink_input({"nums": [1, 2, 3]}, _oracle(_has_equal_neighbours, calls), 10.0, 48) is None
+        assert len(calls) == 1
+    
+    @pytest.mark.asyncio
+    async def test_budget(self):
+        """Test that a slow oracle stops at the wall-clock budget with the best input so far."""
+        nums = list(range(0, 20000, 2))
+        nums[5000] = nums[5001]
+        
+        shrunk = await shrink_input({"nums": nums}, _oracle(_has_equal_neighbours, [], delay=0.1), 0.35, 48)
+        
+        assert shrunk["timed_out"]
+        assert 2 < shrunk["size"] < 10000
+        assert _has_equal_neighbours(shrunk["input"])
@@ -0,0 +1,66 @@
+"""
+Tests for single-flight coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from src.core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test sharing one execution between identical concurrent calls."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test that callers of a key in flight get copies of the leader's result."""
+        flights = SingleFlight()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"verdict": "ACCEPTED", "details": {"tests": [1, 2]}}
+        
+        results = await asyncio.gather(*(flights.run("k", work) for _ in range(5)))
+        
+        assert len(calls) == 1
+        assert all(r == results[0] for r in results)
+        assert len({id(r) for r in results}) == 5
+        assert flights.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+        
+        await flights.run("k", work)
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_exception_reaches_every_caller(self):
+        """Test that a failed execution fails all of its waiters and is not remembered."""
+        flights = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("runner down")
+        
+        results = await asyncio.gather(*(flights.run("k", work) for _ in range(3)), return_exceptions=True)
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flights.in_flight("k")
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_work(self):
+        """Test that a leader going away leaves the work running for its followers."""
+        flights = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.02)
+            return 42
+        
+        leader = asyncio.ensure_future(flights.run("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await follower == 42
+        assert leader.cancelled()
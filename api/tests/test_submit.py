@@ -2,9 +2,21 @@
 Tests for code submission
 """
 
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime
+
+import httpx
 import pytest
-from unittest.mock import Mock, patch
-from src.services.judge import JudgeService
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.core.db import get_db
+from src.core.schemas import Submission, SubmissionCreate
+from src.main import app
+from src.routers import submit as submit_router
+from src.services import judge
+from src.services.judge import JudgeService, SuiteCache
 
 
 class TestSubmission:
@@ -44,7 +56,7 @@ def twoSum(nums, target):
         hashmap[num] = i
     return []
 """
-        
+
         with patch.object(judge_service.client, 'post') as mock_post:
             # Mock successful response
             mock_response = Mock()
@@ -79,7 +91,7 @@ def twoSum(nums, target):
 def twoSum(nums, target):
     return [0, 1]  # Always return wrong answer
 """
-        
+
         with patch.object(judge_service.client, 'post') as mock_post:
             # Mock wrong answer response
             mock_response = Mock()
@@ -114,7 +126,7 @@ def twoSum(nums, target):
     time.sleep(10)  # Cause timeout
     return []
 """
-        
+
         with patch.object(judge_service.client, 'post') as mock_post:
             # Mock timeout response
             mock_response = Mock()
@@ -168,3 +180,290 @@ def twoSum(nums, target):
             assert result["verdict"] == "TLE"
             assert result["passed"] == 0
             assert result["total"] > 0
+    
+    def test_summarize_memory_keeps_worst_test_only(self):
+        """Test that memory reports are collapsed into a compact summary."""
+        site = {"line": 3, "size_kb": 10.0, "count": 2, "source": "big = []"}
+        test_results = [
+            {"status": "PASS", "memory": {"peak_kb": 12.5, "top_sites": [site]}},
+            {"status": "PASS", "memory": {"peak_kb": 900.0, "top_sites": [site] * 5}},
+            {"status": "ERROR", "memory": {"peak_kb": 40.0, "top_sites": []}},
+            {"status": "ERROR"}
+        ]
+        
+        summary = JudgeService._summarize_memory(test_results)
+        
+        assert summary["peak_kb"] == 900.0
+        assert summary["peak_test_index"] == 1
+        assert summary["per_test_peak_kb"] == [12.5, 900.0, 40.0, None]
+        assert len(summary["top_sites"]) == 3
+        # The runner's results are read, not modified
+        assert all("memory" in tr for tr in test_results[:3])
+        assert JudgeService._summarize_memory([{"status": "PASS"}]) is None
+    
+    @pytest.mark.asyncio
+    async def test_test_set_uploaded_only_on_miss(self, judge_service, mock_problem):
+        """Test that tests are sent by hash and uploaded after a runner 404."""
+        missing = Mock(status_code=404)
+        ok = Mock(status_code=200)
+        ok.json.return_value = {"verdict": "ACCEPTED", "test_results": [{"status": "PASS"}]}
+        
+        with patch.object(judge_service.client, 'post', AsyncMock(side_effect=[missing, ok])) as mock_post, \
+                patch.object(judge_service.client, 'put', AsyncMock(return_value=Mock())) as mock_put:
+            result = await judge_service.judge_submission(mock_problem, "def twoSum(nums, target): pass", "python")
+        
+        assert result["verdict"] == "ACCEPTED"
+        payload = mock_post.call_args.kwargs["json"]
+        assert "test_cases" not in payload
+        assert mock_put.call_args.args[0].endswith(f"/test-sets/{payload['test_set_hash']}")
+        assert mock_post.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_full_values_only_on_request(self, judge_service, mock_problem):
+        """Test that the runner is asked for complete test values only when requested."""
+        ok = Mock(status_code=200)
+        ok.json.return_value = {"verdict": "ACCEPTED", "test_results": [{"status": "PASS", "index": 0}]}
+        
+        with patch.object(judge_service.client, 'post', AsyncMock(return_value=ok)) as mock_post:
+            await judge_service.judge_submission(mock_problem, "def twoSum(nums, target): pass", "python")
+            assert "full_values" not in mock_post.call_args.kwargs["json"]
+            
+            await judge_service.judge_submission(
+                mock_problem, "def twoSum(nums, target): pass", "python", is_test_run=True, full_values=True
+            )
+            assert mock_post.call_args.kwargs["json"]["full_values"] is True
+    
+    @pytest.mark.asyncio
+    async def test_stable_timing_keeps_wall_clock_runtime(self, judge_service, mock_problem):
+        """Test that the stable median goes to details and runtime_ms stays the wall-clock pass."""
+        ok = Mock(status_code=200)
+        ok.json.return_value = {
+            "verdict": "ACCEPTED",
+            "test_results": [{"status": "PASS", "index": 0}],
+            "total_runtime_ms": 40,
+            "stable_timing": {"method": "in-harness repeats", "repeats": 7, "total_median_ms": 3.2, "spread_pct": 1.0}
+        }
+        
+        with patch.object(judge_service.client, 'post', AsyncMock(return_value=ok)) as mock_post:
+            result = await judge_service.judge_submission(
+                mock_problem, "def twoSum(nums, target): pass", "python", stable_timing=True
+            )
+        
+        assert mock_post.call_args.kwargs["json"]["stable_timing"] is True
+        assert result["runtime_ms"] == 40
+        assert result["details"]["stable_timing"]["total_median_ms"] == 3.2
+    
+    @pytest.mark.asyncio
+    async def test_differential_disagreement_fails_accepted_submission(self, judge_service, mock_problem):
+        """Test that a counterexample from the reference turns ACCEPTED into WRONG_ANSWER."""
+        ok = Mock(status_code=200)
+        ok.json.return_value = {"verdict": "ACCEPTED", "test_results": [{"status": "PASS", "index": 0}]}
+        report = Mock(status_code=200)
+        report.json.return_value = {
+            "total": 200, "checked": 7, "skipped": 0, "timed_out": False,
+            "disagreement": {"index": 7, "input": {"nums": [3, 3], "target": 6},
+                             "expected_output": [0, 1], "actual_output": None}
+        }
+        
+        with patch.object(judge_service.client, 'post', AsyncMock(side_effect=[ok, report])) as mock_post:
+            result = await judge_service.judge_submission(
+                mock_problem, "def twoSum(nums, target): pass", "python", differential=True
+            )
+        
+        assert result["verdict"] == "WRONG_ANSWER"
+        assert result["details"]["differential"]["disagreement"]["index"] == 7
+        assert result["total"] == result["passed"] + 1
+        payload = mock_post.call_args.kwargs["json"]
+        assert mock_post.call_args.args[0].endswith("/differential")
+        assert len(payload["inputs"]) == 200
+        assert "def twoSum" in payload["reference_code"]
+        
+        with patch.object(judge_service.client, 'post', AsyncMock(return_value=ok)) as mock_post:
+            result = await judge_service.judge_submission(mock_problem, "def twoSum(nums, target): pass", "python")
+        assert result["verdict"] == "ACCEPTED"
+        assert mock_post.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_suite_cache_splits_and_bounds(self, mock_problem):
+        """Test that suites are built once per problem, split by visibility and evicted LRU."""
+        cache = SuiteCache(max_entries=1)
+        mock_problem.difficulty = "Hard"
+        public, full = await cache.get(mock_problem)
+        
+        assert all(tc.is_public for tc in public.test_cases)
+        assert len(full.test_cases) > len(public.test_cases)
+        assert full.hash == hashlib.sha256(full.payload).hexdigest()
+        assert await cache.get(mock_problem) == (public, full)
+        
+        other = Mock(category="Arrays & Strings", template_slug="two_sum", seed=54321, difficulty="Hard")
+        await cache.get(other)
+        assert (await cache.get(mock_problem))[1] is not full
+        assert cache.stats() == {
+            "entries": 1, "max_entries": 1, "hits": 1, "misses": 3, "evictions": 2, "hit_rate": 0.25
+        }
+    
+    @pytest.mark.asyncio
+    async def test_judge_generates_tests_once(self, judge_service, mock_problem):
+        """Test that repeated runs and submissions of a problem reuse its generated suite."""
+        ok = Mock(status_code=200)
+        ok.json.return_value = {"verdict": "ACCEPTED", "test_results": [{"status": "PASS", "index": 0}]}
+        
+        with patch.object(judge, "suite_cache", SuiteCache()) as cache, \
+                patch.object(judge_service.client, 'post', AsyncMock(return_value=ok)) as mock_post:
+            await judge_service.judge_submission(mock_problem, "def twoSum(nums, target): pass", "python", is_test_run=True)
+            run_hash = mock_post.call_args.kwargs["json"]["test_set_hash"]
+            await judge_service.judge_submission(mock_problem, "def twoSum(nums, target): pass", "python")
+            
+            assert mock_post.call_args.kwargs["json"]["test_set_hash"] != run_hash
+            assert (cache.hits, cache.misses) == (1, 1)
+    
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_submissions_judged_once(self, judge_service, mock_problem):
+        """Test that a retried submission still being judged joins the first one."""
+        ok = Mock(status_code=200)
+        ok.json.return_value = {"verdict": "ACCEPTED", "test_results": [{"status": "PASS", "index": 0}]}
+        
+        async def slow_post(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return ok
+        
+        code = "def twoSum(nums, target): pass"
+        with patch.object(judge_service.client, 'post', AsyncMock(side_effect=slow_post)) as mock_post:
+            first, retry, other = await asyncio.gather(
+                judge_service.judge_submission(mock_problem, code, "python"),
+                JudgeService().judge_submission(mock_problem, code, "python"),
+                judge_service.judge_submission(mock_problem, code + "\n", "python")
+            )
+        
+        assert first == retry
+        assert first is not retry
+        assert other["verdict"] == "ACCEPTED"
+        assert mock_post.call_count == 2
+
+
+
+class _FeedbackSession:
+    """Answers the problem lookup, then the stored-submission lookup."""
+    
+    def __init__(self, stored):
+        self.results = [Mock(title="Two Sum", prompt="..."), stored]
+        self.statements = []
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return Mock(scalar_one_or_none=Mock(return_value=self.results[len(self.statements) - 1]))
+
+
+class TestFeedback:
+    """Test that feedback reuses stored results of the same code."""
+    
+    CODE = "def twoSum(nums, target): return [0, 1]"
+    
+    async def _feedback(self, stored):
+        db = _FeedbackSession(stored)
+        app.dependency_overrides[get_db] = lambda: db
+        coach = AsyncMock(return_value={"summary": "ok"})
+        judged = {"verdict": "WRONG_ANSWER", "passed": 1, "total": 3, "details": {"test_results": []}}
+        try:
+            with patch.object(JudgeService, "judge_submission", AsyncMock(return_value=judged)) as judge, \
+                    patch("src.services.gpt_coach.GPTCoachService.get_submission_feedback", coach, create=True):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+                    response = await client.post("/submit/feedback", json={
+                        "problem_id": str(uuid.uuid4()), "language": "python", "code": self.CODE
+                    })
+        finally:
+            app.dependency_overrides.pop(get_db)
+        assert response.status_code == 200
+        return response.json(), judge, coach, db
+    
+    @pytest.mark.asyncio
+    async def test_reuses_latest_submission(self):
+        """Test that a stored verdict for the same code is used instead of judging again."""
+        stored = Submission(id=uuid.uuid4(), code=self.CODE, verdict="ACCEPTED", passed=3, total=3,
+                            runtime_ms=5, details={"test_results": [{"status": "PASS"}]})
+        
+        body, judge, coach, db = await self._feedback(stored)
+        
+        assert judge.call_count == 0
+        assert body["test_results"]["verdict"] == "ACCEPTED"
+        assert body["test_results"]["submission_id"] == str(stored.id)
+        assert coach.call_args.kwargs["test_results"]["details"] == stored.details
+        lookup = db.statements[1].compile()
+        assert hashlib.sha256(self.CODE.encode()).hexdigest() in lookup.params.values()
+    
+    @pytest.mark.asyncio
+    async def test_judges_on_miss_or_failed_run(self):
+        """Test that code never judged, or whose judging failed, is judged now."""
+        failed = Submission(id=uuid.uuid4(), code=self.CODE, verdict="RUNTIME_ERROR", passed=0, total=3,
+                            details={"error": "Runner service error: 503"})
+        
+        for stored in (None, failed):
+            body, judge, _, _ = await self._feedback(stored)
+            
+            assert judge.call_count == 1
+            assert body["test_results"]["verdict"] == "WRONG_ANSWER"
+
+
+class _FlightSession:
+    """Session factory for idempotent submits: no key stored yet, ``add`` assigns an id."""
+    
+    def __init__(self):
+        self.added = []
+    
+    def __call__(self):
+        return self
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def execute(self, statement):
+        return Mock(scalar_one_or_none=Mock(return_value=None))
+    
+    def add(self, instance):
+        instance.id, instance.created_at = uuid.uuid4(), datetime.utcnow()
+        self.added.append(instance)
+    
+    async def commit(self):
+        pass
+    
+    async def refresh(self, instance):
+        pass
+
+
+class TestIdempotency:
+    """Test concurrent submits sharing an Idempotency-Key."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_retry_shares_submission_and_checks_body(self):
+        """Test that retries share one submission in its own session and a different body gets 409."""
+        problem_id = uuid.uuid4()
+        flight_db = _FlightSession()
+        
+        async def judged(db, db_submission, problem, **options):
+            await asyncio.sleep(0.01)
+            db_submission.verdict, db_submission.passed, db_submission.total = "ACCEPTED", 3, 3
+        
+        def submit(code):
+            # The request's own session must not be touched by the shared work
+            return submit_router.submit_code(
+                SubmissionCreate(problem_id=problem_id, language="python", code=code), Mock(),
+                background=False, memory_profile=False, stable_timing=False, metered=False,
+                idempotency_key="retry-1", db=object()
+            )
+        
+        with patch.object(submit_router, "AsyncSessionLocal", flight_db), \
+                patch.object(submit_router.problem_cache, "get", AsyncMock(return_value=Mock())), \
+                patch.object(submit_router, "judge_and_record", AsyncMock(side_effect=judged)) as judge_mock:
+            results = await asyncio.gather(
+                submit("pass"), submit("pass"), submit("print(1)"), return_exceptions=True
+            )
+        
+        first, retry, different = results
+        assert judge_mock.call_count == 1
+        assert len(flight_db.added) == 1
+        assert first.id == retry.id and first.verdict == "ACCEPTED"
+        assert different.status_code == 409
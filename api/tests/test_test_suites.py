@@ -0,0 +1,93 @@
+"""
+Tests for stored problem test suites
+"""
+
+import hashlib
+import uuid
+import zlib
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from src.core import schemas
+from src.services.judge import SuiteCache
+from src.services.problem_gen.registry import registry
+from src.services.test_suites import SUITE_FORMAT_VERSION, build_suite, load_suite, serialize_tests
+
+STORED = [
+    schemas.TestCase(input={"nums": [1, 2], "target": 3}, expected_output=[0, 1], is_public=True),
+    schemas.TestCase(input={"nums": [5, 0, 5], "target": 10}, expected_output=[0, 2], is_public=False)
+]
+
+
+class _FakeSession:
+    """Records statements; SELECTs answer with the given row."""
+    
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+        self.commits = 0
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return Mock(one_or_none=Mock(return_value=self.row))
+    
+    async def commit(self):
+        self.commits += 1
+
+
+def _row(test_cases, format_version=SUITE_FORMAT_VERSION):
+    suite = build_suite(test_cases)
+    return SimpleNamespace(format_version=format_version, tests=suite.tests)
+
+
+def _problem():
+    return Mock(problem_id=uuid.uuid4(), category="Arrays & Strings", template_slug="two_sum", seed=12345, difficulty="Easy")
+
+
+class TestSuiteStore:
+    """Test persisting and loading generated tests."""
+    
+    @pytest.mark.asyncio
+    async def test_round_trip(self):
+        """Test that a stored suite decodes to the same tests under the runner's hash."""
+        suite = build_suite(STORED)
+        
+        assert suite.test_count == 2
+        assert suite.tests_hash == hashlib.sha256(serialize_tests(STORED)).hexdigest()
+        assert len(suite.tests) < len(zlib.decompress(suite.tests))
+        assert await load_suite(_FakeSession(_row(STORED)), uuid.uuid4()) == STORED
+    
+    @pytest.mark.asyncio
+    async def test_unknown_format_rejected(self):
+        """Test that a suite written in a newer layout is not misread."""
+        with pytest.raises(ValueError):
+            await load_suite(_FakeSession(_row(STORED, format_version=99)), uuid.uuid4())
+    
+    @pytest.mark.asyncio
+    async def test_judge_uses_stored_tests(self):
+        """Test that stored tests win over what the generator produces today."""
+        db = _FakeSession(_row(STORED))
+        
+        public, full = await SuiteCache().get(_problem(), db)
+        
+        assert full.test_cases == STORED
+        assert public.test_cases == STORED[:1]
+        assert len(db.statements) == 1
+        assert db.commits == 0
+    
+    @pytest.mark.asyncio
+    async def test_missing_suite_backfilled(self):
+        """Test that problems stored without tests get them generated once and written back."""
+        db = _FakeSession(None)
+        problem = _problem()
+        
+        _, full = await SuiteCache().get(problem, db)
+        
+        _, generated = registry.generate_problem("Arrays & Strings", "two_sum", 12345, "Easy")
+        assert full.test_cases == generated
+        insert = db.statements[1].compile()
+        assert insert.params["problem_id"] == problem.problem_id
+        assert insert.params["tests_hash"] == full.hash
+        assert db.commits == 1
@@ -0,0 +1,58 @@
+"""
+Tests for the generator/reference validation sweep
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from src.services.judge import JudgeService
+from src.services.validation_sweep import SweepReport, run_sweep, sweep_plan
+
+
+class TestValidationSweep:
+    """Test planning and checking suites against reference solutions."""
+    
+    def test_plan_covers_seeds_and_difficulties(self):
+        """Test that each template with a reference gets every difficulty and seed."""
+        plan, skipped = sweep_plan(10, 4, templates=["two_sum", "rotate_array"])
+        
+        assert len(plan) == 12
+        assert {key[1] for key in plan} == {"two_sum"}
+        assert {key[3] for key in plan} == {10, 11, 12, 13}
+        assert skipped == ["rotate_array"]
+    
+    @pytest.mark.asyncio
+    async def test_disagreements_reported(self):
+        """Test that suites go through the test-set path and failing tests are reported with their seed."""
+        stored, executed = set(), []
+        
+        def runner(request: httpx.Request) -> httpx.Response:
+            if request.method == "PUT":
+                stored.add(request.url.path.rsplit("/", 1)[-1])
+                return httpx.Response(200, json={})
+            payload = json.loads(request.content)
+            if payload["test_set_hash"] not in stored:
+                return httpx.Response(404, json={"detail": "Unknown test set"})
+            executed.append(payload)
+            status = "FAIL" if len(executed) == 2 else "PASS"
+            return httpx.Response(200, json={"test_results": [
+                {"status": "PASS", "index": 0},
+                {"status": status, "index": 1, "input": {"nums": [1]}, "expected_output": [0], "actual_output": [1]}
+            ]})
+        
+        client = httpx.AsyncClient(transport=httpx.MockTransport(runner))
+        plan, _ = sweep_plan(0, 2, templates=["two_sum"])
+        with ThreadPoolExecutor(2) as pool:
+            report = await run_sweep(plan, pool, concurrency=1, judge_service=JudgeService(client))
+        
+        assert (report.suites, report.mismatches, report.errors) == (6, 1, 0)
+        assert report.tests > 6
+        assert stored == {p["test_set_hash"] for p in executed}  # difficulties may share a suite
+        assert all(p["full_values"] and "def twoSum" in p["code"] for p in executed)
+        failure = report.failures[0]
+        assert (failure["template"], failure["index"], failure["actual_output"]) == ("two_sum", 1, [1])
+        assert not report.ok
+        assert SweepReport().ok
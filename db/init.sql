@@ -19,21 +19,41 @@ CREATE TABLE IF NOT EXISTS problems (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Generated test suites, stored once per problem
+CREATE TABLE IF NOT EXISTS problem_tests (
+    problem_id UUID PRIMARY KEY REFERENCES problems(problem_id) ON DELETE CASCADE,
+    format_version INTEGER NOT NULL,
+    test_count INTEGER NOT NULL,
+    tests_hash VARCHAR(64) NOT NULL,
+    tests BYTEA NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Submissions table
 CREATE TABLE IF NOT EXISTS submissions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     problem_id UUID NOT NULL REFERENCES problems(problem_id) ON DELETE CASCADE,
     language VARCHAR(10) NOT NULL CHECK (language IN ('python', 'cpp')),
     code TEXT NOT NULL,
-    verdict VARCHAR(10) NOT NULL CHECK (verdict IN ('AC', 'WA', 'TLE', 'RE', 'CE')),
+    code_hash VARCHAR(64),
+    verdict VARCHAR(10) NOT NULL CHECK (verdict IN ('AC', 'WA', 'TLE', 'RE', 'CE', 'PENDING')),
     passed INTEGER NOT NULL DEFAULT 0,
     total INTEGER NOT NULL DEFAULT 0,
     runtime_ms INTEGER,
     memory_kb INTEGER,
     details JSONB,
+    idempotency_key VARCHAR(100),
+    claimed_at TIMESTAMP,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Columns added after the first release; CREATE TABLE IF NOT EXISTS leaves
+-- existing tables alone (the API applies the same statements at startup)
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64);
+UPDATE submissions SET code_hash = encode(sha256(convert_to(code, 'UTF8')), 'hex') WHERE code_hash IS NULL;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(100);
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP;
+
 -- Chat messages table (for coach conversations)
 CREATE TABLE IF NOT EXISTS chat_messages (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -60,6 +80,9 @@ CREATE INDEX IF NOT EXISTS idx_problems_difficulty ON problems(difficulty);
 CREATE INDEX IF NOT EXISTS idx_problems_template ON problems(template_slug);
 CREATE INDEX IF NOT EXISTS idx_submissions_problem ON submissions(problem_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_created ON submissions(created_at);
+CREATE INDEX IF NOT EXISTS idx_submissions_code ON submissions(problem_id, code_hash, created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_idempotency ON submissions(idempotency_key);
+CREATE INDEX IF NOT EXISTS idx_submissions_pending ON submissions(created_at, id) WHERE verdict = 'PENDING';
 CREATE INDEX IF NOT EXISTS idx_chat_problem ON chat_messages(problem_id);
 CREATE INDEX IF NOT EXISTS idx_feedback_submission ON feedback(submission_id);
 
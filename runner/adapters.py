@@ -0,0 +1,172 @@
+"""
+ListNode / TreeNode marshalling for the Python harnesses.
+
+Test cases describe linked lists and trees as plain arrays (LeetCode style).
+When a request carries a template signature, the harness converts the listed
+parameters into real nodes before the call and converts the return value
+back afterwards. All builders and serializers are iterative, so degenerate
+10^5-node inputs never touch the recursion limit.
+
+Signature format::
+
+    {
+        "params": {"head": "ListNode", "pos": "cycle@head",
+                   "root": "TreeNode", "p": "node@root"},
+        "returns": "ListNode" | "TreeNode" | "node_val"
+    }
+
+``cycle@X`` links the tail of list ``X`` to the node at that index (and is not
+passed to the user's function); ``node@X`` passes the node of tree ``X`` whose
+value matches.
+"""
+
+PYTHON_ADAPTERS = """
+from collections import deque
+from typing import List, Optional
+
+# Refuse to serialize structures larger than this (catches accidental cycles)
+_MAX_NODES = 2_000_000
+
+
+class ListNode:
+    def __init__(self, val=0, next=None):
+        self.val = val
+        self.next = next
+
+
+class TreeNode:
+    def __init__(self, val=0, left=None, right=None):
+        self.val = val
+        self.left = left
+        self.right = right
+
+
+def _build_list(values):
+    head = None
+    for value in reversed(values):
+        head = ListNode(value, head)
+    return head
+
+
+def _list_values(head):
+    values = []
+    node = head
+    while node is not None:
+        if len(values) >= _MAX_NODES:
+            raise ValueError("Returned linked list is too long (does it contain a cycle?)")
+        values.append(node.val)
+        node = node.next
+    return values
+
+
+def _link_cycle(head, pos):
+    if head is None or pos is None or pos < 0:
+        return
+    target = None
+    node = head
+    index = 0
+    while node.next is not None:
+        if index == pos:
+            target = node
+        node = node.next
+        index += 1
+    if index == pos:
+        target = node
+    node.next = target
+
+
+def _build_tree(values):
+    if not values or values[0] is None:
+        return None
+    root = TreeNode(values[0])
+    queue = deque([root])
+    i = 1
+    while queue and i < len(values):
+        node = queue.popleft()
+        if values[i] is not None:
+            node.left = TreeNode(values[i])
+            queue.append(node.left)
+        i += 1
+        if i < len(values) and values[i] is not None:
+            node.right = TreeNode(values[i])
+            queue.append(node.right)
+        i += 1
+    return root
+
+
+def _tree_values(root):
+    values = []
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        if node is None:
+            values.append(None)
+            continue
+        if len(values) >= _MAX_NODES:
+            raise ValueError("Returned tree is too large (does it contain a cycle?)")
+        values.append(node.val)
+        queue.append(node.left)
+        queue.append(node.right)
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+
+def _find_tree_node(root, value):
+    queue = deque([root] if root is not None else [])
+    while queue:
+        node = queue.popleft()
+        if node.val == value:
+            return node
+        if node.left is not None:
+            queue.append(node.left)
+        if node.right is not None:
+            queue.append(node.right)
+    return None
+
+
+def _marshal_args(test_input, signature):
+    if not signature or not isinstance(test_input, dict):
+        return test_input
+    params = signature.get("params", {})
+    args = dict(test_input)
+    # Structures first, then parameters that refer to them
+    for name, kind in params.items():
+        if name not in args:
+            continue
+        if kind == "ListNode":
+            args[name] = _build_list(args[name] or [])
+        elif kind == "TreeNode":
+            args[name] = _build_tree(args[name] or [])
+    for name, kind in params.items():
+        if name not in args or "@" not in kind:
+            continue
+        ref_kind, owner = kind.split("@", 1)
+        if ref_kind == "cycle":
+            _link_cycle(args[owner], args.pop(name))
+        elif ref_kind == "node":
+            args[name] = _find_tree_node(args[owner], args[name])
+    return args
+
+
+def _unmarshal_result(result, signature):
+    returns = (signature or {}).get("returns")
+    if returns == "ListNode":
+        return _list_values(result)
+    if returns == "TreeNode":
+        return _tree_values(result)
+    if returns == "node_val":
+        return None if result is None else result.val
+    return result
+
+
+def _user_namespace():
+    # LeetCode-style globals: node classes and common typing names
+    return {
+        "__name__": "__main__",
+        "ListNode": ListNode,
+        "TreeNode": TreeNode,
+        "Optional": Optional,
+        "List": List,
+    }
+"""
@@ -0,0 +1,211 @@
+"""
+Bounded process I/O for the code runner.
+
+User programs can print without limit, so their stdout/stderr are never
+buffered whole: each stream keeps only its first and last few KB. Python test
+results travel on a dedicated pipe instead of stdout, so user ``print()`` calls
+cannot corrupt them.
+"""
+
+import os
+import selectors
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Bytes kept from the start and the end of each captured stream
+OUTPUT_HEAD_BYTES = 4 * 1024
+OUTPUT_TAIL_BYTES = 4 * 1024
+
+# Hard cap for a reported result (result channel, or C++ stdout)
+RESULT_LIMIT_BYTES = 16 * 1024 * 1024
+
+# Environment variable telling the harness which fd is the result channel
+RESULT_FD_ENV = "LEETCOACH_RESULT_FD"
+
+_READ_CHUNK = 64 * 1024
+
+
+class CappedBuffer:
+    """Keeps the first ``head`` and the last ``tail`` bytes written to it."""
+
+    def __init__(self, head: int = OUTPUT_HEAD_BYTES, tail: int = OUTPUT_TAIL_BYTES):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_limit:
+            self.tail += data
+            if len(self.tail) > self.tail_limit:
+                del self.tail[:len(self.tail) - self.tail_limit]
+
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def getvalue(self) -> str:
+        text = self.head.decode('utf-8', errors='replace')
+        if self.omitted:
+            text += f"\n... [{self.omitted} bytes omitted] ...\n"
+        return text + self.tail.decode('utf-8', errors='replace')
+
+
+@dataclass
+class BoundedRun:
+    returncode: Optional[int]
+    stdout: CappedBuffer
+    stderr: CappedBuffer
+    result: bytes = b""
+    result_truncated: bool = False
+    timed_out: bool = False
+    elapsed_s: float = 0.0
+    max_rss_kb: int = 0
+    cpu_time_s: float = 0.0  # user + system CPU time of the child
+
+    @property
+    def result_text(self) -> str:
+        return self.result.decode('utf-8', errors='replace')
+
+
+@dataclass
+class _ResultSink:
+    limit: int
+    chunks: List[bytes] = field(default_factory=list)
+    size: int = 0
+    truncated: bool = False
+
+    def write(self, data: bytes) -> None:
+        if self.size + len(data) > self.limit:
+            self.truncated = True
+            return
+        self.chunks.append(data)
+        self.size += len(data)
+
+
+def run_bounded(
+    args: List[str],
+    input_data: bytes = b"",
+    timeout: float = 2.0,
+    result_channel: bool = False,
+    stdout_is_result: bool = False,
+    cwd: Optional[str] = None,
+    cpu: Optional[int] = None,
+) -> BoundedRun:
+    """Run a child with a wall-clock limit and capped capture of its output.
+
+    With ``result_channel`` the child gets a private pipe whose fd number is in
+    ``LEETCOACH_RESULT_FD``; everything written there is returned as ``result``.
+    With ``stdout_is_result`` stdout itself is the result (compiled programs).
+    Either way the result is capped at ``RESULT_LIMIT_BYTES``. ``cpu`` pins
+    the child to that core.
+    """
+    env = None
+    pass_fds: tuple = ()
+    result_r = result_w = None
+    if result_channel:
+        result_r, result_w = os.pipe()
+        env = dict(os.environ, **{RESULT_FD_ENV: str(result_w)})
+        pass_fds = (result_w,)
+
+    stdout = CappedBuffer()
+    stderr = CappedBuffer()
+    sink = _ResultSink(RESULT_LIMIT_BYTES)
+
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        pass_fds=pass_fds,
+        env=env,
+        cwd=cwd,
+        preexec_fn=(lambda: os.sched_setaffinity(0, {cpu})) if cpu is not None else None,
+    )
+    if result_w is not None:
+        os.close(result_w)
+
+    selector = selectors.DefaultSelector()
+    selector.register(proc.stdout, selectors.EVENT_READ, sink if stdout_is_result else stdout)
+    selector.register(proc.stderr, selectors.EVENT_READ, stderr)
+    if result_r is not None:
+        selector.register(result_r, selectors.EVENT_READ, sink)
+
+    pending = memoryview(input_data)
+    if pending:
+        os.set_blocking(proc.stdin.fileno(), False)
+        selector.register(proc.stdin, selectors.EVENT_WRITE, None)
+    else:
+        proc.stdin.close()
+
+    deadline = start + timeout
+    timed_out = False
+    status = rusage = None
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                if key.fileobj is proc.stdin:
+                    try:
+                        written = os.write(proc.stdin.fileno(), pending[:_READ_CHUNK])
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        written = len(pending)
+                    pending = pending[written:]
+                    if not pending:
+                        selector.unregister(proc.stdin)
+                        proc.stdin.close()
+                    continue
+
+                data = os.read(key.fd, _READ_CHUNK)
+                if data:
+                    key.data.write(data)
+                else:
+                    selector.unregister(key.fileobj)
+
+        # Reap the child ourselves (not via Popen.wait) to keep its rusage
+        while not timed_out:
+            pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            rusage = None
+            if time.monotonic() >= deadline:
+                timed_out = True
+            else:
+                time.sleep(0.001)
+    finally:
+        selector.close()
+        if rusage is None:
+            proc.kill()
+            _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        for stream in (proc.stdin, proc.stdout, proc.stderr):
+            if not stream.closed:
+                stream.close()
+        if result_r is not None:
+            os.close(result_r)
+
+    return BoundedRun(
+        returncode=None if timed_out else proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        result=b"".join(sink.chunks),
+        result_truncated=sink.truncated,
+        timed_out=timed_out,
+        elapsed_s=time.monotonic() - start,
+        max_rss_kb=rusage.ru_maxrss,
+        cpu_time_s=rusage.ru_utime + rusage.ru_stime,
+    )
@@ -0,0 +1,166 @@
+"""
+Tiered C++ compilation with a binary cache.
+
+Interactive runs compile with the fast tier (little or no optimisation, so the
+compiler returns quickly); graded submissions use the optimized tier. Binaries
+are kept per (program source, flags) in a bounded LRU, and a fast-tier request
+reuses an optimized binary of the same program when one is already cached.
+
+At warm-up the headers used by the generated programs are precompiled once per
+tier; later builds force-include them, and GCC falls back to parsing the
+headers whenever a precompiled one does not match.
+"""
+
+import hashlib
+import os
+import shlex
+import subprocess
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+FAST_TIER = "fast"
+OPTIMIZED_TIER = "optimized"
+
+# Optimisation flags per tier (configurable per deployment)
+COMPILE_TIERS: Dict[str, List[str]] = {
+    FAST_TIER: shlex.split(os.environ.get("CPP_FAST_TIER_FLAGS", "-O0")),
+    OPTIMIZED_TIER: shlex.split(os.environ.get("CPP_OPTIMIZED_TIER_FLAGS", "-O2")),
+}
+
+CPP_BINARY_CACHE_SIZE = int(os.environ.get("CPP_BINARY_CACHE_SIZE", "64"))
+
+COMPILE_TIMEOUT_S = 10
+
+# Standard headers precompiled at warm-up (union of the generated programs' includes)
+PCH_HEADERS = [
+    "algorithm", "climits", "deque", "iostream", "map", "queue", "set", "sstream",
+    "stack", "string", "unordered_map", "unordered_set", "vector",
+]
+
+
+@dataclass
+class CompiledProgram:
+    ok: bool
+    tier: str  # tier of the binary actually used
+    binary: str = ""
+    stderr: str = ""
+    cached: bool = False
+
+
+def _binary_key(source: str, tier: str) -> str:
+    flags = ' '.join(COMPILE_TIERS[tier])
+    return hashlib.sha256(f"{flags}\0{source}".encode()).hexdigest()
+
+
+class BinaryCache:
+    """Bounded LRU of compiled binaries on local disk."""
+
+    def __init__(self, max_entries: int = CPP_BINARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._dir: Optional[str] = None
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.optimized_reuses = 0
+        self._pch: Dict[str, str] = {}  # tier -> header with a valid .gch next to it
+
+    def _path(self, key: str) -> str:
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="leetcoach_bin_")
+        return os.path.join(self._dir, key)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        path = self._entries.get(key)
+        if path is None:
+            return None
+        if not os.path.exists(path):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return path
+
+    def _store(self, key: str, path: str) -> None:
+        self._entries[key] = path
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            if os.path.exists(evicted):
+                os.unlink(evicted)
+
+    def compile(self, source_file: str, source: str, tier: str) -> CompiledProgram:
+        """Compile ``source`` (already written to ``source_file``) for ``tier``."""
+        if tier not in COMPILE_TIERS:
+            tier = OPTIMIZED_TIER
+
+        # Prefer an already optimized binary; it is never worse than the fast tier
+        candidates = [OPTIMIZED_TIER] if tier == OPTIMIZED_TIER else [OPTIMIZED_TIER, FAST_TIER]
+        for candidate in candidates:
+            binary = self._lookup(_binary_key(source, candidate))
+            if binary is not None:
+                self.hits += 1
+                if candidate != tier:
+                    self.optimized_reuses += 1
+                return CompiledProgram(ok=True, tier=candidate, binary=binary, cached=True)
+        self.misses += 1
+
+        key = _binary_key(source, tier)
+        binary = self._path(key)
+        partial = f"{binary}.{os.getpid()}.tmp"
+        result = subprocess.run(
+            ['g++', *COMPILE_TIERS[tier], '-std=c++17', *self._pch_args(tier), '-o', partial, source_file],
+            capture_output=True,
+            text=True,
+            timeout=COMPILE_TIMEOUT_S
+        )
+        if result.returncode != 0:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            return CompiledProgram(ok=False, tier=tier, stderr=result.stderr)
+
+        os.replace(partial, binary)
+        if self.max_entries > 0:
+            self._store(key, binary)
+        return CompiledProgram(ok=True, tier=tier, binary=binary, stderr=result.stderr)
+
+    def _pch_args(self, tier: str) -> List[str]:
+        header = self._pch.get(tier)
+        return ['-include', header] if header else []
+
+    def warm_up(self) -> Dict[str, bool]:
+        """Precompile the common headers for every tier; returns which tiers succeeded."""
+        pch_root = tempfile.mkdtemp(prefix="leetcoach_pch_")
+        built = {}
+        for tier, flags in COMPILE_TIERS.items():
+            # One directory per tier: a header is only usable with the flags it was built with
+            header = os.path.join(pch_root, tier, "leetcoach_pch.h")
+            os.makedirs(os.path.dirname(header))
+            with open(header, 'w') as f:
+                f.write(''.join(f"#include <{name}>\n" for name in PCH_HEADERS))
+            try:
+                result = subprocess.run(
+                    ['g++', *flags, '-std=c++17', '-x', 'c++-header', '-o', f"{header}.gch", header],
+                    capture_output=True,
+                    timeout=COMPILE_TIMEOUT_S * 3
+                )
+                built[tier] = result.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                built[tier] = False
+            if built[tier]:
+                self._pch[tier] = header
+        return built
+
+    def release(self, program: CompiledProgram) -> None:
+        """Delete a binary that did not make it into the cache."""
+        if program.binary and program.binary not in self._entries.values() and os.path.exists(program.binary):
+            os.unlink(program.binary)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "optimized_reuses": self.optimized_reuses,
+            "precompiled_tiers": len(self._pch),
+        }
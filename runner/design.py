@@ -0,0 +1,166 @@
+"""
+Operation-sequence replay for design-style templates (MinStack, ...).
+
+A design test gives an ``operations`` array (the class name first, then method
+names) and an ``arguments`` array of per-operation argument lists. The user's
+class is instantiated once and every operation is replayed in the same child,
+so stress sequences of 10^5 operations cost one process start. Outputs are
+compared in bulk; the first mismatching operation is reported.
+
+The template signature carries the description::
+
+    {"design": {"class": "MinStack", "operations": "operations", "arguments": "values",
+                "constructor": [],
+                "methods": {"push": {"args": ["int"], "returns": "void"},
+                            "getMin": {"args": [], "returns": "int"}}}}
+"""
+
+import inspect
+from typing import Any, Dict, List
+
+# C++ types accepted for method arguments and return values
+_CPP_ARG_TYPES = {"int": "int", "long": "long long", "bool": "bool", "double": "double"}
+
+
+def first_mismatch(actual: Any, expected: Any) -> int:
+    """Index of the first operation whose output differs."""
+    if not isinstance(actual, list) or not isinstance(expected, list):
+        return 0
+    for index, (a, b) in enumerate(zip(actual, expected)):
+        if a != b:
+            return index
+    return min(len(actual), len(expected))
+
+
+# Injected into the Python harnesses: ``_design_entry`` returns a callable
+# taking the test input as keyword arguments and returning all outputs;
+# ``_first_mismatch`` is ``first_mismatch`` above, copied in from its source.
+PYTHON_DESIGN_REPLAY = """
+import itertools
+from typing import Any
+
+
+def _design_entry(user_globals, design):
+    cls = user_globals.get(design["class"])
+    if not isinstance(cls, type):
+        return None
+    operations_key = design.get("operations", "operations")
+    arguments_key = design.get("arguments", "values")
+
+    def _replay(**test_input):
+        operations = test_input[operations_key]
+        arguments = test_input[arguments_key]
+        instance = cls(*arguments[0])
+        outputs = [None]
+        methods = {}
+        for name, args in zip(itertools.islice(operations, 1, None), itertools.islice(arguments, 1, None)):
+            method = methods.get(name)
+            if method is None:
+                method = methods[name] = getattr(instance, name)
+            outputs.append(method(*args))
+        return outputs
+
+    return _replay
+
+
+""" + inspect.getsource(first_mismatch).replace("def first_mismatch(", "def _first_mismatch(", 1)
+
+
+def format_design_input(test_input: Dict[str, Any], design: Dict[str, Any]) -> str:
+    """One line per operation: ``<name> <args...>``, preceded by the count."""
+    operations = test_input[design.get("operations", "operations")]
+    arguments = test_input[design.get("arguments", "values")]
+    lines = [str(len(operations))]
+    for name, args in zip(operations, arguments):
+        lines.append(' '.join([name, *(_cpp_literal(arg) for arg in args)]))
+    return '\n'.join(lines) + '\n'
+
+
+def _cpp_literal(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+def parse_design_output(output: str) -> List[Any]:
+    """Parse the driver's one-value-per-line output."""
+    values: List[Any] = []
+    for line in output.splitlines():
+        token = line.strip()
+        if token == "null":
+            values.append(None)
+        elif token in ("true", "false"):
+            values.append(token == "true")
+        elif '.' in token:
+            values.append(float(token))
+        else:
+            values.append(int(token))
+    return values
+
+
+def _read_args(args: List[str], prefix: str) -> List[str]:
+    """C++ statements declaring and reading one variable per argument."""
+    statements = []
+    for i, arg_type in enumerate(args):
+        statements.append(f"{_CPP_ARG_TYPES.get(arg_type, 'int')} {prefix}{i}; cin >> {prefix}{i};")
+    return statements
+
+
+def cpp_design_program(code: str, design: Dict[str, Any]) -> str:
+    """A driver that replays the operation stream read from stdin."""
+    class_name = design["class"]
+    ctor_args = design.get("constructor", [])
+    branches = []
+    for name, spec in design.get("methods", {}).items():
+        args = spec.get("args", [])
+        call = f"obj->{name}({', '.join(f'a{i}' for i in range(len(args)))})"
+        returns = spec.get("returns", "void")
+        if returns == "void":
+            emit = f"{call}; out << \"null\\n\";"
+        elif returns == "bool":
+            emit = f"out << ({call} ? \"true\" : \"false\") << '\\n';"
+        else:
+            emit = f"out << {call} << '\\n';"
+        body = ' '.join(_read_args(args, "a") + [emit])
+        branches.append(f'        if (op == "{name}") {{ {body} continue; }}')
+
+    return f"""
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+#include <stack>
+#include <queue>
+#include <deque>
+#include <unordered_map>
+#include <unordered_set>
+#include <map>
+#include <set>
+#include <algorithm>
+#include <climits>
+using namespace std;
+
+{code}
+
+int main() {{
+    ios::sync_with_stdio(false);
+    cin.tie(nullptr);
+    int n;
+    if (!(cin >> n) || n <= 0) return 0;
+    ostringstream out;
+    string op;
+    cin >> op;
+    {' '.join(_read_args(ctor_args, "c"))}
+    {class_name}* obj = new {class_name}({', '.join(f'c{i}' for i in range(len(ctor_args)))});
+    out << "null\\n";
+    for (int i = 1; i < n; i++) {{
+        cin >> op;
+{chr(10).join(branches)}
+        cerr << "Unknown operation: " << op << endl;
+        return 1;
+    }}
+    cout << out.str();
+    delete obj;
+    return 0;
+}}
+"""
@@ -0,0 +1,191 @@
+"""
+Differential random testing against a reference solver.
+
+``POST /differential`` runs a submission and a trusted reference solution side
+by side on many small generated inputs inside a single child: both are loaded
+into separate namespaces, each input is marshalled afresh for each of them,
+and the first input where they disagree (or the submission raises) is
+reported. The child stops at its time budget and reports how many inputs it
+got through, so the stage costs a bounded amount of time per submission.
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from adapters import PYTHON_ADAPTERS
+from capture import run_bounded
+
+# Wall-clock budget of one differential run (seconds)
+DIFFERENTIAL_TIME_BUDGET_S = float(os.environ.get("DIFFERENTIAL_TIME_BUDGET_S", "3"))
+
+# Startup and reporting allowance on top of the budget before the child is killed
+_CHILD_SLACK_S = 2
+
+
+class DifferentialRequest(BaseModel):
+    language: str
+    code: str
+    reference_code: str  # trusted Python solution
+    inputs: List[Dict[str, Any]]
+    signature: Optional[Dict[str, Any]] = None
+    time_budget_s: float = DIFFERENTIAL_TIME_BUDGET_S
+
+
+class Disagreement(BaseModel):
+    index: int
+    input: Dict[str, Any]
+    expected_output: Any  # reference result
+    actual_output: Any = None
+    error_message: str = ""
+
+
+class DifferentialResponse(BaseModel):
+    total: int  # inputs offered
+    checked: int  # inputs both solutions were compared on
+    skipped: int = 0  # inputs the reference itself rejected
+    timed_out: bool = False  # budget ran out before all inputs were checked
+    disagreement: Optional[Disagreement] = None
+    error_message: str = ""  # the child failed before comparing anything
+
+
+# argv: <user code file> <reference code file> <budget seconds>; inputs on stdin
+PYTHON_DIFFERENTIAL_HARNESS = PYTHON_ADAPTERS + """
+import inspect
+import json
+import os
+import signal
+import sys
+import time
+
+result_channel = os.fdopen(int(os.environ.pop("LEETCOACH_RESULT_FD")), "w")
+user_path, reference_path = sys.argv[1], sys.argv[2]
+deadline = time.perf_counter() + float(sys.argv[3])
+payload = json.loads(sys.stdin.read())
+signature = payload.get("signature")
+
+
+def _report(data):
+    result_channel.write(json.dumps(data, default=repr))
+    result_channel.flush()
+
+
+def _load(path):
+    namespace = _user_namespace()
+    with open(path) as f:
+        exec(compile(f.read(), path, "exec"), namespace)
+    functions = [name for name, obj in namespace.items()
+                 if inspect.isfunction(obj) and not name.startswith('_')]
+    if not functions:
+        return None
+    function_names = [f for f in functions if f.lower() in ['twosum', 'solution', 'main']]
+    return namespace[function_names[0] if function_names else functions[0]]
+
+
+def _call(func, test_input):
+    args = _marshal_args(json.loads(json.dumps(test_input)), signature)
+    result = func(**args) if isinstance(args, dict) else func(args)
+    return _unmarshal_result(result, signature)
+
+
+def _same(a, b):
+    if a == b:
+        return True
+    if isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        try:
+            return sorted(a) == sorted(b)
+        except TypeError:
+            return False
+    return False
+
+
+class _BudgetExpired(BaseException):
+    pass
+
+
+def _expire(signum, frame):
+    raise _BudgetExpired()
+
+
+user_func = _load(user_path)
+reference_func = _load(reference_path)
+if user_func is None or reference_func is None:
+    _report({"error": "No function found"})
+    sys.exit(1)
+
+inputs = payload["inputs"]
+checked = skipped = 0
+timed_out = False
+disagreement = None
+signal.signal(signal.SIGALRM, _expire)
+signal.setitimer(signal.ITIMER_REAL, max(deadline - time.perf_counter(), 0.001))
+try:
+    for index, test_input in enumerate(inputs):
+        try:
+            expected = _call(reference_func, test_input)
+        except _BudgetExpired:
+            raise
+        except Exception:
+            skipped += 1
+            continue
+        try:
+            actual = _call(user_func, test_input)
+        except _BudgetExpired:
+            raise
+        except Exception as e:
+            disagreement = {"index": index, "input": test_input, "expected_output": expected,
+                            "error_message": f"{type(e).__name__}: {e}"}
+            break
+        checked += 1
+        if not _same(actual, expected):
+            disagreement = {"index": index, "input": test_input, "expected_output": expected,
+                            "actual_output": actual}
+            break
+except _BudgetExpired:
+    timed_out = True
+finally:
+    signal.setitimer(signal.ITIMER_REAL, 0)
+
+_report({"checked": checked, "skipped": skipped, "timed_out": timed_out, "disagreement": disagreement})
+"""
+
+
+def run_differential(request: DifferentialRequest) -> DifferentialResponse:
+    """Compare a Python submission with the reference on every input, within the budget."""
+    total = len(request.inputs)
+    paths = []
+    try:
+        for source in (request.code, request.reference_code):
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+                f.write(source)
+                paths.append(f.name)
+
+        run = run_bounded(
+            ['python3', '-c', PYTHON_DIFFERENTIAL_HARNESS, *paths, str(request.time_budget_s)],
+            input_data=json.dumps({"inputs": request.inputs, "signature": request.signature}).encode(),
+            timeout=request.time_budget_s + _CHILD_SLACK_S,
+            result_channel=True
+        )
+        if run.timed_out:
+            return DifferentialResponse(total=total, checked=0, timed_out=True)
+        try:
+            data = json.loads(run.result_text)
+        except json.JSONDecodeError:
+            return DifferentialResponse(total=total, checked=0, error_message=run.stderr.getvalue() or "No result")
+        if "error" in data:
+            return DifferentialResponse(total=total, checked=0, error_message=data["error"])
+
+        disagreement = data.get("disagreement")
+        return DifferentialResponse(
+            total=total,
+            checked=data["checked"],
+            skipped=data["skipped"],
+            timed_out=data["timed_out"],
+            disagreement=Disagreement(**disagreement) if disagreement else None
+        )
+    finally:
+        for path in paths:
+            os.unlink(path)
@@ -0,0 +1,144 @@
+"""
+Python test harness executed in a child process for every test.
+
+The test payload arrives on stdin as JSON and the verdict is written to the
+result channel (see ``capture.RESULT_FD_ENV``), leaving stdout and stderr
+entirely to the user's code.
+
+argv: <code file> <memory mode 0|1> <memory top N> <timing repeats> <op budget, 0 = off>
+
+With a positive repeat count (stable-timing mode) a passing call is followed
+by that many timed calls on freshly built arguments; their durations are
+reported as ``timings_ns``.
+
+Templates whose signature has a ``design`` entry replay an operation sequence
+on one instance of the user's class instead (see ``design``).
+"""
+
+from adapters import PYTHON_ADAPTERS
+from design import PYTHON_DESIGN_REPLAY
+from metering import PYTHON_OP_METER
+from profiling import PYTHON_MEMORY_TRACER
+
+PYTHON_TEST_HARNESS = """
+import gc
+import inspect
+import json
+import os
+import sys
+import time
+import traceback
+
+path = sys.argv[1]
+memory_mode = sys.argv[2] == "1"
+memory_top_n = int(sys.argv[3])
+timing_repeats = int(sys.argv[4])
+op_budget = int(sys.argv[5])
+result_channel = os.fdopen(int(os.environ.pop("LEETCOACH_RESULT_FD")), "w")
+
+
+def _report(payload):
+    result_channel.write(json.dumps(payload))
+    result_channel.flush()
+
+
+payload = json.loads(sys.stdin.read())
+test_input = payload["input"]
+expected = payload["expected_output"]
+signature = payload.get("signature")
+""" + PYTHON_ADAPTERS + PYTHON_DESIGN_REPLAY + PYTHON_MEMORY_TRACER + PYTHON_OP_METER + """
+
+# Load the user's code (compiled under its own filename so allocations can be attributed)
+user_globals = _user_namespace()
+with open(path) as f:
+    exec(compile(f.read(), path, "exec"), user_globals)
+
+try:
+    design = (signature or {}).get("design")
+    if design:
+        # Design template: one instance replays the whole operation sequence
+        main_func = _design_entry(user_globals, design)
+        if main_func is None:
+            _report({"status": "ERROR", "error": f"Class {design['class']} not found"})
+            sys.exit(1)
+    else:
+        # Find the main function (look for common function names first)
+        functions = [name for name, obj in user_globals.items()
+                     if inspect.isfunction(obj) and not name.startswith('_')]
+
+        if not functions:
+            _report({"status": "ERROR", "error": "No function found"})
+            sys.exit(1)
+
+        # Try to find a function that matches common patterns
+        function_names = [f for f in functions if f.lower() in ['twosum', 'solution', 'main']]
+        if function_names:
+            main_func = user_globals[function_names[0]]
+        else:
+            # Fall back to first function
+            main_func = user_globals[functions[0]]
+
+    # Call the function (ListNode/TreeNode parameters are built first)
+    call_args = _marshal_args(test_input, signature)
+    memory = None
+    meter = None
+    if memory_mode:
+        result, memory = _traced_call(main_func, call_args, path, memory_top_n)
+    elif op_budget:
+        result, meter = _metered_call(main_func, call_args, path, op_budget)
+    elif isinstance(call_args, dict):
+        result = main_func(**call_args)
+    else:
+        result = main_func(call_args)
+    result = _unmarshal_result(result, signature)
+
+    # Check result - handle different comparison cases
+    def deep_compare(a, b):
+        if design:
+            return a == b  # operation outputs are ordered
+        if isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                return False
+            if a == b:
+                return True
+            # For lists, check if they contain the same elements (order might matter)
+            try:
+                return sorted(a) == sorted(b)
+            except TypeError:
+                return False  # e.g. level-order trees with None gaps
+        return a == b
+
+    if deep_compare(result, expected):
+        # The verified call doubles as warm-up; arguments are rebuilt outside the timed section
+        timings = []
+        input_json = json.dumps(test_input)
+        for _ in range(timing_repeats):
+            call_args = _marshal_args(json.loads(input_json), signature)
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter_ns()
+            if isinstance(call_args, dict):
+                main_func(**call_args)
+            else:
+                main_func(call_args)
+            timings.append(time.perf_counter_ns() - start)
+            gc.enable()
+        _report({"status": "PASS", "result": result, "memory": memory, "meter": meter, "timings_ns": timings})
+    else:
+        failure = {"status": "FAIL", "result": result, "expected": expected, "memory": memory, "meter": meter}
+        if design:
+            failure["mismatch_index"] = _first_mismatch(result, expected)
+        _report(failure)
+
+except _OpBudgetExceeded as e:
+    _report({"status": "ERROR", "error": "Operation budget exceeded", "meter": e.meter})
+
+except Exception as e:
+    _report({
+        "status": "ERROR",
+        "error": str(e),
+        "exception": type(e).__name__,
+        "traceback": traceback.format_exc(),
+        "memory": _traced_memory
+    })
+"""
@@ -0,0 +1,104 @@
+"""
+Readiness and graceful drain for the code runner.
+
+The runner reports ``starting`` on ``/health`` until warm-up has finished. On
+SIGTERM it stops admitting jobs (they get a 503 and ``/health`` reports
+``draining``), waits up to ``DRAIN_TIMEOUT_S`` for running jobs and their
+children, then hands the signal to the server so it shuts down. A second
+SIGTERM skips the wait.
+
+The API is built from its own tree and keeps a smaller variant without the
+warm-up state.
+"""
+
+import asyncio
+import os
+import signal
+import threading
+from typing import Any, Iterable, Optional
+
+DRAIN_TIMEOUT_S = float(os.environ.get("DRAIN_TIMEOUT_S", "30"))
+
+STARTING = "starting"
+READY = "ready"
+DRAINING = "draining"
+
+
+class Lifecycle:
+    """Admission control for job endpoints plus the ready/draining state."""
+
+    def __init__(self, job_paths: Iterable[str], drain_timeout_s: float = DRAIN_TIMEOUT_S):
+        self.job_paths = tuple(job_paths)
+        self.drain_timeout_s = drain_timeout_s
+        self.state = STARTING
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._previous_handler: Any = None
+        self._drain_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def is_job(self, path: str) -> bool:
+        return path.startswith(self.job_paths)
+
+    def mark_ready(self) -> None:
+        if self.state == STARTING:
+            self.state = READY
+
+    def admit(self) -> bool:
+        """Count a new job in, or refuse it while draining."""
+        if self.state == DRAINING:
+            return False
+        self.in_flight += 1
+        self._idle.clear()
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def drain(self) -> bool:
+        """Stop admitting jobs and wait for running ones; False if the deadline passed."""
+        self.state = DRAINING
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.drain_timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def install_sigterm(self) -> None:
+        """Drain on SIGTERM, then pass the signal on to the previous handler."""
+        if threading.current_thread() is not threading.main_thread():
+            return  # signal handlers can only be set from the main thread (e.g. not under test clients)
+        loop = asyncio.get_running_loop()
+        self._previous_handler = signal.getsignal(signal.SIGTERM)
+
+        def _on_sigterm(signum, frame):
+            if self.state == DRAINING:
+                self._exit(signum, frame)
+                return
+            self.state = DRAINING
+            loop.call_soon_threadsafe(self._start_drain, signum)
+
+        signal.signal(signal.SIGTERM, _on_sigterm)
+
+    def _start_drain(self, signum: int) -> None:
+        self._drain_task = asyncio.ensure_future(self._drain_then_exit(signum))
+
+    async def _drain_then_exit(self, signum: int) -> None:
+        await self.drain()
+        self._exit(signum, None)
+
+    def _exit(self, signum: int, frame: Any) -> None:
+        if callable(self._previous_handler):
+            self._previous_handler(signum, frame)
+        else:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    def stats(self) -> dict:
+        return {"state": self.state, "in_flight": self.in_flight}
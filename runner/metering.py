@@ -0,0 +1,126 @@
+"""
+Deterministic operation-count metering for Python submissions.
+
+With an ``op_budget`` on ``/execute`` each call is metered instead of being
+judged by wall clock alone. On Python 3.12+ ``sys.monitoring`` counts line
+events in the user's file, which gives the same number on any runner node;
+a line outside that file returns ``DISABLE``, which turns off monitoring of
+that line only, so library code costs one callback per line it runs at most.
+
+Older interpreters fall back to an estimate: the CPU time of the call
+converted to line events with a rate calibrated per test. The estimate is
+far off for short calls (fixed overheads dominate), so it is reported but
+the budget is not enforced on it; the wall-clock limit applies as usual.
+"""
+
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+# Wall-clock limit multiplier while metering (the budget is the real limit)
+METER_TIME_FACTOR = int(os.environ.get("METER_TIME_FACTOR", "5"))
+
+# Whether budgets are enforced, i.e. line events can be counted (the harness
+# runs under the same interpreter as the runner)
+EXACT_METERING = sys.version_info >= (3, 12)
+
+
+class MeterReport(BaseModel):
+    method: str  # line_events (exact) or estimated_cpu (fallback)
+    estimated: bool = False  # counts are estimates and the budget was not enforced
+    budget: int
+    total_ops: int
+    max_test_ops: int
+    max_test_index: Optional[int] = None
+
+
+def summarize_meter(budget: int, meters: List[Optional[Dict[str, Any]]]) -> Optional[MeterReport]:
+    """Combine per-test meters (None where a test produced none)."""
+    measured = [(i, meter) for i, meter in enumerate(meters) if meter]
+    if not measured:
+        return None
+    max_index, max_meter = max(measured, key=lambda item: item[1]["ops"])
+    method = measured[0][1]["method"]
+    return MeterReport(
+        method=method,
+        estimated=method != "line_events",
+        budget=budget,
+        total_ops=sum(meter["ops"] for _, meter in measured),
+        max_test_ops=max_meter["ops"],
+        max_test_index=max_index
+    )
+
+
+# Injected into the per-test Python harness. ``_metered_call`` returns
+# (result, meter) or raises ``_OpBudgetExceeded`` carrying the meter; only
+# exact line-event meters raise it.
+PYTHON_OP_METER = """
+import time
+
+
+class _OpBudgetExceeded(BaseException):
+    # BaseException so user code catching Exception cannot swallow it
+    def __init__(self, meter):
+        super().__init__("Operation budget exceeded")
+        self.meter = meter
+
+
+def _call(func, args):
+    if isinstance(args, dict):
+        return func(**args)
+    return func(args)
+
+
+def _metered_call(func, args, path, budget):
+    monitoring = getattr(sys, "monitoring", None)
+    if monitoring is None:
+        return _estimated_call(func, args)
+
+    tool = monitoring.PROFILER_ID
+    line_event = monitoring.events.LINE
+    disable = monitoring.DISABLE
+    count = 0
+
+    def _on_line(code, line):
+        nonlocal count
+        if code.co_filename != path:
+            return disable
+        count += 1
+        if count > budget:
+            raise _OpBudgetExceeded({"method": "line_events", "ops": count})
+
+    monitoring.use_tool_id(tool, "leetcoach-meter")
+    monitoring.register_callback(tool, line_event, _on_line)
+    monitoring.set_events(tool, line_event)
+    try:
+        result = _call(func, args)
+    finally:
+        monitoring.set_events(tool, 0)
+        monitoring.register_callback(tool, line_event, None)
+        monitoring.free_tool_id(tool)
+    return result, {"method": "line_events", "ops": count}
+
+
+def _calibrate_line_rate():
+    # Line events per CPU second for a plain loop (two lines per iteration);
+    # best of three so a preempted round does not skew the rate
+    iterations = 100000
+    best = 1e-6
+    for _ in range(3):
+        start = time.process_time()
+        i = 0
+        while i < iterations:
+            i += 1
+        best = max(best, 2 * iterations / max(time.process_time() - start, 1e-6))
+    return best
+
+
+def _estimated_call(func, args):
+    # Reported only: a CPU-time estimate is not precise enough to fail a test on
+    rate = _calibrate_line_rate()
+    start = time.process_time()
+    result = _call(func, args)
+    return result, {"method": "estimated_cpu", "ops": int((time.process_time() - start) * rate)}
+"""
@@ -0,0 +1,80 @@
+"""
+Compact test results for ``/execute`` responses.
+
+By default a test result refers to its test by index and carries truncated
+JSON previews of the input, expected and actual values instead of the values
+themselves, so a failing 10^5-element test does not turn into a multi-megabyte
+response (and database row). For list outputs the first differing index is
+reported with a few elements of context on each side. Requests with
+``full_values`` get the complete values as well.
+"""
+
+import json
+import os
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+
+from design import first_mismatch
+
+# Characters of JSON kept per preview
+PREVIEW_CHARS = int(os.environ.get("RESULT_PREVIEW_CHARS", "200"))
+
+# Elements shown on each side of the first mismatch
+MISMATCH_CONTEXT = 3
+
+_encoder = json.JSONEncoder(default=repr)
+
+
+class Mismatch(BaseModel):
+    index: int  # first position where actual and expected differ
+    expected_length: int
+    actual_length: int
+    window_start: int
+    expected_window: List[Any]
+    actual_window: List[Any]
+
+
+def preview(value: Any, limit: int = PREVIEW_CHARS) -> str:
+    """JSON of ``value`` cut at ``limit`` characters, encoding no more than needed."""
+    parts = []
+    size = 0
+    for chunk in _encoder.iterencode(value):
+        parts.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return ''.join(parts)[:limit] + '...'
+    return ''.join(parts)
+
+
+def locate_mismatch(actual: Any, expected: Any) -> Optional[Mismatch]:
+    """First differing index of two lists with context; None for non-lists or equal lists."""
+    if not isinstance(actual, list) or not isinstance(expected, list) or actual == expected:
+        return None
+    index = first_mismatch(actual, expected)
+    start = max(0, index - MISMATCH_CONTEXT)
+    end = index + MISMATCH_CONTEXT + 1
+    return Mismatch(
+        index=index,
+        expected_length=len(expected),
+        actual_length=len(actual),
+        window_start=start,
+        expected_window=expected[start:end],
+        actual_window=actual[start:end]
+    )
+
+
+def compact_results(test_results: List[Any], full_values: bool = False) -> None:
+    """Index, preview and locate mismatches in place; drop full values unless asked for."""
+    for index, test_result in enumerate(test_results):
+        test_result.index = index
+        test_result.input_preview = preview(test_result.input)
+        test_result.expected_preview = preview(test_result.expected_output)
+        if test_result.status != "ERROR":
+            test_result.actual_preview = preview(test_result.actual_output)
+        if test_result.status == "FAIL":
+            test_result.mismatch = locate_mismatch(test_result.actual_output, test_result.expected_output)
+        if not full_values:
+            test_result.input = None
+            test_result.expected_output = None
+            test_result.actual_output = None
@@ -0,0 +1,424 @@
+"""
+On-demand profiling for the code runner.
+
+CPU profiling is opt-in (``profile=true`` on ``/execute``) and always happens in
+a separate child after the normal test pass, so it never skews reported
+runtimes. Memory analysis (``memory_profile=true``) traces each Python test
+with tracemalloc inside its own child.
+"""
+
+import json
+import os
+import re
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from adapters import PYTHON_ADAPTERS
+from capture import run_bounded
+from design import PYTHON_DESIGN_REPLAY
+
+# Number of hot spots reported per category
+PROFILE_TOP_N = 10
+
+# Sampling interval for the Python line sampler (seconds of CPU time)
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+# Number of allocation sites reported per test in memory mode
+MEMORY_TOP_N = 5
+
+
+class ProfileEntry(BaseModel):
+    function: str
+    filename: str = ""
+    line: int = 0
+    calls: int = 0
+    self_ms: float = 0.0
+    cumulative_ms: float = 0.0
+
+
+class ProfileLine(BaseModel):
+    line: int
+    samples: int
+    percent: float
+    source: str = ""
+
+
+class ProfileReport(BaseModel):
+    tool: str  # cProfile, gprof
+    test_index: int
+    timed_out: bool = False
+    error_message: str = ""
+    functions: List[ProfileEntry] = []
+    lines: List[ProfileLine] = []
+
+
+class MemorySite(BaseModel):
+    line: int
+    size_kb: float
+    count: int
+    source: str = ""
+
+
+class MemoryReport(BaseModel):
+    peak_kb: float
+    top_sites: List[MemorySite] = []
+
+
+# Injected into the per-test Python harness in memory mode. The peak is exact
+# (tracemalloc tracks it continuously); allocation sites are taken from a
+# snapshot at the moment the entry point returns, while its locals are still
+# alive, and are restricted to lines of the user's file. A call that raises
+# leaves its report in ``_traced_memory`` for the error path.
+PYTHON_MEMORY_TRACER = """
+import tracemalloc
+
+_traced_memory = None
+
+
+def _traced_call(func, args, path, top_n):
+    global _traced_memory
+    target = func.__code__
+    depth = 0
+    snapshot = None
+
+    def _on_event(frame, event, arg):
+        nonlocal depth, snapshot
+        if frame.f_code is not target:
+            return
+        if event == 'call':
+            depth += 1
+        elif event == 'return':
+            depth -= 1
+            if depth == 0:
+                snapshot = tracemalloc.take_snapshot()
+
+    tracemalloc.start()
+    sys.setprofile(_on_event)
+    try:
+        if isinstance(args, dict):
+            result = func(**args)
+        else:
+            result = func(args)
+    finally:
+        sys.setprofile(None)
+        _, peak = tracemalloc.get_traced_memory()
+        if snapshot is None:
+            snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        _traced_memory = _memory_report(snapshot, peak, path, top_n)
+    return result, _traced_memory
+
+
+def _memory_report(snapshot, peak, path, top_n):
+    with open(path) as f:
+        source_lines = f.read().splitlines()
+    stats = snapshot.filter_traces([tracemalloc.Filter(True, path)]).statistics('lineno')
+    sites = []
+    for stat in stats[:top_n]:
+        line = stat.traceback[0].lineno
+        sites.append({
+            "line": line,
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+            "source": source_lines[line - 1].strip() if 0 < line <= len(source_lines) else "",
+        })
+    return {"peak_kb": round(peak / 1024, 1), "top_sites": sites}
+"""
+
+
+# Python profiling harness. The user's code is compiled with its real filename
+# so cProfile entries and line samples can be attributed back to it. The test
+# input (and its signature) arrives on stdin, the report goes to the result
+# channel.
+PYTHON_PROFILE_HARNESS = PYTHON_ADAPTERS + PYTHON_DESIGN_REPLAY + """
+import collections
+import cProfile
+import inspect
+import json
+import os
+import pstats
+import signal
+import sys
+
+result_channel = os.fdopen(int(os.environ.pop("LEETCOACH_RESULT_FD")), "w")
+path = sys.argv[1]
+budget = float(sys.argv[2])
+sample_interval = float(sys.argv[3])
+top_n = int(sys.argv[4])
+payload = json.loads(sys.stdin.read())
+test_input = _marshal_args(payload["input"], payload.get("signature"))
+
+with open(path) as f:
+    source_lines = f.read().splitlines()
+
+user_globals = _user_namespace()
+exec(compile("\\n".join(source_lines), path, "exec"), user_globals)
+
+design = (payload.get("signature") or {}).get("design")
+if design:
+    main_func = _design_entry(user_globals, design)
+    if main_func is None:
+        result_channel.write(json.dumps({"error": f"Class {design['class']} not found"}))
+        sys.exit(1)
+else:
+    functions = [name for name, obj in user_globals.items()
+                 if inspect.isfunction(obj) and not name.startswith('_')]
+    if not functions:
+        result_channel.write(json.dumps({"error": "No function found"}))
+        sys.exit(1)
+    function_names = [f for f in functions if f.lower() in ['twosum', 'solution', 'main']]
+    main_func = user_globals[function_names[0] if function_names else functions[0]]
+
+line_hits = collections.Counter()
+
+
+def _sample(signum, frame):
+    while frame is not None:
+        if frame.f_code.co_filename == path:
+            line_hits[frame.f_lineno] += 1
+            return
+        frame = frame.f_back
+
+
+class _BudgetExpired(BaseException):
+    pass
+
+
+def _expire(signum, frame):
+    raise _BudgetExpired()
+
+
+signal.signal(signal.SIGPROF, _sample)
+signal.signal(signal.SIGALRM, _expire)
+
+profiler = cProfile.Profile()
+timed_out = False
+error = ""
+signal.setitimer(signal.ITIMER_PROF, sample_interval, sample_interval)
+signal.setitimer(signal.ITIMER_REAL, budget)
+profiler.enable()
+try:
+    if isinstance(test_input, dict):
+        main_func(**test_input)
+    else:
+        main_func(test_input)
+except _BudgetExpired:
+    timed_out = True
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+finally:
+    profiler.disable()
+    signal.setitimer(signal.ITIMER_REAL, 0)
+    signal.setitimer(signal.ITIMER_PROF, 0)
+
+# Keep user functions plus anything they call directly (builtins such as
+# list.index or sorted are often the real hot spot).
+entries = []
+for (filename, line, name), (cc, nc, tt, ct, callers) in pstats.Stats(profiler).stats.items():
+    if filename == "<string>":
+        continue  # the harness itself (sampler, budget handler)
+    if filename != path and not any(caller[0] == path for caller in callers):
+        continue
+    entries.append({
+        "function": name,
+        "filename": "<user code>" if filename == path else filename,
+        "line": line,
+        "calls": nc,
+        "self_ms": round(tt * 1000, 3),
+        "cumulative_ms": round(ct * 1000, 3),
+    })
+entries.sort(key=lambda e: e["cumulative_ms"], reverse=True)
+
+total_samples = sum(line_hits.values()) or 1
+lines = [
+    {
+        "line": line,
+        "samples": count,
+        "percent": round(100.0 * count / total_samples, 1),
+        "source": source_lines[line - 1].strip() if 0 < line <= len(source_lines) else "",
+    }
+    for line, count in line_hits.most_common(top_n)
+]
+
+result_channel.write(json.dumps({
+    "timed_out": timed_out,
+    "error": error,
+    "functions": entries[:top_n],
+    "lines": lines,
+}))
+result_channel.flush()
+"""
+
+
+# Linked into the gprof build only: a SIGALRM handler that exits normally so
+# gmon.out is still written when the program runs past its budget.
+CPP_PROFILE_GUARD = """
+#include <csignal>
+#include <cstdlib>
+#include <unistd.h>
+
+static void leetcoach_profile_expire(int) { std::exit(124); }
+
+static struct LeetcoachProfileGuard {
+    LeetcoachProfileGuard() {
+        std::signal(SIGALRM, leetcoach_profile_expire);
+        alarm(LEETCOACH_PROFILE_BUDGET);
+    }
+} leetcoach_profile_guard;
+"""
+
+# Primary line of a gprof call-graph entry:
+#   [2]    100.0    0.00    0.05       1         main [2]
+_GPROF_PRIMARY = re.compile(
+    r"^\[(\d+)\]\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+(?:([\d+/]+)\s+)?(.+?)\s+\[\d+\]$"
+)
+
+# Runtime and libc frames that carry no information for the user
+_GPROF_IGNORED = ("main", "frame_dummy", "__libc_csu_init", "_GLOBAL__sub_I", "__static_initialization")
+
+
+def select_slowest_test(runtimes: List[int]) -> Optional[int]:
+    """Index of the slowest test, or None if nothing ran."""
+    if not runtimes:
+        return None
+    return max(range(len(runtimes)), key=lambda i: runtimes[i])
+
+
+def profile_python(
+    code_file: str,
+    test_input: Any,
+    test_index: int,
+    budget_s: float,
+    signature: Optional[Dict[str, Any]] = None
+) -> ProfileReport:
+    """Re-run one test under cProfile plus a SIGPROF line sampler."""
+    run = run_bounded(
+        [
+            'python3', '-c', PYTHON_PROFILE_HARNESS,
+            code_file, str(budget_s), str(PROFILE_SAMPLE_INTERVAL), str(PROFILE_TOP_N),
+        ],
+        input_data=json.dumps({"input": test_input, "signature": signature}).encode(),
+        timeout=budget_s + 5,
+        result_channel=True
+    )
+    if run.timed_out:
+        return ProfileReport(
+            tool="cProfile",
+            test_index=test_index,
+            timed_out=True,
+            error_message="Profiler did not finish"
+        )
+
+    try:
+        data = json.loads(run.result_text)
+    except json.JSONDecodeError:
+        return ProfileReport(
+            tool="cProfile",
+            test_index=test_index,
+            error_message=run.stderr.getvalue() or "Invalid profiler output"
+        )
+
+    return ProfileReport(
+        tool="cProfile",
+        test_index=test_index,
+        timed_out=data.get("timed_out", False),
+        error_message=data.get("error", ""),
+        functions=[ProfileEntry(**entry) for entry in data.get("functions", [])],
+        lines=[ProfileLine(**line) for line in data.get("lines", [])]
+    )
+
+
+def parse_gprof_call_graph(output: str) -> List[ProfileEntry]:
+    """Extract per-function inclusive times from ``gprof -q -b`` output."""
+    entries = []
+    for raw in output.splitlines():
+        match = _GPROF_PRIMARY.match(raw.strip())
+        if not match:
+            continue
+        _, _, self_s, children_s, called, name = match.groups()
+        if name.startswith(_GPROF_IGNORED):
+            continue
+        calls = 0
+        if called:
+            calls = int(called.split('+')[0].split('/')[0])
+        entries.append(ProfileEntry(
+            function=name,
+            calls=calls,
+            self_ms=round(float(self_s) * 1000, 3),
+            cumulative_ms=round((float(self_s) + float(children_s)) * 1000, 3)
+        ))
+    entries.sort(key=lambda e: e.cumulative_ms, reverse=True)
+    return entries[:PROFILE_TOP_N]
+
+
+def profile_cpp(cpp_file: str, input_str: str, test_index: int, budget_s: float) -> ProfileReport:
+    """Rebuild with ``-pg``, re-run one test and summarise the gprof call graph."""
+    work_dir = tempfile.mkdtemp(prefix="leetcoach_prof_")
+    binary = os.path.join(work_dir, "prog")
+    guard_file = os.path.join(work_dir, "guard.cpp")
+    try:
+        with open(guard_file, 'w') as f:
+            f.write(CPP_PROFILE_GUARD)
+
+        compile_result = subprocess.run(
+            [
+                # -no-pie for correct gprof symbolisation, -fno-inline keeps the
+                # user's methods visible as their own frames
+                'g++', '-O2', '-std=c++17', '-pg', '-no-pie', '-fno-inline', '-fno-omit-frame-pointer',
+                f'-DLEETCOACH_PROFILE_BUDGET={max(1, int(budget_s))}',
+                '-o', binary, cpp_file, guard_file,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=20
+        )
+        if compile_result.returncode != 0:
+            return ProfileReport(
+                tool="gprof",
+                test_index=test_index,
+                error_message=compile_result.stderr[-2000:]
+            )
+
+        run = run_bounded(
+            [binary],
+            input_data=input_str.encode(),
+            timeout=budget_s + 5,
+            stdout_is_result=True,
+            cwd=work_dir
+        )
+        timed_out = run.timed_out or run.returncode == 124
+
+        gmon = os.path.join(work_dir, "gmon.out")
+        if not os.path.exists(gmon):
+            return ProfileReport(
+                tool="gprof",
+                test_index=test_index,
+                timed_out=timed_out,
+                error_message="No profile data was written"
+            )
+
+        gprof_result = subprocess.run(
+            ['gprof', '-b', '-q', binary, gmon],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        return ProfileReport(
+            tool="gprof",
+            test_index=test_index,
+            timed_out=timed_out,
+            functions=parse_gprof_call_graph(gprof_result.stdout)
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return ProfileReport(
+            tool="gprof",
+            test_index=test_index,
+            error_message=f"Profiling failed: {e}"
+        )
+    finally:
+        for name in os.listdir(work_dir):
+            os.unlink(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
@@ -0,0 +1,184 @@
+"""
+Execution result cache for the code runner.
+
+Repeated Run/Submit clicks with the same code (modulo whitespace and comments)
+against the same tests are answered from memory. Entries are keyed by
+language, a normalized code hash, the test-set hash and the execution limits,
+expire after a TTL and are evicted least-recently-used first, within both an
+entry and a byte bound.
+
+Responses that carry the program's own output (compiler messages, stderr,
+error messages) mention line numbers of the exact source, so they are keyed
+by the exact code instead and only served to byte-identical resubmissions.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "512"))
+RESULT_CACHE_TTL_S = float(os.environ.get("RESULT_CACHE_TTL_S", "600"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Verdicts that do not depend on machine load. RUNTIME_ERROR is only cached
+# when every error was an exception raised by the code (see ``is_cacheable``):
+# crashes, signals, OOM kills and resource limits can be transient.
+DETERMINISTIC_VERDICTS = {"ACCEPTED", "WRONG_ANSWER", "COMPILE_ERROR"}
+
+# Per-test error messages caused by limits rather than by the code itself
+_NONDETERMINISTIC_ERRORS = ("Time limit exceeded",)
+
+# C/C++ comments and string/char literals (literals are matched so comment
+# markers inside them are left alone)
+_CPP_TOKENS = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'',
+    re.DOTALL
+)
+
+
+def _normalize_python(code: str) -> str:
+    """AST dump without positions: whitespace and comments do not matter."""
+    try:
+        return ast.dump(ast.parse(code))
+    except (SyntaxError, ValueError):
+        return code
+
+
+def _normalize_cpp(code: str) -> str:
+    """Strip comments and redundant whitespace while keeping line structure."""
+    def _replace(match: "re.Match[str]") -> str:
+        token = match.group(0)
+        if token.startswith('/'):
+            return ' '
+        return token
+
+    code = _CPP_TOKENS.sub(_replace, code)
+    lines = (' '.join(line.split()) for line in code.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def normalized_code_hash(language: str, code: str) -> str:
+    normalized = _normalize_python(code) if language == "python" else _normalize_cpp(code)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def test_set_hash(test_cases: List[Dict[str, Any]]) -> str:
+    """Content address of a test set (matches hashes used by the test-set store)."""
+    canonical = json.dumps(test_cases, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def make_cache_key(
+    language: str,
+    code: str,
+    tests_hash: str,
+    limits: Tuple[Any, ...],
+    exact: bool = False
+) -> str:
+    """Key by normalized code, or with ``exact`` by the code as written."""
+    code_hash = hashlib.sha256(code.encode()).hexdigest() if exact else normalized_code_hash(language, code)
+    parts = [language, "exact" if exact else "normalized", code_hash, tests_hash, repr(limits)]
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+
+def is_cacheable(response: Dict[str, Any], exception_errors_only: bool = False) -> bool:
+    """Only verdicts that would come out the same on any runner are cached.
+
+    ``exception_errors_only`` says every errored test ended with an exception
+    reported by the harness, which makes a RUNTIME_ERROR cacheable.
+    """
+    verdict = response.get("verdict")
+    if verdict not in DETERMINISTIC_VERDICTS and not (verdict == "RUNTIME_ERROR" and exception_errors_only):
+        return False
+    return not any(
+        tr.get("error_message", "").startswith(_NONDETERMINISTIC_ERRORS)
+        for tr in response.get("test_results", [])
+    )
+
+
+def depends_on_layout(response: Dict[str, Any]) -> bool:
+    """Whether the response quotes the program's output, which carries source line numbers."""
+    return bool(
+        response.get("compilation_output")
+        or response.get("runtime_output")
+        or any(tr.get("error_message") for tr in response.get("test_results", []))
+    )
+
+
+def _size(response: Dict[str, Any]) -> int:
+    return len(json.dumps(response, separators=(',', ':'), default=str))
+
+
+class ResultCache:
+    """Bounded TTL + LRU map from cache key to a serialized ExecutionResponse.
+
+    Both the number of entries and their total serialized size are bounded;
+    a response larger than the whole byte budget (e.g. a full_values run over
+    a big test set) is not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_SIZE,
+        ttl_s: float = RESULT_CACHE_TTL_S,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, *keys: str) -> Optional[Dict[str, Any]]:
+        """Response under the first of ``keys`` holding a live entry (one lookup in the stats)."""
+        now = time.monotonic()
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry[0] < now:
+                self._remove(key)
+                continue
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        size = _size(response)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_s, size, response)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
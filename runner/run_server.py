@@ -4,32 +4,99 @@ Code execution server - sandboxed code runner
 
 import asyncio
 import json
+import re
 import subprocess
 import tempfile
 import os
-import time
-import psutil
-from typing import Dict, Any, List
-
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-
-app = FastAPI(title="LeetCoach Runner", version="1.0.0")
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, PrivateAttr
+
+from capture import RESULT_LIMIT_BYTES, CappedBuffer, run_bounded
+from compile_cache import COMPILE_TIERS, OPTIMIZED_TIER, BinaryCache
+from differential import DifferentialRequest, DifferentialResponse, run_differential
+from design import cpp_design_program, format_design_input, parse_design_output
+from harness import PYTHON_TEST_HARNESS
+from lifecycle import DRAIN_TIMEOUT_S, Lifecycle
+from payloads import Mismatch, compact_results
+from metering import EXACT_METERING, METER_TIME_FACTOR, MeterReport, summarize_meter
+from profiling import (
+    MEMORY_TOP_N,
+    MemoryReport,
+    ProfileReport,
+    profile_cpp,
+    profile_python,
+    select_slowest_test,
+)
+from result_cache import ResultCache, depends_on_layout, is_cacheable, make_cache_key, test_set_hash
+from testset_store import InvalidTestSet, TestSet, TestSetStore
+from timing import (
+    STABLE_TIMING_REPEATS,
+    StableTiming,
+    TimingStats,
+    summarize_run,
+    summarize_samples,
+    timing_cpu,
+)
+
+# Endpoints that start work; refused while draining, awaited before exit
+lifecycle = Lifecycle(job_paths=["/execute", "/test-sets", "/differential"])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Drain on SIGTERM; report ready once warm-up has finished."""
+    lifecycle.install_sigterm()
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+
+
+app = FastAPI(title="LeetCoach Runner", version="1.0.0", lifespan=lifespan)
+
+# Wall-clock limit per test (seconds)
+TEST_TIME_LIMIT_S = 2
+
+# Total user output surfaced in runtime_output per request (first + last bytes)
+RUNTIME_OUTPUT_HEAD_BYTES = 16 * 1024
+RUNTIME_OUTPUT_TAIL_BYTES = 16 * 1024
+
+# Temporary source files named in compiler messages and tracebacks
+_TEMP_SOURCE = re.compile(re.escape(tempfile.gettempdir()) + r"/tmp\w+\.(py|cpp)\b")
 
 
 class ExecutionRequest(BaseModel):
     language: str
     code: str
-    test_cases: List[Dict[str, Any]]
+    test_cases: List[Dict[str, Any]] = []
+    test_set_hash: Optional[str] = None  # stored set (PUT /test-sets/{hash}) instead of inline tests
+    profile: bool = False  # re-run the slowest test under a profiler
+    memory_profile: bool = False  # trace allocations per test (Python only)
+    signature: Optional[Dict[str, Any]] = None  # ListNode/TreeNode marshalling, design-class replay
+    compile_tier: str = OPTIMIZED_TIER  # C++ only: fast for interactive runs, optimized for grading
+    stable_timing: bool = False  # re-measure accepted code pinned to a core, K repeats
+    op_budget: Optional[int] = None  # Python only: meter executed lines, fail tests over budget (3.12+)
+    full_values: bool = False  # echo complete input/expected/actual values, not just previews
 
 
 class TestResult(BaseModel):
     status: str  # PASS, FAIL, ERROR
-    input: Dict[str, Any]
-    expected_output: Any
-    actual_output: Any
+    index: int = 0  # position in the test set
+    input: Optional[Dict[str, Any]] = None  # full values are only kept with full_values
+    expected_output: Any = None
+    actual_output: Any = None
+    input_preview: str = ""
+    expected_preview: str = ""
+    actual_preview: Optional[str] = None  # None when the test produced no output
+    mismatch: Optional[Mismatch] = None  # FAIL on list outputs: first differing index with context
     error_message: str = ""
     runtime_ms: int = 0
+    memory: Optional[MemoryReport] = None
+    timing: Optional[TimingStats] = None  # stable-timing mode only
+    ops: Optional[int] = None  # metered line events (op_budget mode only)
 
 
 class ExecutionResponse(BaseModel):
@@ -39,12 +106,79 @@ class ExecutionResponse(BaseModel):
     peak_memory_kb: int
     compilation_output: str = ""
     runtime_output: str = ""
+    profile: Optional[ProfileReport] = None
+    cached: bool = False  # served from the result cache
+    compile_tier: Optional[str] = None  # C++ only; fast-tier timings are not representative
+    stable_timing: Optional[StableTiming] = None  # accepted submissions in stable-timing mode
+    metering: Optional[MeterReport] = None  # op_budget mode only
+    # Every errored test raised an exception the harness reported (not a crash,
+    # kill or memory limit), so a RUNTIME_ERROR would repeat on any runner
+    _exception_errors_only: bool = PrivateAttr(default=False)
+
+
+result_cache = ResultCache()
+binary_cache = BinaryCache()
+test_set_store = TestSetStore()
+
+
+async def warm_up() -> None:
+    """Precompile headers and start one harness child before reporting ready."""
+    try:
+        await asyncio.to_thread(binary_cache.warm_up)
+        await asyncio.to_thread(
+            run_bounded,
+            ['python3', '-c', PYTHON_TEST_HARNESS, os.devnull, "0", "0", "0", "0"],
+            input_data=b'{"input": {}, "expected_output": null}',
+            timeout=TEST_TIME_LIMIT_S * 5,
+            result_channel=True
+        )
+    finally:
+        # Warm-up only saves latency; a failed step must not keep the runner unready
+        lifecycle.mark_ready()
+
+
+@app.middleware("http")
+async def admit_jobs(request: Request, call_next):
+    """Track running jobs and refuse new ones while draining."""
+    if not lifecycle.is_job(request.url.path):
+        return await call_next(request)
+    if not lifecycle.admit():
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Runner is shutting down"},
+            headers={"Retry-After": "5"}
+        )
+    try:
+        return await call_next(request)
+    finally:
+        lifecycle.release()
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "service": "leetcoach-runner"}
+    """Health check endpoint (503 while warming up or draining)."""
+    return JSONResponse(
+        status_code=200 if lifecycle.ready else 503,
+        content={
+            "status": "healthy" if lifecycle.ready else lifecycle.state,
+            "service": "leetcoach-runner",
+            "lifecycle": lifecycle.stats(),
+            "result_cache": result_cache.stats(),
+            "binary_cache": binary_cache.stats(),
+            "test_set_store": test_set_store.stats()
+        }
+    )
+
+
+@app.put("/test-sets/{set_hash}")
+async def upload_test_set(set_hash: str, request: Request):
+    """Store a test set under its SHA-256 so /execute can refer to it by hash."""
+    if set_hash not in test_set_store:
+        try:
+            test_set_store.put(set_hash, await request.body())
+        except InvalidTestSet as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"test_set_hash": set_hash}
 
 
 @app.post("/execute", response_model=ExecutionResponse)
@@ -53,22 +187,91 @@ async def execute_code(request: ExecutionRequest):
     
     if request.language not in ["python", "cpp"]:
         raise HTTPException(status_code=400, detail="Unsupported language")
+    if request.compile_tier not in COMPILE_TIERS:
+        raise HTTPException(status_code=400, detail="Unsupported compile tier")
+    
+    # Stored test sets are referenced by hash; the API uploads them on a 404
+    if request.test_set_hash is None:
+        return await _execute(request, request.test_cases)
+    stored = test_set_store.get(request.test_set_hash)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Unknown test set")
+    try:
+        return await _execute(request, stored)
+    finally:
+        test_set_store.release(stored)
+
+
+async def _execute(request: ExecutionRequest, test_cases: TestSet) -> ExecutionResponse:
+    # Diagnostic runs always execute; everything else may be served from cache
+    cache_key = exact_key = None
+    if not (request.profile or request.memory_profile):
+        tests_hash = request.test_set_hash or test_set_hash(request.test_cases)
+        limits = (
+            TEST_TIME_LIMIT_S,
+            RESULT_LIMIT_BYTES,
+            request.compile_tier if request.language == "cpp" else None,
+            json.dumps(request.signature, sort_keys=True),
+            STABLE_TIMING_REPEATS if request.stable_timing else 0,
+            request.op_budget,
+            request.full_values
+        )
+        cache_key = make_cache_key(request.language, request.code, tests_hash, limits)
+        # Responses quoting the program's output are only reused for the same exact code
+        exact_key = make_cache_key(request.language, request.code, tests_hash, limits, exact=True)
+        cached = result_cache.get(cache_key, exact_key)
+        if cached is not None:
+            return ExecutionResponse(**cached, cached=True)
     
     try:
         if request.language == "python":
-            return await execute_python(request)
+            response = await execute_python(request, test_cases)
         elif request.language == "cpp":
-            return await execute_cpp(request)
+            response = await execute_cpp(request, test_cases)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Execution failed: {str(e)}")
+    
+    # Index + previews instead of echoing whole test sets back
+    compact_results(response.test_results, request.full_values)
+    scrub_paths(response)
+    
+    if cache_key is not None:
+        data = response.model_dump(exclude={"cached"})
+        if is_cacheable(data, response._exception_errors_only):
+            result_cache.put(exact_key if depends_on_layout(data) else cache_key, data)
+    
+    return response
 
 
-async def execute_python(request: ExecutionRequest) -> ExecutionResponse:
+def scrub_paths(response: ExecutionResponse) -> None:
+    """Call the submitted source solution.py / solution.cpp instead of its temp file."""
+    def scrub(text: str) -> str:
+        return _TEMP_SOURCE.sub(r"solution.\1", text)
+    
+    response.compilation_output = scrub(response.compilation_output)
+    response.runtime_output = scrub(response.runtime_output)
+    for test_result in response.test_results:
+        test_result.error_message = scrub(test_result.error_message)
+
+
+@app.post("/differential", response_model=DifferentialResponse)
+async def differential_test(request: DifferentialRequest):
+    """Compare a submission with a reference solution on generated inputs."""
+    if request.language != "python":
+        raise HTTPException(status_code=400, detail="Differential testing supports Python only")
+    return run_differential(request)
+
+
+async def execute_python(request: ExecutionRequest, test_cases: TestSet) -> ExecutionResponse:
     """Execute Python code."""
     
     test_results = []
     total_runtime = 0
     peak_memory = 0
+    memory_peaks = []
+    meters = []
+    crashes = 0  # errored tests that died, or hit the memory limit, rather than raising
+    runtime_output = CappedBuffer(head=RUNTIME_OUTPUT_HEAD_BYTES, tail=RUNTIME_OUTPUT_TAIL_BYTES)
     
     # Create temporary file for code
     with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
@@ -94,144 +297,139 @@ async def execute_python(request: ExecutionRequest) -> ExecutionResponse:
             )
         
         # Run test cases
-        for i, test_case in enumerate(request.test_cases):
-            start_time = time.time()
-            start_memory = psutil.Process().memory_info().rss / 1024  # KB
+        for i, test_case in enumerate(test_cases):
+            payload = json.dumps({
+                "input": test_case['input'],
+                "expected_output": test_case['expected_output'],
+                "signature": request.signature
+            }).encode()
+            
+            # Execute test; the verdict comes back on a dedicated result channel
+            run = run_bounded(
+                ['python3', '-c', PYTHON_TEST_HARNESS, temp_file,
+                 "1" if request.memory_profile else "0", str(MEMORY_TOP_N), "0", str(request.op_budget or 0)],
+                input_data=payload,
+                timeout=TEST_TIME_LIMIT_S * (METER_TIME_FACTOR if request.op_budget and EXACT_METERING else 1),
+                result_channel=True
+            )
+            
+            runtime_ms = int(run.elapsed_s * 1000)
+            total_runtime += runtime_ms
+            peak_memory = max(peak_memory, run.max_rss_kb)
+            
+            # Keep whatever the user printed, within the capped buffers
+            for stream_name, stream in (("stdout", run.stdout), ("stderr", run.stderr)):
+                if stream.total:
+                    runtime_output.write(f"--- Test {i + 1} {stream_name} ---\n".encode())
+                    runtime_output.write(stream.getvalue().encode())
+            
+            if run.timed_out:
+                test_results.append(TestResult(
+                    status="ERROR",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=None,
+                    error_message="Time limit exceeded",
+                    runtime_ms=TEST_TIME_LIMIT_S * 1000
+                ))
+                continue
+            
+            if run.result_truncated:
+                test_results.append(TestResult(
+                    status="ERROR",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=None,
+                    error_message="Output limit exceeded",
+                    runtime_ms=runtime_ms
+                ))
+                continue
             
+            # Parse result
             try:
-                # Create test runner script
-                test_script = f"""
-import sys
-import json
-import traceback
-
-# Load the user's code
-exec(open('{temp_file}').read())
-
-# Get test case
-test_input = {json.dumps(test_case['input'])}
-expected = {json.dumps(test_case['expected_output'])}
-
-try:
-    # Find the main function (look for common function names first)
-    import inspect
-    functions = [name for name, obj in globals().items() 
-                if inspect.isfunction(obj) and not name.startswith('_')]
-    
-    if not functions:
-        print(json.dumps({{"error": "No function found"}}))
-        sys.exit(1)
-    
-    # Try to find a function that matches common patterns
-    main_func = None
-    function_names = [f for f in functions if f.lower() in ['twosum', 'twosum', 'solution', 'main']]
-    if function_names:
-        main_func = globals()[function_names[0]]
-    else:
-        # Fall back to first function
-        main_func = globals()[functions[0]]
-    
-    # Call the function
-    if isinstance(test_input, dict):
-        result = main_func(**test_input)
-    else:
-        result = main_func(test_input)
-    
-    # Check result - handle different comparison cases
-    def deep_compare(a, b):
-        if isinstance(a, list) and isinstance(b, list):
-            if len(a) != len(b):
-                return False
-            # For lists, check if they contain the same elements (order might matter)
-            return sorted(a) == sorted(b) or a == b
-        return a == b
-    
-    if deep_compare(result, expected):
-        print(json.dumps({{"status": "PASS", "result": result}}))
-    else:
-        print(json.dumps({{"status": "FAIL", "result": result, "expected": expected}}))
-        
-except Exception as e:
-    print(json.dumps({{"status": "ERROR", "error": str(e), "traceback": traceback.format_exc()}}))
-"""
-                
-                # Execute test
-                result = subprocess.run(
-                    ['python3', '-c', test_script],
-                    capture_output=True,
-                    text=True,
-                    timeout=2  # 2 second timeout per test
-                )
-                
-                end_time = time.time()
-                end_memory = psutil.Process().memory_info().rss / 1024
-                
-                runtime_ms = int((end_time - start_time) * 1000)
-                memory_kb = int(end_memory - start_memory)
-                
-                total_runtime += runtime_ms
-                peak_memory = max(peak_memory, memory_kb)
-                
-                # Parse result
-                if result.returncode == 0:
-                    try:
-                        result_data = json.loads(result.stdout.strip())
-                        status = result_data.get("status", "ERROR")
-                        
-                        if status == "PASS":
-                            test_results.append(TestResult(
-                                status="PASS",
-                                input=test_case['input'],
-                                expected_output=test_case['expected_output'],
-                                actual_output=result_data.get("result"),
-                                runtime_ms=runtime_ms
-                            ))
-                        elif status == "FAIL":
-                            test_results.append(TestResult(
-                                status="FAIL",
-                                input=test_case['input'],
-                                expected_output=test_case['expected_output'],
-                                actual_output=result_data.get("result"),
-                                runtime_ms=runtime_ms
-                            ))
-                        else:
-                            test_results.append(TestResult(
-                                status="ERROR",
-                                input=test_case['input'],
-                                expected_output=test_case['expected_output'],
-                                actual_output=None,
-                                error_message=result_data.get("error", "Unknown error"),
-                                runtime_ms=runtime_ms
-                            ))
-                    except json.JSONDecodeError:
-                        test_results.append(TestResult(
-                            status="ERROR",
-                            input=test_case['input'],
-                            expected_output=test_case['expected_output'],
-                            actual_output=None,
-                            error_message="Invalid output format",
-                            runtime_ms=runtime_ms
-                        ))
+                result_data = json.loads(run.result_text) if run.result else None
+            except json.JSONDecodeError:
+                result_data = None
+            
+            if result_data is None:
+                crashes += 1
+                if run.returncode == 0:
+                    error_message = "Invalid output format"
                 else:
-                    test_results.append(TestResult(
-                        status="ERROR",
-                        input=test_case['input'],
-                        expected_output=test_case['expected_output'],
-                        actual_output=None,
-                        error_message=result.stderr or "Runtime error",
-                        runtime_ms=runtime_ms
-                    ))
-                    
-            except subprocess.TimeoutExpired:
+                    error_message = run.stderr.getvalue() or "Runtime error"
                 test_results.append(TestResult(
                     status="ERROR",
                     input=test_case['input'],
                     expected_output=test_case['expected_output'],
                     actual_output=None,
-                    error_message="Time limit exceeded",
-                    runtime_ms=2000
+                    error_message=error_message,
+                    runtime_ms=runtime_ms
                 ))
-                total_runtime += 2000
+                continue
+            
+            status = result_data.get("status", "ERROR")
+            
+            # In memory mode the traced peak replaces the process max RSS
+            memory = result_data.get("memory")
+            if memory:
+                memory_peaks.append(memory["peak_kb"])
+            
+            # Metered line events (hardware independent with sys.monitoring)
+            meter = result_data.get("meter")
+            meters.append(meter)
+            ops = meter["ops"] if meter else None
+            
+            if status == "PASS":
+                test_results.append(TestResult(
+                    status="PASS",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=result_data.get("result"),
+                    runtime_ms=runtime_ms,
+                    memory=memory,
+                    ops=ops
+                ))
+            elif status == "FAIL":
+                test_results.append(TestResult(
+                    status="FAIL",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=result_data.get("result"),
+                    runtime_ms=runtime_ms,
+                    memory=memory,
+                    ops=ops
+                ))
+            else:
+                if result_data.get("exception") == "MemoryError":
+                    crashes += 1
+                test_results.append(TestResult(
+                    status="ERROR",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=None,
+                    error_message=result_data.get("error", "Unknown error"),
+                    runtime_ms=runtime_ms,
+                    memory=memory,
+                    ops=ops
+                ))
+        
+        # Stable timing is only worth its cost once the code is accepted
+        stable_timing = None
+        if request.stable_timing and test_results and all(tr.status == "PASS" for tr in test_results):
+            stable_timing = time_python_tests(temp_file, test_cases, request.signature, test_results)
+        
+        # Profile the slowest test in a separate child so normal timings are untouched
+        profile_report = None
+        if request.profile:
+            slowest = select_slowest_test([tr.runtime_ms for tr in test_results])
+            if slowest is not None:
+                profile_report = profile_python(
+                    temp_file,
+                    test_cases[slowest]['input'],
+                    slowest,
+                    budget_s=TEST_TIME_LIMIT_S,
+                    signature=request.signature
+                )
     
     finally:
         # Clean up
@@ -248,28 +446,130 @@ except Exception as e:
     else:
         verdict = "WRONG_ANSWER"
     
-    return ExecutionResponse(
+    if memory_peaks:
+        peak_memory = int(max(memory_peaks))
+    
+    response = ExecutionResponse(
         verdict=verdict,
         test_results=test_results,
         total_runtime_ms=total_runtime,
         peak_memory_kb=peak_memory,
-        compilation_output=""
+        compilation_output="",
+        runtime_output=runtime_output.getvalue(),
+        profile=profile_report,
+        stable_timing=stable_timing,
+        metering=summarize_meter(request.op_budget, meters) if request.op_budget else None
     )
+    response._exception_errors_only = crashes == 0
+    return response
+
+
+def time_python_tests(
+    code_file: str,
+    test_cases: TestSet,
+    signature: Optional[Dict[str, Any]],
+    test_results: List[TestResult]
+) -> Optional[StableTiming]:
+    """Repeat each test's call inside a pinned harness; None if any run misbehaves."""
+    cpu = timing_cpu()
+    per_test = []
+    for test_result, test_case in zip(test_results, test_cases):
+        run = run_bounded(
+            ['python3', '-c', PYTHON_TEST_HARNESS, code_file, "0", str(MEMORY_TOP_N), str(STABLE_TIMING_REPEATS), "0"],
+            input_data=json.dumps({
+                "input": test_case['input'],
+                "expected_output": test_case['expected_output'],
+                "signature": signature
+            }).encode(),
+            timeout=TEST_TIME_LIMIT_S * (STABLE_TIMING_REPEATS + 1),
+            result_channel=True,
+            cpu=cpu
+        )
+        try:
+            result_data = json.loads(run.result_text)
+        except json.JSONDecodeError:
+            return None
+        if run.timed_out or result_data.get("status") != "PASS" or not result_data.get("timings_ns"):
+            return None
+        test_result.timing = summarize_samples(result_data["timings_ns"])
+        per_test.append(test_result.timing)
+    return summarize_run(per_test, "in-harness repeats", cpu)
+
+
+def time_cpp_tests(
+    binary: str,
+    test_cases: TestSet,
+    test_results: List[TestResult],
+    design: Optional[Dict[str, Any]] = None
+) -> Optional[StableTiming]:
+    """Re-run the binary pinned per test and use child CPU time (first run is warm-up)."""
+    cpu = timing_cpu()
+    per_test = []
+    for test_result, test_case in zip(test_results, test_cases):
+        input_data = format_cpp_input(test_case['input'], design).encode()
+        samples = []
+        for repeat in range(STABLE_TIMING_REPEATS + 1):
+            run = run_bounded(
+                [binary],
+                input_data=input_data,
+                timeout=TEST_TIME_LIMIT_S,
+                stdout_is_result=True,
+                cpu=cpu
+            )
+            if run.timed_out or run.returncode != 0:
+                return None
+            if repeat:
+                samples.append(int(run.cpu_time_s * 1e9))
+        test_result.timing = summarize_samples(samples)
+        per_test.append(test_result.timing)
+    return summarize_run(per_test, "process CPU time", cpu)
+
+
+def format_cpp_input(input_data: Dict[str, Any], design: Optional[Dict[str, Any]] = None) -> str:
+    """Render a test input in the line format expected by the generated C++ main."""
+    if design:
+        # Design template: one operation per line
+        return format_design_input(input_data, design)
+    elif 'nums' in input_data and 'target' in input_data:
+        # Two Sum problem
+        nums = input_data.get('nums', [])
+        target = input_data.get('target', 0)
+        return f"nums=[{','.join(map(str, nums))}], target={target}\n"
+    elif 'nums' in input_data and len(input_data) == 1:
+        # Array problem (like Contains Duplicate)
+        nums = input_data.get('nums', [])
+        return f"nums=[{','.join(map(str, nums))}]\n"
+    elif 'head' in input_data:
+        # Linked List problem
+        head = input_data.get('head', [])
+        return f"head=[{','.join(map(str, head))}]\n"
+    elif 's' in input_data:
+        # String problem (like Valid Parentheses)
+        s = input_data.get('s', '')
+        return f's=\\"{s}\\"\n'
+    else:
+        # Generic fallback
+        return f"{input_data}\n"
 
 
-async def execute_cpp(request: ExecutionRequest) -> ExecutionResponse:
+async def execute_cpp(request: ExecutionRequest, test_cases: TestSet) -> ExecutionResponse:
     """Execute C++ code."""
     
     test_results = []
     total_runtime = 0
     peak_memory = 0
+    runtime_output = CappedBuffer(head=RUNTIME_OUTPUT_HEAD_BYTES, tail=RUNTIME_OUTPUT_TAIL_BYTES)
     
     # Determine the problem type based on the test case input
-    first_test_case = request.test_cases[0] if request.test_cases else {}
+    first_test_case = test_cases[0] if len(test_cases) else {}
     input_keys = list(first_test_case.get('input', {}).keys())
+    design = (request.signature or {}).get("design")
     
     # Create a complete C++ program with main function
-    if 'nums' in input_keys and 'target' in input_keys:
+    if design:
+        # Design template: construct the class once and replay every operation
+        cpp_program = cpp_design_program(request.code, design)
+    elif 'nums' in input_keys and 'target' in input_keys:
         # Two Sum problem
         cpp_program = f"""
 #include <iostream>
@@ -497,141 +797,145 @@ int main() {{
         f.write(cpp_program)
         cpp_file = f.name
     
+    program = None
     try:
-        # Compile C++ code
-        compile_result = subprocess.run(
-            ['g++', '-O2', '-std=c++17', '-o', cpp_file.replace('.cpp', ''), cpp_file],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        # Compile C++ code (or reuse a cached binary of the same program)
+        program = binary_cache.compile(cpp_file, cpp_program, request.compile_tier)
         
-        if compile_result.returncode != 0:
+        if not program.ok:
             return ExecutionResponse(
                 verdict="COMPILE_ERROR",
                 test_results=[],
                 total_runtime_ms=0,
                 peak_memory_kb=0,
-                compilation_output=compile_result.stderr
+                compilation_output=program.stderr,
+                compile_tier=program.tier
             )
         
         # Run test cases
-        for test_case in request.test_cases:
-            start_time = time.time()
+        for i, test_case in enumerate(test_cases):
+            # Create input in the format expected by our C++ program
+            input_str = format_cpp_input(test_case['input'], design)
             
-            try:
-                # Create input in the format expected by our C++ program
-                input_data = test_case['input']
-                
-                if 'nums' in input_data and 'target' in input_data:
-                    # Two Sum problem
-                    nums = input_data.get('nums', [])
-                    target = input_data.get('target', 0)
-                    input_str = f"nums=[{','.join(map(str, nums))}], target={target}\n"
-                elif 'nums' in input_data and len(input_data) == 1:
-                    # Array problem (like Contains Duplicate)
-                    nums = input_data.get('nums', [])
-                    input_str = f"nums=[{','.join(map(str, nums))}]\n"
-                elif 'head' in input_data:
-                    # Linked List problem
-                    head = input_data.get('head', [])
-                    input_str = f"head=[{','.join(map(str, head))}]\n"
-                elif 's' in input_data:
-                    # String problem (like Valid Parentheses)
-                    s = input_data.get('s', '')
-                    input_str = f's=\\"{s}\\"\n'
-                else:
-                    # Generic fallback
-                    input_str = f"{input_data}\n"
-                
-                # Execute
-                result = subprocess.run(
-                    [cpp_file.replace('.cpp', '')],
-                    input=input_str,
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                
-                end_time = time.time()
-                runtime_ms = int((end_time - start_time) * 1000)
-                total_runtime += runtime_ms
-                
-                # Parse result
-                if result.returncode == 0:
-                    try:
-                        # Parse the output vector
-                        output_str = result.stdout.strip()
-                        if output_str.startswith('[') and output_str.endswith(']'):
-                            # Extract numbers from [1,2,3] format
-                            content = output_str[1:-1]
-                            if content:
-                                actual_output = [int(x.strip()) for x in content.split(',')]
-                            else:
-                                actual_output = []
+            # Execute; stdout is the answer, stderr is capped
+            result = run_bounded(
+                [program.binary],
+                input_data=input_str.encode(),
+                timeout=TEST_TIME_LIMIT_S,
+                stdout_is_result=True
+            )
+            
+            runtime_ms = int(result.elapsed_s * 1000)
+            total_runtime += runtime_ms
+            peak_memory = max(peak_memory, result.max_rss_kb)
+            
+            if result.stderr.total:
+                runtime_output.write(f"--- Test {i + 1} stderr ---\n".encode())
+                runtime_output.write(result.stderr.getvalue().encode())
+            
+            # Parse result
+            if result.timed_out:
+                test_results.append(TestResult(
+                    status="ERROR",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=None,
+                    error_message="Time limit exceeded",
+                    runtime_ms=TEST_TIME_LIMIT_S * 1000
+                ))
+            elif result.result_truncated:
+                test_results.append(TestResult(
+                    status="ERROR",
+                    input=test_case['input'],
+                    expected_output=test_case['expected_output'],
+                    actual_output=None,
+                    error_message="Output limit exceeded",
+                    runtime_ms=runtime_ms
+                ))
+            elif result.returncode == 0:
+                try:
+                    # Parse the output vector (design drivers print one value per operation)
+                    output_str = result.result_text.strip()
+                    if design:
+                        actual_output = parse_design_output(output_str)
+                    elif output_str.startswith('[') and output_str.endswith(']'):
+                        # Extract numbers from [1,2,3] format
+                        content = output_str[1:-1]
+                        if content:
+                            actual_output = [int(x.strip()) for x in content.split(',')]
                         else:
                             actual_output = []
-                        
-                        # Handle different comparison cases for C++
-                        def deep_compare(a, b):
-                            if isinstance(a, list) and isinstance(b, list):
-                                if len(a) != len(b):
-                                    return False
-                                # For lists, check if they contain the same elements (order might matter)
-                                return sorted(a) == sorted(b) or a == b
-                            return a == b
-                        
-                        if deep_compare(actual_output, test_case['expected_output']):
-                            test_results.append(TestResult(
-                                status="PASS",
-                                input=test_case['input'],
-                                expected_output=test_case['expected_output'],
-                                actual_output=actual_output,
-                                runtime_ms=runtime_ms
-                            ))
-                        else:
-                            test_results.append(TestResult(
-                                status="FAIL",
-                                input=test_case['input'],
-                                expected_output=test_case['expected_output'],
-                                actual_output=actual_output,
-                                runtime_ms=runtime_ms
-                            ))
-                    except (ValueError, IndexError) as e:
+                    else:
+                        actual_output = []
+                    
+                    # Handle different comparison cases for C++
+                    def deep_compare(a, b):
+                        if design:
+                            return a == b  # operation outputs are ordered
+                        if isinstance(a, list) and isinstance(b, list):
+                            if len(a) != len(b):
+                                return False
+                            # For lists, check if they contain the same elements (order might matter)
+                            return sorted(a) == sorted(b) or a == b
+                        return a == b
+                    
+                    if deep_compare(actual_output, test_case['expected_output']):
                         test_results.append(TestResult(
-                            status="ERROR",
+                            status="PASS",
                             input=test_case['input'],
                             expected_output=test_case['expected_output'],
-                            actual_output=None,
-                            error_message=f"Invalid output format: {str(e)}",
+                            actual_output=actual_output,
                             runtime_ms=runtime_ms
                         ))
-                else:
+                    else:
+                        test_results.append(TestResult(
+                            status="FAIL",
+                            input=test_case['input'],
+                            expected_output=test_case['expected_output'],
+                            actual_output=actual_output,
+                            runtime_ms=runtime_ms
+                        ))
+                except (ValueError, IndexError) as e:
                     test_results.append(TestResult(
                         status="ERROR",
                         input=test_case['input'],
                         expected_output=test_case['expected_output'],
                         actual_output=None,
-                        error_message=result.stderr or "Runtime error",
+                        error_message=f"Invalid output format: {str(e)}",
                         runtime_ms=runtime_ms
                     ))
-                
-            except subprocess.TimeoutExpired:
+            else:
                 test_results.append(TestResult(
                     status="ERROR",
                     input=test_case['input'],
                     expected_output=test_case['expected_output'],
                     actual_output=None,
-                    error_message="Time limit exceeded",
-                    runtime_ms=2000
+                    error_message=result.stderr.getvalue() or "Runtime error",
+                    runtime_ms=runtime_ms
                 ))
-                total_runtime += 2000
+        
+        # Stable timing is only worth its cost once the code is accepted
+        stable_timing = None
+        if request.stable_timing and test_results and all(tr.status == "PASS" for tr in test_results):
+            stable_timing = time_cpp_tests(program.binary, test_cases, test_results, design)
+        
+        # Profile the slowest test with a separate -pg build
+        profile_report = None
+        if request.profile:
+            slowest = select_slowest_test([tr.runtime_ms for tr in test_results])
+            if slowest is not None:
+                profile_report = profile_cpp(
+                    cpp_file,
+                    format_cpp_input(test_cases[slowest]['input'], design),
+                    slowest,
+                    budget_s=TEST_TIME_LIMIT_S
+                )
     
     finally:
-        # Clean up
+        # Clean up (cached binaries stay for later runs of the same program)
         os.unlink(cpp_file)
-        if os.path.exists(cpp_file.replace('.cpp', '')):
-            os.unlink(cpp_file.replace('.cpp', ''))
+        if program is not None:
+            binary_cache.release(program)
     
     # Determine verdict
     passed = sum(1 for tr in test_results if tr.status == "PASS")
@@ -649,10 +953,14 @@ int main() {{
         test_results=test_results,
         total_runtime_ms=total_runtime,
         peak_memory_kb=peak_memory,
-        compilation_output=""
+        compilation_output="",
+        runtime_output=runtime_output.getvalue(),
+        profile=profile_report,
+        compile_tier=program.tier,
+        stable_timing=stable_timing
     )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    uvicorn.run(app, host="0.0.0.0", port=8002, timeout_graceful_shutdown=int(DRAIN_TIMEOUT_S))
@@ -0,0 +1 @@
+# Runner tests package
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Tests for the ListNode/TreeNode harness adapters
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from adapters import PYTHON_ADAPTERS
+from capture import run_bounded
+from harness import PYTHON_TEST_HARNESS
+
+# Well above the default recursion limit
+DEEP = 100_000
+
+
+def _adapters():
+    namespace = {}
+    exec(PYTHON_ADAPTERS, namespace)
+    return namespace
+
+
+def _run_harness(code, test_input, expected, signature):
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+        f.write(code)
+        path = f.name
+    try:
+        run = run_bounded(
+            ['python3', '-c', PYTHON_TEST_HARNESS, path, "0", "5", "0", "0"],
+            input_data=json.dumps({
+                "input": test_input,
+                "expected_output": expected,
+                "signature": signature
+            }).encode(),
+            timeout=10,
+            result_channel=True
+        )
+        return json.loads(run.result_text)
+    finally:
+        os.unlink(path)
+
+
+class TestAdapters:
+    """Test array <-> node conversion and harness integration."""
+    
+    def test_list_round_trip_deep(self):
+        """Test that a 10^5-node list builds and serializes iteratively."""
+        ns = _adapters()
+        values = list(range(DEEP))
+        assert ns["_list_values"](ns["_build_list"](values)) == values
+        assert ns["_build_list"]([]) is None
+    
+    def test_degenerate_tree_round_trip_deep(self):
+        """Test that a 10^5-deep right-leaning tree round-trips."""
+        ns = _adapters()
+        values = [0]
+        for i in range(1, DEEP):
+            values.extend([None, i])
+        assert ns["_tree_values"](ns["_build_tree"](values)) == values
+    
+    def test_tree_trailing_nones_trimmed(self):
+        """Test level-order output matches LeetCode's format."""
+        ns = _adapters()
+        values = [6, 2, 8, 0, 4, 7, 9, None, None, 3, 5]
+        assert ns["_tree_values"](ns["_build_tree"](values)) == values
+        assert ns["_tree_values"](ns["_build_tree"]([1, None, None])) == [1]
+        assert ns["_tree_values"](None) == []
+    
+    def test_cycle_and_node_references(self):
+        """Test cycle@ links the tail and node@ resolves values to nodes."""
+        ns = _adapters()
+        args = ns["_marshal_args"](
+            {"head": [3, 2, 0, -4], "pos": 1},
+            {"params": {"head": "ListNode", "pos": "cycle@head"}}
+        )
+        assert set(args) == {"head"}
+        assert args["head"].next.next.next.next is args["head"].next
+        
+        args = ns["_marshal_args"](
+            {"root": [6, 2, 8], "p": 2, "q": 8},
+            {"params": {"root": "TreeNode", "p": "node@root", "q": "node@root"}}
+        )
+        assert args["p"] is args["root"].left
+        assert args["q"] is args["root"].right
+    
+    def test_harness_reverse_list(self):
+        """Test the harness passes real ListNodes and serializes the result."""
+        code = (
+            "def reverseList(head: Optional[ListNode]) -> Optional[ListNode]:\n"
+            "    prev = None\n"
+            "    while head:\n"
+            "        head.next, prev, head = prev, head, head.next\n"
+            "    return prev\n"
+        )
+        signature = {"params": {"head": "ListNode"}, "returns": "ListNode"}
+        result = _run_harness(code, {"head": [1, 2, 3]}, [3, 2, 1], signature)
+        assert result["status"] == "PASS"
+    
+    def test_harness_invert_tree_with_gaps(self):
+        """Test tree results with None gaps compare without a TypeError."""
+        code = (
+            "def invertTree(root):\n"
+            "    stack = [root]\n"
+            "    while stack:\n"
+            "        node = stack.pop()\n"
+            "        if node:\n"
+            "            node.left, node.right = node.right, node.left\n"
+            "            stack.extend([node.left, node.right])\n"
+            "    return root\n"
+        )
+        signature = {"params": {"root": "TreeNode"}, "returns": "TreeNode"}
+        result = _run_harness(code, {"root": [1, 2, None, 3]}, [1, None, 2, None, 3], signature)
+        assert result["status"] == "PASS"
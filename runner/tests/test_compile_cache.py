@@ -0,0 +1,71 @@
+"""
+Tests for tiered C++ compilation
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compile_cache import FAST_TIER, OPTIMIZED_TIER, BinaryCache
+
+PROGRAM = "int main() { return 0; }\n"
+
+
+def _source(text):
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.cpp', delete=False) as f:
+        f.write(text)
+        return f.name
+
+
+class TestBinaryCache:
+    """Test tier selection and binary reuse."""
+    
+    def test_fast_run_reuses_optimized_binary(self):
+        """Test that a cached optimized binary serves fast-tier requests."""
+        cache = BinaryCache(max_entries=4)
+        source_file = _source(PROGRAM)
+        try:
+            optimized = cache.compile(source_file, PROGRAM, OPTIMIZED_TIER)
+            assert optimized.ok and not optimized.cached
+
+            fast = cache.compile(source_file, PROGRAM, FAST_TIER)
+            assert fast.cached
+            assert fast.tier == OPTIMIZED_TIER
+            assert fast.binary == optimized.binary
+            assert cache.stats()["optimized_reuses"] == 1
+        finally:
+            os.unlink(source_file)
+    
+    def test_fast_binary_not_used_for_submissions(self):
+        """Test that graded runs never execute a fast-tier binary."""
+        cache = BinaryCache(max_entries=4)
+        source_file = _source(PROGRAM)
+        try:
+            assert cache.compile(source_file, PROGRAM, FAST_TIER).tier == FAST_TIER
+            optimized = cache.compile(source_file, PROGRAM, OPTIMIZED_TIER)
+            assert optimized.tier == OPTIMIZED_TIER
+            assert not optimized.cached
+        finally:
+            os.unlink(source_file)
+    
+    def test_compile_error_and_eviction(self):
+        """Test that errors are reported and evicted binaries are deleted."""
+        cache = BinaryCache(max_entries=1)
+        broken = _source("int main( {")
+        first = _source(PROGRAM)
+        second_program = "int main() { return 1; }\n"
+        second = _source(second_program)
+        try:
+            result = cache.compile(broken, "int main( {", FAST_TIER)
+            assert not result.ok
+            assert "error" in result.stderr
+
+            kept = cache.compile(first, PROGRAM, FAST_TIER)
+            cache.compile(second, second_program, FAST_TIER)
+            assert not os.path.exists(kept.binary)
+            assert cache.stats()["entries"] == 1
+        finally:
+            for path in (broken, first, second):
+                os.unlink(path)
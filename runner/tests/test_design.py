@@ -0,0 +1,153 @@
+"""
+Tests for design-template operation replay
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from capture import run_bounded
+from compile_cache import FAST_TIER, BinaryCache
+from design import cpp_design_program, first_mismatch, format_design_input, parse_design_output
+from harness import PYTHON_TEST_HARNESS
+
+STRESS = 100_000
+
+SIGNATURE = {
+    "design": {
+        "class": "MinStack",
+        "operations": "operations",
+        "arguments": "values",
+        "constructor": [],
+        "methods": {
+            "push": {"args": ["int"], "returns": "void"},
+            "pop": {"args": [], "returns": "void"},
+            "top": {"args": [], "returns": "int"},
+            "getMin": {"args": [], "returns": "int"},
+        },
+    }
+}
+
+PYTHON_MIN_STACK = """class MinStack:
+    def __init__(self):
+        self.stack = []
+    def push(self, val):
+        self.stack.append((val, min(val, self.stack[-1][1]) if self.stack else val))
+    def pop(self):
+        self.stack.pop()
+    def top(self):
+        return self.stack[-1][0]
+    def getMin(self):
+        return self.stack[-1][1]
+"""
+
+CPP_MIN_STACK = """class MinStack {
+    vector<pair<int, int>> st;
+public:
+    MinStack() {}
+    void push(int val) { st.push_back({val, st.empty() ? val : min(val, st.back().second)}); }
+    void pop() { st.pop_back(); }
+    int top() { return st.back().first; }
+    int getMin() { return st.back().second; }
+};
+"""
+
+
+def _stress_case(count, seed=7):
+    rng = random.Random(seed)
+    operations, values, expected, stack = ["MinStack"], [[]], [None], []
+    for _ in range(count - 1):
+        if not stack or rng.random() < 0.5:
+            val = rng.randint(-10**9, 10**9)
+            stack.append((val, min(val, stack[-1][1]) if stack else val))
+            operations.append("push")
+            values.append([val])
+            expected.append(None)
+        else:
+            op = rng.choice(["pop", "top", "getMin"])
+            operations.append(op)
+            values.append([])
+            if op == "pop":
+                stack.pop()
+                expected.append(None)
+            else:
+                expected.append(stack[-1][0] if op == "top" else stack[-1][1])
+    return {"operations": operations, "values": values}, expected
+
+
+def _run_python(code, test_input, expected):
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+        f.write(code)
+        path = f.name
+    try:
+        run = run_bounded(
+            ['python3', '-c', PYTHON_TEST_HARNESS, path, "0", "5", "0", "0"],
+            input_data=json.dumps({
+                "input": test_input,
+                "expected_output": expected,
+                "signature": SIGNATURE
+            }).encode(),
+            timeout=20,
+            result_channel=True
+        )
+        return json.loads(run.result_text)
+    finally:
+        os.unlink(path)
+
+
+class TestDesignReplay:
+    """Test that one instance replays a whole operation sequence."""
+    
+    def test_python_stress_sequence_in_one_child(self):
+        """Test that 10^5 operations are replayed and compared in a single run."""
+        test_input, expected = _stress_case(STRESS)
+        data = _run_python(PYTHON_MIN_STACK, test_input, expected)
+        assert data["status"] == "PASS"
+        assert len(data["result"]) == STRESS
+    
+    def test_python_reports_first_mismatch(self):
+        """Test that a wrong answer points at the first differing operation."""
+        broken = PYTHON_MIN_STACK.replace("return self.stack[-1][1]", "return self.stack[-1][0]")
+        test_input = {"operations": ["MinStack", "push", "push", "getMin"], "values": [[], [1], [2], []]}
+        data = _run_python(broken, test_input, [None, None, None, 1])
+        assert data["status"] == "FAIL"
+        assert data["mismatch_index"] == 3
+    
+    def test_python_missing_class(self):
+        """Test that code without the design class is an error, not a crash."""
+        data = _run_python("def solve():\n    pass\n", {"operations": ["MinStack"], "values": [[]]}, [None])
+        assert data["status"] == "ERROR"
+        assert "MinStack" in data["error"]
+    
+    def test_cpp_stress_sequence_in_one_child(self):
+        """Test that the generated C++ driver replays 10^5 operations."""
+        test_input, expected = _stress_case(STRESS)
+        program = cpp_design_program(CPP_MIN_STACK, SIGNATURE["design"])
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.cpp', delete=False) as f:
+            f.write(program)
+            source_file = f.name
+        cache = BinaryCache(max_entries=1)
+        try:
+            compiled = cache.compile(source_file, program, FAST_TIER)
+            assert compiled.ok, compiled.stderr
+            run = run_bounded(
+                [compiled.binary],
+                input_data=format_design_input(test_input, SIGNATURE["design"]).encode(),
+                timeout=20,
+                stdout_is_result=True
+            )
+            assert run.returncode == 0
+            assert parse_design_output(run.result_text) == expected
+            cache.release(compiled)
+        finally:
+            os.unlink(source_file)
+    
+    def test_first_mismatch(self):
+        """Test mismatch positions, including length differences."""
+        assert first_mismatch([None, 1, 2], [None, 1, 3]) == 2
+        assert first_mismatch([None, 1], [None, 1, 3]) == 2
+        assert first_mismatch(None, [None]) == 0
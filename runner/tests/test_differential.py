@@ -0,0 +1,74 @@
+"""
+Tests for differential testing against a reference solution
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from differential import DifferentialRequest, run_differential
+
+REFERENCE = """def singleNumber(nums):
+    result = 0
+    for num in nums:
+        result ^= num
+    return result
+"""
+
+INPUTS = [{"nums": [i, -1, i]} for i in range(300)]
+
+
+def _request(code, inputs=INPUTS, budget=5.0):
+    return DifferentialRequest(
+        language="python",
+        code=code,
+        reference_code=REFERENCE,
+        inputs=inputs,
+        time_budget_s=budget
+    )
+
+
+class TestDifferential:
+    """Test batched comparison in one child."""
+    
+    def test_agreeing_solution_checks_every_input(self):
+        """Test that a correct solution is compared on all inputs."""
+        code = "def singleNumber(nums):\n    return next(n for n in nums if nums.count(n) == 1)\n"
+        response = run_differential(_request(code))
+        assert response.checked == len(INPUTS)
+        assert response.disagreement is None
+        assert not response.timed_out
+    
+    def test_first_disagreement_reported(self):
+        """Test that the first differing input is returned with both results."""
+        code = "def singleNumber(nums):\n    return -1 if nums[0] < 150 else 0\n"
+        response = run_differential(_request(code))
+        assert response.disagreement.index == 150
+        assert response.disagreement.input == {"nums": [150, -1, 150]}
+        assert (response.disagreement.expected_output, response.disagreement.actual_output) == (-1, 0)
+    
+    def test_submission_error_is_a_disagreement(self):
+        """Test that an exception in the submission is reported with its input."""
+        code = "def singleNumber(nums):\n    return 1 // (nums[0] - 3) * 0 - 1\n"
+        response = run_differential(_request(code))
+        assert response.disagreement.index == 3
+        assert "ZeroDivisionError" in response.disagreement.error_message
+    
+    def test_reference_failures_are_skipped(self):
+        """Test that inputs the reference cannot handle are not held against the submission."""
+        inputs = [{"nums": None}] + INPUTS[:5]
+        response = run_differential(_request("def singleNumber(nums):\n    return -1\n", inputs))
+        assert response.skipped == 1
+        assert response.checked == 5
+    
+    def test_time_budget(self):
+        """Test that a slow submission stops at the budget with partial coverage."""
+        code = "import time\ndef singleNumber(nums):\n    time.sleep(0.01)\n    return -1\n"
+        start = time.monotonic()
+        response = run_differential(_request(code, budget=0.5))
+        assert time.monotonic() - start < 3
+        assert response.timed_out
+        assert 0 < response.checked < len(INPUTS)
+        assert response.disagreement is None
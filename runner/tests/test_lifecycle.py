@@ -0,0 +1,99 @@
+"""
+Tests for readiness and graceful drain
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+import lifecycle
+import run_server
+from compile_cache import COMPILE_TIERS, FAST_TIER, BinaryCache
+
+
+class TestLifecycle:
+    """Test admission, drain deadlines and SIGTERM hand-off."""
+    
+    def test_drain_waits_for_running_jobs(self):
+        """Test that drain returns once the last job is released."""
+        async def scenario():
+            state = lifecycle.Lifecycle(job_paths=["/execute"], drain_timeout_s=5)
+            state.mark_ready()
+            assert state.admit()
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, state.release)
+            assert await state.drain()
+            assert not state.admit()
+            assert state.state == lifecycle.DRAINING
+        
+        asyncio.run(scenario())
+    
+    def test_drain_deadline(self):
+        """Test that a stuck job does not block shutdown past the deadline."""
+        async def scenario():
+            state = lifecycle.Lifecycle(job_paths=["/execute"], drain_timeout_s=0.05)
+            assert state.admit()
+            assert not await state.drain()
+        
+        asyncio.run(scenario())
+    
+    def test_sigterm_drains_before_exit(self):
+        """Test that SIGTERM reaches the previous handler only after in-flight jobs end."""
+        received = []
+        original = signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+        
+        async def scenario():
+            state = lifecycle.Lifecycle(job_paths=["/execute"], drain_timeout_s=5)
+            state.mark_ready()
+            state.install_sigterm()
+            assert state.admit()
+            os.kill(os.getpid(), signal.SIGTERM)
+            await asyncio.sleep(0.05)
+            assert state.state == lifecycle.DRAINING
+            assert received == []
+            state.release()
+            await asyncio.sleep(0.05)
+            assert received == [signal.SIGTERM]
+        
+        try:
+            asyncio.run(scenario())
+        finally:
+            signal.signal(signal.SIGTERM, original)
+    
+    def test_draining_runner_refuses_jobs(self):
+        """Test that /execute gets a 503 and /health reports draining."""
+        client = TestClient(run_server.app)
+        previous = run_server.lifecycle.state
+        run_server.lifecycle.state = lifecycle.DRAINING
+        try:
+            response = client.post("/execute", json={"language": "python", "code": "", "test_cases": []})
+            assert response.status_code == 503
+            health = client.get("/health")
+            assert health.status_code == 503
+            assert health.json()["status"] == "draining"
+        finally:
+            run_server.lifecycle.state = previous
+    
+    def test_warm_up_precompiles_headers(self):
+        """Test that builds after warm-up still succeed with the precompiled headers."""
+        cache = BinaryCache(max_entries=0)
+        built = cache.warm_up()
+        assert set(built) == set(COMPILE_TIERS)
+        assert cache.stats()["precompiled_tiers"] == sum(built.values())
+        
+        program = "#include <vector>\nint main() { std::vector<int> v{1}; return v[0] - 1; }\n"
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.cpp', delete=False) as f:
+            f.write(program)
+            source_file = f.name
+        try:
+            compiled = cache.compile(source_file, program, FAST_TIER)
+            assert compiled.ok, compiled.stderr
+            cache.release(compiled)
+        finally:
+            os.unlink(source_file)
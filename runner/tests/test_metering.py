@@ -0,0 +1,98 @@
+"""
+Tests for operation-count metering
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from capture import run_bounded
+from harness import PYTHON_TEST_HARNESS
+from metering import summarize_meter
+
+LOOP = "def solve(n):\n    total = 0\n    for i in range(n):\n        total += i\n    return total\n"
+
+SWALLOW = "def solve(n):\n    try:\n        while True:\n            n += 1\n    except Exception:\n        return 0\n"
+
+
+def _run(code, n, budget):
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+        f.write(code)
+        path = f.name
+    try:
+        run = run_bounded(
+            ['python3', '-c', PYTHON_TEST_HARNESS, path, "0", "5", "0", str(budget)],
+            input_data=json.dumps({"input": {"n": n}, "expected_output": n * (n - 1) // 2}).encode(),
+            timeout=10,
+            result_channel=True
+        )
+        return json.loads(run.result_text)
+    finally:
+        os.unlink(path)
+
+
+def _has_monitoring():
+    # The harness runs under python3, which need not be the interpreter running pytest
+    probe = subprocess.run(['python3', '-c', 'import sys; sys.monitoring'], capture_output=True)
+    return probe.returncode == 0
+
+
+HAS_MONITORING = _has_monitoring()
+
+needs_monitoring = pytest.mark.skipif(
+    not HAS_MONITORING,
+    reason="exact metering and budget enforcement need sys.monitoring (Python 3.12+)"
+)
+
+needs_fallback = pytest.mark.skipif(
+    HAS_MONITORING,
+    reason="the CPU-time fallback only runs before Python 3.12"
+)
+
+
+class TestMetering:
+    """Test metered calls in the harness and the per-run summary."""
+    
+    @needs_monitoring
+    def test_line_events_are_exact(self):
+        """Test that sys.monitoring counts the same lines on every run."""
+        first = _run(LOOP, 1000, 10 ** 6)
+        second = _run(LOOP, 1000, 10 ** 6)
+        
+        assert first["status"] == "PASS"
+        assert first["meter"] == {"method": "line_events", "ops": 2003}
+        assert second["meter"] == first["meter"]
+    
+    @needs_monitoring
+    def test_budget_cannot_be_swallowed(self):
+        """Test that an over-budget loop inside try/except Exception still fails."""
+        result = _run(SWALLOW, 0, 5000)
+        
+        assert result["status"] == "ERROR"
+        assert result["error"] == "Operation budget exceeded"
+    
+    @needs_fallback
+    def test_estimates_are_not_enforced(self):
+        """Test that the CPU-time fallback reports an estimate without failing the test."""
+        result = _run(LOOP, 10, 1)
+        
+        assert result["status"] == "PASS"
+        assert result["meter"]["method"] == "estimated_cpu"
+    
+    def test_summary_picks_heaviest_test(self):
+        """Test the per-run meter summary."""
+        meters = [{"method": "line_events", "ops": 10}, None, {"method": "line_events", "ops": 30}]
+        report = summarize_meter(100, meters)
+        
+        assert report.total_ops == 40
+        assert report.max_test_ops == 30
+        assert report.max_test_index == 2
+        assert not report.estimated
+        assert summarize_meter(100, [{"method": "estimated_cpu", "ops": 3000}]).estimated
+        assert summarize_meter(100, [None]) is None
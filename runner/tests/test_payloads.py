@@ -0,0 +1,72 @@
+"""
+Tests for compact test-result payloads
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+import payloads
+import run_server
+
+BIG = 100_000
+
+OFF_BY_ONE = """def solve(n):
+    values = list(range(n))
+    values[n // 2] += 1
+    return values
+"""
+
+
+class TestPayloads:
+    """Test previews, mismatch locators and the /execute payload size."""
+    
+    def test_preview_truncates(self):
+        """Test that long values are cut and short ones kept whole."""
+        assert payloads.preview([1, 2, 3]) == "[1, 2, 3]"
+        text = payloads.preview(list(range(BIG)), limit=20)
+        assert text == "[0, 1, 2, 3, 4, 5, 6..."
+    
+    def test_locate_mismatch_window(self):
+        """Test the first differing index and its context on both sides."""
+        expected = list(range(10))
+        actual = expected[:5] + [99] + expected[6:]
+        mismatch = payloads.locate_mismatch(actual, expected)
+        assert mismatch.index == 5
+        assert mismatch.window_start == 2
+        assert mismatch.expected_window == [2, 3, 4, 5, 6, 7, 8]
+        assert mismatch.actual_window == [2, 3, 4, 99, 6, 7, 8]
+    
+    def test_locate_mismatch_length_and_scalars(self):
+        """Test truncated outputs and non-list values."""
+        mismatch = payloads.locate_mismatch([1, 2], [1, 2, 3])
+        assert mismatch.index == 2
+        assert (mismatch.actual_length, mismatch.expected_length) == (2, 3)
+        assert payloads.locate_mismatch(1, 2) is None
+        assert payloads.locate_mismatch([1], [1]) is None
+    
+    def test_failed_large_test_is_compact(self):
+        """Test that a failing 10^5-element test stays small unless full values are requested."""
+        client = TestClient(run_server.app)
+        request = {
+            "language": "python",
+            "code": OFF_BY_ONE,
+            "test_cases": [{"input": {"n": BIG}, "expected_output": list(range(BIG))}]
+        }
+        
+        response = client.post("/execute", json=request)
+        assert response.status_code == 200
+        assert len(response.content) < 4096
+        result = response.json()["test_results"][0]
+        assert result["status"] == "FAIL"
+        assert result["index"] == 0
+        assert result["actual_output"] is None
+        assert result["mismatch"]["index"] == BIG // 2
+        assert result["mismatch"]["actual_window"][payloads.MISMATCH_CONTEXT] == BIG // 2 + 1
+        
+        full = client.post("/execute", json={**request, "full_values": True}).json()["test_results"][0]
+        assert len(full["actual_output"]) == BIG
+        assert full["mismatch"]["index"] == BIG // 2
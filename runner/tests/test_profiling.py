@@ -0,0 +1,226 @@
+"""
+Tests for on-demand CPU profiling
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from capture import run_bounded
+from harness import PYTHON_TEST_HARNESS
+from profiling import parse_gprof_call_graph, profile_cpp, profile_python, select_slowest_test
+
+PYTHON_HOT = """def hot(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def solution(n):
+    return [hot(20000) for _ in range(n)]
+"""
+
+CPP_HOT = """#include <iostream>
+
+__attribute__((noinline)) long long hot(int n) {
+    long long total = 0;
+    for (int i = 0; i < n; i++) total += (long long)i * i % 7;
+    return total;
+}
+
+int main() {
+    int n;
+    std::cin >> n;
+    long long total = 0;
+    for (int i = 0; i < n; i++) total += hot(2000000 + i);
+    std::cout << total << std::endl;
+}
+"""
+
+CPP_RUNAWAY = """volatile long long sink;
+
+__attribute__((noinline)) long long hot(int n) {
+    long long total = 0;
+    for (int i = 0; i < n; i++) total += (long long)i * i % 7;
+    return total;
+}
+
+int main() {
+    for (int i = 0;; i = (i + 1) % 1000) sink = hot(2000000 + i);
+}
+"""
+
+GPROF_CALL_GRAPH = """
+index % time    self  children    called     name
+                0.05    0.00      40/40          main [2]
+[1]    100.0    0.05    0.00      40         hot(int) [1]
+-----------------------------------------------
+[2]    100.0    0.00    0.05                 main [2]
+                0.05    0.00      40/40          hot(int) [1]
+-----------------------------------------------
+"""
+
+needs_gprof = pytest.mark.skipif(
+    shutil.which('g++') is None or shutil.which('gprof') is None,
+    reason="g++ and gprof are required for C++ profiling"
+)
+
+
+def _write(code, suffix):
+    with tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False) as f:
+        f.write(code)
+        return f.name
+
+
+def _profile_python(code, test_input, budget_s=10.0):
+    path = _write(code, '.py')
+    try:
+        return profile_python(path, test_input, 3, budget_s)
+    finally:
+        os.unlink(path)
+
+
+def _traced_test(code, test_input, expected):
+    path = _write(code, '.py')
+    try:
+        run = run_bounded(
+            ['python3', '-c', PYTHON_TEST_HARNESS, path, "1", "3", "0", "0"],
+            input_data=json.dumps({"input": test_input, "expected_output": expected}).encode(),
+            timeout=10,
+            result_channel=True
+        )
+        return json.loads(run.result_text)
+    finally:
+        os.unlink(path)
+
+
+def _profile_cpp(code, input_str, budget_s=10.0):
+    path = _write(code, '.cpp')
+    try:
+        return profile_cpp(path, input_str, 1, budget_s)
+    finally:
+        os.unlink(path)
+
+
+class TestPythonProfiling:
+    """Test the cProfile + line sampler child."""
+    
+    def test_hot_function_reported(self):
+        """Test that the hot function leads the report with exact calls and sampled lines."""
+        report = _profile_python(PYTHON_HOT, {"n": 30})
+        
+        assert report.tool == "cProfile"
+        assert report.test_index == 3
+        assert not report.timed_out and report.error_message == ""
+        functions = {entry.function: entry for entry in report.functions}
+        assert functions["hot"].calls == 30
+        assert functions["hot"].filename == "<user code>"
+        assert functions["hot"].line == 1
+        assert 0 < functions["hot"].self_ms <= functions["solution"].cumulative_ms
+        
+        assert report.lines
+        assert sum(line.percent for line in report.lines) <= 100.5
+        # Nearly all samples land in the loop of hot()
+        assert report.lines[0].line in (3, 4)
+        assert report.lines[0].source.startswith(("for", "total"))
+    
+    def test_budget_expiry_is_timed_out(self):
+        """Test that a run past its budget is stopped and still reports what it saw."""
+        report = _profile_python("def solution(n):\n    while True:\n        n += 1\n", {"n": 0}, budget_s=0.5)
+        
+        assert report.timed_out
+        assert report.lines and report.lines[0].line in (2, 3)
+    
+    def test_user_exception_is_reported(self):
+        """Test that an exception in the profiled code becomes the error message."""
+        report = _profile_python("def solution(n):\n    raise ValueError('bad input')\n", {"n": 1})
+        
+        assert not report.timed_out
+        assert report.error_message == "ValueError: bad input"
+    
+    def test_missing_function_is_an_error(self):
+        """Test that code without an entry point is reported, not crashed on."""
+        report = _profile_python("x = 1\n", {"n": 1})
+        
+        assert report.error_message == "No function found"
+        assert report.functions == []
+
+
+class TestMemoryTracing:
+    """Test the harness's memory mode."""
+    
+    def test_passing_test_reports_memory(self):
+        """Test that the traced peak and the allocating line are reported."""
+        result = _traced_test("def solve(n):\n    big = [0] * n\n    return len(big)\n", {"n": 100000}, 100000)
+        
+        assert result["status"] == "PASS"
+        assert result["memory"]["peak_kb"] >= 700
+        assert result["memory"]["top_sites"][0]["line"] == 2
+    
+    def test_erroring_test_keeps_memory(self):
+        """Test that a test that raises still reports what it allocated."""
+        code = "def solve(n):\n    big = [0] * n\n    raise ValueError(len(big))\n"
+        result = _traced_test(code, {"n": 100000}, 0)
+        
+        assert result["status"] == "ERROR"
+        assert result["exception"] == "ValueError"
+        assert result["memory"]["peak_kb"] >= 700
+        assert result["memory"]["top_sites"][0]["source"] == "big = [0] * n"
+
+
+class TestCppProfiling:
+    """Test the gprof rebuild and call-graph summary."""
+    
+    def test_parse_call_graph(self):
+        """Test that primary lines are parsed and runtime frames dropped."""
+        entries = parse_gprof_call_graph(GPROF_CALL_GRAPH)
+        
+        assert [entry.function for entry in entries] == ["hot(int)"]
+        assert entries[0].calls == 40
+        assert entries[0].self_ms == entries[0].cumulative_ms == 50.0
+    
+    @needs_gprof
+    def test_hot_function_reported(self):
+        """Test that the hot function is found with its exact call count."""
+        report = _profile_cpp(CPP_HOT, "25\n")
+        
+        assert report.tool == "gprof"
+        assert report.test_index == 1
+        assert not report.timed_out and report.error_message == ""
+        functions = {entry.function: entry for entry in report.functions}
+        assert functions["hot(int)"].calls == 25
+        assert functions["hot(int)"].cumulative_ms >= functions["hot(int)"].self_ms >= 0
+    
+    @needs_gprof
+    def test_budget_expiry_is_timed_out(self):
+        """Test that the guard stops a runaway program and the partial profile is kept."""
+        report = _profile_cpp(CPP_RUNAWAY, "", budget_s=1)
+        
+        assert report.timed_out
+        assert report.error_message == ""
+        assert any(entry.function == "hot(int)" for entry in report.functions)
+    
+    @needs_gprof
+    def test_compile_error_is_reported(self):
+        """Test that a build failure comes back as the compiler's message."""
+        report = _profile_cpp("int main() { return undefined_name; }\n", "")
+        
+        assert not report.timed_out
+        assert "undefined_name" in report.error_message
+        assert report.functions == []
+
+
+class TestProfileTarget:
+    """Test the choice of test to profile."""
+    
+    def test_select_slowest_test(self):
+        """Test that the profiled test is the slowest one, if any ran."""
+        assert select_slowest_test([3, 9, 4]) == 1
+        assert select_slowest_test([]) is None
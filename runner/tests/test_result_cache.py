@@ -0,0 +1,119 @@
+"""
+Tests for the runner result cache
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+import run_server
+from result_cache import ResultCache, is_cacheable, make_cache_key, normalized_code_hash
+
+
+class TestResultCache:
+    """Test result cache keys, eviction and cacheability."""
+    
+    def test_python_whitespace_and_comments_ignored(self):
+        """Test that formatting-only changes share a hash."""
+        a = "def f(x):\n    # add one\n    return x + 1\n"
+        b = "def f(x):\n\n    return x+1  # different comment\n"
+        c = "def f(x):\n    return x + 2\n"
+        
+        assert normalized_code_hash("python", a) == normalized_code_hash("python", b)
+        assert normalized_code_hash("python", a) != normalized_code_hash("python", c)
+    
+    def test_cpp_comments_ignored_but_strings_kept(self):
+        """Test that C++ comments are stripped outside string literals only."""
+        a = 'int f() { return 1; } // one\n/* block */\n'
+        b = 'int f()  {  return 1; }\n'
+        c = 'string s = "// not a comment";\n'
+        d = 'string s = "";\n'
+        
+        assert normalized_code_hash("cpp", a) == normalized_code_hash("cpp", b)
+        assert normalized_code_hash("cpp", c) != normalized_code_hash("cpp", d)
+    
+    def test_key_depends_on_tests_and_limits(self):
+        """Test that the cache key covers tests and limits."""
+        code = "def f(x): return x"
+        base = make_cache_key("python", code, "tests-a", (2,))
+        
+        assert base == make_cache_key("python", code, "tests-a", (2,))
+        assert base != make_cache_key("python", code, "tests-b", (2,))
+        assert base != make_cache_key("python", code, "tests-a", (5,))
+    
+    def test_lru_eviction_and_ttl(self):
+        """Test LRU eviction order and TTL expiry."""
+        cache = ResultCache(max_entries=2, ttl_s=60)
+        cache.put("a", {"verdict": "ACCEPTED"})
+        cache.put("b", {"verdict": "ACCEPTED"})
+        cache.get("a")
+        cache.put("c", {"verdict": "ACCEPTED"})
+        
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        
+        expired = ResultCache(max_entries=2, ttl_s=-1)
+        expired.put("a", {"verdict": "ACCEPTED"})
+        assert expired.get("a") is None
+    
+    def test_only_deterministic_verdicts_cached(self):
+        """Test that timeouts are never cached, and runtime errors only when they were exceptions."""
+        assert is_cacheable({"verdict": "ACCEPTED", "test_results": []})
+        exception = {"verdict": "RUNTIME_ERROR", "test_results": [{"error_message": "division by zero"}]}
+        assert is_cacheable(exception, exception_errors_only=True)
+        assert not is_cacheable(exception)
+        assert not is_cacheable({"verdict": "RUNTIME_ERROR", "test_results": [
+            {"error_message": "Time limit exceeded"}
+        ]}, exception_errors_only=True)
+        assert not is_cacheable({"verdict": "TIMEOUT", "test_results": []})
+    
+    def test_byte_bound(self):
+        """Test that total size is bounded and oversized responses are not stored."""
+        response = {"verdict": "ACCEPTED", "runtime_output": "x" * 100}
+        cache = ResultCache(max_entries=10, ttl_s=60, max_bytes=300)
+        cache.put("a", response)
+        cache.put("b", response)
+        cache.put("c", response)
+        
+        assert cache.get("a") is None
+        assert cache.get("b") is not None and cache.get("c") is not None
+        assert cache.stats()["bytes"] <= 300
+        
+        cache.put("huge", {"verdict": "ACCEPTED", "runtime_output": "x" * 1000})
+        assert cache.get("huge") is None
+        assert cache.get("c") is not None
+    
+    def test_execute_caches_exceptions_not_crashes(self):
+        """Test that a raised exception is served again but a killed process is judged afresh."""
+        client = TestClient(run_server.app)
+        tests = [{"input": {"n": 1}, "expected_output": 1}]
+        raises = "def solve(n):\n    return n // 0\n"
+        killed = "import os, signal\n\ndef solve(n):\n    os.kill(os.getpid(), signal.SIGKILL)\n"
+        
+        for code, cached in ((raises, True), (killed, False)):
+            request = {"language": "python", "code": code, "test_cases": tests}
+            first = client.post("/execute", json=request).json()
+            again = client.post("/execute", json=request).json()
+            assert first["verdict"] == again["verdict"] == "RUNTIME_ERROR"
+            assert again["cached"] is cached
+    
+    def test_execute_output_served_to_exact_code_only(self):
+        """Test that program output has no temp paths and is reused only for identical code."""
+        client = TestClient(run_server.app)
+        tests = [{"input": {"n": 2}, "expected_output": 2}]
+        code = "import sys\n\ndef solve(n):\n    print(solve.__code__.co_filename, file=sys.stderr)\n    return n\n"
+        reformatted = code.replace("\n\ndef", "\n\n\ndef")
+        
+        first = client.post("/execute", json={"language": "python", "code": code, "test_cases": tests}).json()
+        assert first["verdict"] == "ACCEPTED"
+        assert "solution.py" in first["runtime_output"]
+        assert "/tmp" not in first["runtime_output"]
+        
+        other = client.post("/execute", json={"language": "python", "code": reformatted, "test_cases": tests}).json()
+        assert other["cached"] is False
+        same = client.post("/execute", json={"language": "python", "code": code, "test_cases": tests}).json()
+        assert same["cached"] is True
@@ -0,0 +1,81 @@
+"""
+Tests for the content-addressed test-set store
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import result_cache
+import testset_store
+
+
+def _encode(test_cases):
+    return json.dumps(test_cases, sort_keys=True, separators=(',', ':')).encode()
+
+
+TESTS = [{"input": {"nums": [i, i + 1]}, "expected_output": i} for i in range(20)]
+
+
+class TestTestSetStore:
+    """Test hashing, mmap-backed sets and eviction."""
+    
+    def test_hash_matches_result_cache(self):
+        """Test that uploads are addressed like inline test sets."""
+        data = _encode(TESTS)
+        assert testset_store.content_hash(data) == result_cache.test_set_hash(TESTS)
+    
+    def test_rejects_mismatched_hash(self):
+        """Test that a set cannot be stored under a foreign address."""
+        store = testset_store.TestSetStore()
+        with pytest.raises(testset_store.InvalidTestSet):
+            store.put("0" * 64, _encode(TESTS))
+    
+    def test_large_sets_are_mapped(self):
+        """Test that large sets read back lazily from disk."""
+        store = testset_store.TestSetStore(mmap_bytes=100)
+        data = _encode(TESTS)
+        set_hash = testset_store.content_hash(data)
+        store.put(set_hash, data)
+        
+        stored = store.get(set_hash)
+        assert isinstance(stored, testset_store.MappedTestSet)
+        assert len(stored) == len(TESTS)
+        assert stored[7] == TESTS[7]
+        assert stored[-1] == TESTS[-1]
+        assert list(stored) == TESTS
+    
+    def test_eviction_removes_mapped_file(self):
+        """Test LRU eviction and cleanup of evicted files."""
+        store = testset_store.TestSetStore(max_entries=1, mmap_bytes=100)
+        first, second = _encode(TESTS), _encode(TESTS[:10])
+        store.put(testset_store.content_hash(first), first)
+        path = store.get(testset_store.content_hash(first)).path
+        store.put(testset_store.content_hash(second), second)
+        
+        assert store.get(testset_store.content_hash(first)) is None
+        assert not os.path.exists(path)
+        assert store.stats()["entries"] == 1
+    
+    def test_eviction_closes_mapping_after_readers(self):
+        """Test that an evicted mapping stays readable until its last run releases it."""
+        store = testset_store.TestSetStore(max_entries=1, mmap_bytes=100)
+        first, second, third = _encode(TESTS), _encode(TESTS[:10]), _encode(TESTS[:15])
+        store.put(testset_store.content_hash(first), first)
+        released = store.get(testset_store.content_hash(first))
+        store.release(released)
+        assert not released.closed  # still stored
+        
+        store.put(testset_store.content_hash(second), second)
+        assert released.closed  # evicted with no readers
+        
+        in_use = store.get(testset_store.content_hash(second))
+        store.put(testset_store.content_hash(third), third)
+        assert not in_use.closed
+        assert in_use[3] == TESTS[3]
+        store.release(in_use)
+        assert in_use.closed
@@ -0,0 +1,40 @@
+"""
+Tests for stable-timing mode
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import timing
+
+
+class TestStableTiming:
+    """Test timing summaries."""
+    
+    def test_median_and_iqr_ignore_outliers(self):
+        """Test that one slow repeat moves the max but not the median."""
+        stats = timing.summarize_samples([n * 1000 for n in (1000, 1100, 1050, 990, 1020, 50000, 1010)])
+        
+        assert stats.repeats == 7
+        assert stats.median_us == 1020.0
+        assert stats.max_us == 50000.0
+        assert stats.iqr_us <= 100.0
+    
+    def test_run_summary_totals(self):
+        """Test that per-test medians add up and spread is relative."""
+        per_test = [
+            timing.summarize_samples([2000, 2000, 2000]),
+            timing.summarize_samples([1000, 2000, 3000]),
+        ]
+        summary = timing.summarize_run(per_test, "in-harness repeats", cpu=None)
+        
+        assert summary.total_median_ms == 0.004
+        assert summary.spread_pct == 50.0
+    
+    def test_timing_cpu_is_allowed(self):
+        """Test that the default pin target is a core we may run on."""
+        cpu = timing.timing_cpu()
+        if cpu is not None and timing.STABLE_TIMING_CPU is None:
+            assert cpu in os.sched_getaffinity(0)
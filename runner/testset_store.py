@@ -0,0 +1,158 @@
+"""
+Content-addressed test-set store for the code runner.
+
+The API uploads a test set once (``PUT /test-sets/{hash}``, the hash being the
+SHA-256 of the uploaded JSON) and afterwards refers to it by hash in
+``/execute``. Sets are kept least-recently-used; small ones stay parsed in
+memory, large ones are written to local disk one test per record and
+memory-mapped, so only the test being run is parsed.
+
+``get`` checks a set out to a run and ``release`` returns it; an evicted
+mapping is closed once no run is reading it any more.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+TEST_STORE_SIZE = int(os.environ.get("TEST_STORE_SIZE", "256"))
+
+# Sets whose upload is larger than this are memory-mapped from disk
+TEST_STORE_MMAP_BYTES = int(os.environ.get("TEST_STORE_MMAP_BYTES", str(1024 * 1024)))
+
+
+class InvalidTestSet(ValueError):
+    pass
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class MappedTestSet(Sequence):
+    """Test cases stored as consecutive JSON records in a memory-mapped file."""
+
+    def __init__(self, path: str, offsets: List[int]):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = offsets  # record i spans offsets[i]:offsets[i + 1]
+        self.nbytes = offsets[-1]
+        self.readers = 0  # runs currently holding this set
+        self.evicted = False
+
+    @property
+    def closed(self) -> bool:
+        return self._map.closed
+
+    def close_when_unread(self) -> None:
+        if self.evicted and self.readers == 0 and not self._map.closed:
+            self._map.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:  # type: ignore[override]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return json.loads(self._map[self._offsets[index]:self._offsets[index + 1]])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+TestSet = Union[List[Dict[str, Any]], MappedTestSet]
+
+
+class TestSetStore:
+    """Bounded LRU map from content hash to a test set."""
+
+    def __init__(self, max_entries: int = TEST_STORE_SIZE, mmap_bytes: int = TEST_STORE_MMAP_BYTES):
+        self.max_entries = max_entries
+        self.mmap_bytes = mmap_bytes
+        self._dir: Optional[str] = None
+        self._entries: "OrderedDict[str, TestSet]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uploads = 0
+
+    def get(self, set_hash: str) -> Optional[TestSet]:
+        """Check a set out for a run; hand it back with ``release`` when done."""
+        test_set = self._entries.get(set_hash)
+        if test_set is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(set_hash)
+        self.hits += 1
+        if isinstance(test_set, MappedTestSet):
+            test_set.readers += 1
+        return test_set
+
+    def release(self, test_set: TestSet) -> None:
+        if isinstance(test_set, MappedTestSet):
+            test_set.readers -= 1
+            test_set.close_when_unread()
+
+    def __contains__(self, set_hash: str) -> bool:
+        return set_hash in self._entries
+
+    def put(self, set_hash: str, data: bytes) -> int:
+        """Store an uploaded set after checking it against its address."""
+        if content_hash(data) != set_hash:
+            raise InvalidTestSet("Test set does not match its hash")
+        try:
+            test_cases = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise InvalidTestSet(f"Invalid test set: {e}")
+        if not isinstance(test_cases, list) or not all(isinstance(tc, dict) for tc in test_cases):
+            raise InvalidTestSet("A test set must be a list of test cases")
+
+        test_set: TestSet = test_cases
+        if len(data) > self.mmap_bytes:
+            test_set = self._write_mapped(set_hash, test_cases)
+
+        self._entries[set_hash] = test_set
+        self._entries.move_to_end(set_hash)
+        self.uploads += 1
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._discard(evicted)
+        return len(test_cases)
+
+    def _write_mapped(self, set_hash: str, test_cases: List[Dict[str, Any]]) -> MappedTestSet:
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="leetcoach_tests_")
+        path = os.path.join(self._dir, f"{set_hash}.jsonl")
+        offsets = [0]
+        with open(path, 'wb') as f:
+            for test_case in test_cases:
+                record = json.dumps(test_case, separators=(',', ':')).encode()
+                f.write(record)
+                offsets.append(offsets[-1] + len(record))
+        return MappedTestSet(path, offsets)
+
+    def _discard(self, test_set: TestSet) -> None:
+        # A run still iterating an evicted set keeps its mapping until it
+        # releases the set; the directory entry goes away at once
+        if not isinstance(test_set, MappedTestSet):
+            return
+        if os.path.exists(test_set.path):
+            os.unlink(test_set.path)
+        test_set.evicted = True
+        test_set.close_when_unread()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "mapped": sum(1 for ts in self._entries.values() if isinstance(ts, MappedTestSet)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "uploads": self.uploads,
+        }
@@ -0,0 +1,79 @@
+"""
+Stable-timing mode for the code runner.
+
+Regular runtimes are single wall-clock measurements and move with machine
+load. In stable-timing mode an accepted submission is measured again: each
+test runs in a child pinned to one core, the timed section is repeated
+``STABLE_TIMING_REPEATS`` times, and the median and spread are reported.
+"""
+
+import os
+import statistics
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+STABLE_TIMING_REPEATS = int(os.environ.get("STABLE_TIMING_REPEATS", "7"))
+
+# Core measured children are pinned to. Nothing reserves it: by default it is
+# just the highest core in the runner's affinity set, which other processes and
+# concurrent submissions still share. For quiet measurements, isolate a core
+# (isolcpus or a dedicated cpuset) and name it here.
+STABLE_TIMING_CPU = os.environ.get("STABLE_TIMING_CPU")
+
+
+class TimingStats(BaseModel):
+    repeats: int
+    median_us: float
+    min_us: float
+    max_us: float
+    iqr_us: float
+
+
+class StableTiming(BaseModel):
+    method: str  # in-harness repeats (Python) or per-process CPU time (C++)
+    cpu: Optional[int] = None  # core the measured children were pinned to
+    repeats: int
+    total_median_ms: float
+    spread_pct: float  # summed IQR relative to the summed medians
+
+
+def timing_cpu() -> Optional[int]:
+    """Core to pin measured children to, or None where affinity is unsupported.
+
+    ``STABLE_TIMING_CPU`` if set, otherwise the highest allowed core (shared,
+    not reserved).
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    if STABLE_TIMING_CPU is not None:
+        return int(STABLE_TIMING_CPU)
+    return max(os.sched_getaffinity(0))
+
+
+def summarize_samples(samples_ns: List[int]) -> TimingStats:
+    samples_us = sorted(ns / 1000 for ns in samples_ns)
+    if len(samples_us) >= 4:
+        quartiles = statistics.quantiles(samples_us, n=4)
+        iqr = quartiles[2] - quartiles[0]
+    else:
+        iqr = samples_us[-1] - samples_us[0]
+    return TimingStats(
+        repeats=len(samples_us),
+        median_us=round(statistics.median(samples_us), 1),
+        min_us=round(samples_us[0], 1),
+        max_us=round(samples_us[-1], 1),
+        iqr_us=round(iqr, 1)
+    )
+
+
+def summarize_run(per_test: List[TimingStats], method: str, cpu: Optional[int]) -> StableTiming:
+    total_median = sum(stats.median_us for stats in per_test)
+    total_iqr = sum(stats.iqr_us for stats in per_test)
+    return StableTiming(
+        method=method,
+        cpu=cpu,
+        repeats=STABLE_TIMING_REPEATS,
+        total_median_ms=round(total_median / 1000, 3),
+        spread_pct=round(100.0 * total_iqr / total_median, 1) if total_median else 0.0
+    )
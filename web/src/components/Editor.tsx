@@ -5,6 +5,7 @@ import { Play, Send, Code2, FileText } from 'lucide-react'
 import { Editor as MonacoEditor } from '@monaco-editor/react'
 import { useAppStore } from '@/lib/state'
 import { apiClient } from '@/lib/api'
+import { describeMismatch, testValue } from '@/lib/utils'
 
 export function Editor() {
   const { currentProblem, selectedLanguage, code, setCode, setSelectedLanguage, setCurrentSubmission, setCurrentRunResult } = useAppStore()
@@ -258,8 +259,11 @@ export function Editor() {
                       </div>
                       {test.status === 'FAIL' && (
                         <div className="text-xs text-slate-600">
-                          Expected: <span className="font-mono">{JSON.stringify(test.expected_output)}</span><br/>
-                          Got: <span className="font-mono">{JSON.stringify(test.actual_output)}</span>
+                          Expected: <span className="font-mono">{testValue(test.expected_output, test.expected_preview)}</span><br/>
+                          Got: <span className="font-mono">{testValue(test.actual_output, test.actual_preview)}</span>
+                          {test.mismatch && (
+                            <><br/><span className="font-mono">{describeMismatch(test.mismatch)}</span></>
+                          )}
                         </div>
                       )}
                       {test.error_message && (
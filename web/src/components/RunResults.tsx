@@ -2,6 +2,7 @@
 
 import { CheckCircle, XCircle, AlertCircle, Clock, Zap, Play } from 'lucide-react'
 import { RunResult } from '@/lib/state'
+import { testValue } from '@/lib/utils'
 
 interface RunResultsProps {
   result: RunResult
@@ -103,6 +104,11 @@ export function RunResults({ result }: RunResultsProps) {
             <span className="text-lg font-semibold">
               {result.runtime_ms}ms
             </span>
+            {result.details?.compile_tier === 'fast' && (
+              <p className="text-xs text-muted-foreground mt-1" title={result.details.timing_note}>
+                Fast build (unoptimized) - not comparable to submissions
+              </p>
+            )}
           </div>
         )}
 
@@ -153,19 +159,19 @@ export function RunResults({ result }: RunResultsProps) {
                       </span>
                     </td>
                     <td className="font-mono text-xs">
-                      {JSON.stringify(testResult.input).slice(0, 50)}
-                      {JSON.stringify(testResult.input).length > 50 && '...'}
+                      {testValue(testResult.input, testResult.input_preview).slice(0, 50)}
+                      {testValue(testResult.input, testResult.input_preview).length > 50 && '...'}
                     </td>
                     <td className="font-mono text-xs">
-                      {JSON.stringify(testResult.expected_output).slice(0, 50)}
-                      {JSON.stringify(testResult.expected_output).length > 50 && '...'}
+                      {testValue(testResult.expected_output, testResult.expected_preview).slice(0, 50)}
+                      {testValue(testResult.expected_output, testResult.expected_preview).length > 50 && '...'}
                     </td>
                     <td className="font-mono text-xs">
-                      {testResult.actual_output !== undefined 
-                        ? JSON.stringify(testResult.actual_output).slice(0, 50)
-                        : 'N/A'
-                      }
-                      {testResult.actual_output !== undefined && JSON.stringify(testResult.actual_output).length > 50 && '...'}
+                      {testValue(testResult.actual_output, testResult.actual_preview).slice(0, 50)}
+                      {testValue(testResult.actual_output, testResult.actual_preview).length > 50 && '...'}
+                      {testResult.mismatch && (
+                        <div className="text-red-600">differs at [{testResult.mismatch.index}]</div>
+                      )}
                     </td>
                     <td className="text-xs">
                       {testResult.runtime_ms ? `${testResult.runtime_ms}ms` : 'N/A'}
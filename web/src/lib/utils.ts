@@ -3,4 +3,16 @@ import { twMerge } from "tailwind-merge"
 
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
-}
\ No newline at end of file
+}
+
+// Test results carry JSON previews; complete values only when requested (full_values)
+export function testValue(full: unknown, preview?: string | null): string {
+  if (preview !== undefined && preview !== null) return preview
+  return full === undefined || full === null ? "N/A" : JSON.stringify(full)
+}
+
+// "First difference at index i" line for list outputs that failed
+export function describeMismatch(mismatch?: { index: number; window_start: number; expected_window: unknown[]; actual_window: unknown[] } | null): string | null {
+  if (!mismatch) return null
+  return `First difference at index ${mismatch.index}: expected ${JSON.stringify(mismatch.expected_window)}, got ${JSON.stringify(mismatch.actual_window)} (from index ${mismatch.window_start})`
+}